@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Monte Carlo balance checks
+
+Sweeps dungeon levels, party compositions (at chosen character levels)
+and the monsters each level spawns, fights every combination many times
+with PartyCombat.simulate() - the whole party fights, as in the game - and
+reports win rates with confidence intervals:
+
+    python balance.py --levels 1-5 --fights 20000
+    python balance.py --levels 3 --members 0,2 --members 0 --character-levels 1,3 --format json -o balance.json
+
+Each --members is one party, given as indices into the default party
+(0 fighter, 1 wizard, 2 cleric); the default is the whole default party.
+Besides every monster of the level's spawn roster (in groups of --group
+monsters), each level gets a 'level' row: the party fights
+config.get_monster_count() random roster monsters one after another,
+without resting in between (the fallen stay down), as it would clearing
+the level.
+
+The fights are split into chunks and run on all cores with a process
+pool. Every chunk draws from its own RNG stream, derived from --seed and
+the chunk's place in the sweep, so the results depend only on the seed
+and not on the number of workers.
+"""
+import sys
+import csv
+import json
+import argparse
+from statistics import NormalDist
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import dice
+import config
+from rng import RNGContext
+from party_combat import PartyCombat
+from monster import Monster
+from game_state import GameState
+from main import create_default_party
+
+
+# Opponent of the rows that fight through a whole level
+LEVEL = 'level'
+
+# Fights per pool task
+CHUNK_SIZE = 2000
+
+# Party fought with unless --members says otherwise: the whole default party
+DEFAULT_PARTY = (0, 1, 2)
+
+# One combination of the sweep:
+#   dungeon_level:   Level whose monsters are fought
+#   members:         Tuple of default party indices making up the party
+#   character_level: Level the members are raised to
+#   opponent:        Monster name, or LEVEL
+#   monsters:        Monsters per fight
+Scenario = namedtuple('Scenario', [
+    'dungeon_level', 'members', 'character_level', 'opponent', 'monsters'
+])
+
+# Output columns (avg_hp_lost is the whole party's)
+FIELDS = ['dungeon_level', 'party', 'classes', 'character_level', 'opponent', 'monsters',
+          'fights', 'wins', 'win_rate', 'ci_low', 'ci_high', 'avg_rounds', 'avg_hp_lost']
+
+
+def wilson_interval(wins, fights, confidence=0.95):
+    """
+    Wilson score interval for a win rate.
+
+    Returns:
+        (low, high)
+    """
+    if not fights:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    rate = wins / fights
+    denominator = 1 + z * z / fights
+    center = (rate + z * z / (2 * fights)) / denominator
+    margin = z * (rate * (1 - rate) / fights + z * z / (4 * fights * fights)) ** 0.5 / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+
+def build_scenarios(levels, parties, character_levels, group=1):
+    """
+    Every combination to simulate.
+
+    Args:
+        levels: Dungeon levels
+        parties: Party compositions, each a sequence of default party indices
+        character_levels: Character levels
+        group: Monsters per fight against a single roster monster
+
+    Returns:
+        List of Scenario
+    """
+    scenarios = []
+    for dungeon_level in levels:
+        opponents = [(spec[0], group) for spec in GameState.monster_roster(dungeon_level)]
+        opponents.append((LEVEL, config.get_monster_count(dungeon_level)))
+        for members in parties:
+            for character_level in character_levels:
+                for opponent, monsters in opponents:
+                    scenarios.append(Scenario(dungeon_level, tuple(members), character_level,
+                                              opponent, monsters))
+    return scenarios
+
+
+def make_party(members, character_level):
+    """Default party members, raised to the given level"""
+    default = create_default_party().members
+    party = [default[member] for member in members]
+    for character in party:
+        if character.level != character_level:
+            character.level = character_level
+            character.long_rest()  # Recomputes hit points and attack bonus
+    return party
+
+
+def run_chunk(task):
+    """
+    Fight one chunk of a scenario (runs in a pool worker).
+
+    Args:
+        task: (Scenario, fights, seed) - the seed is the chunk's own
+
+    Returns:
+        (wins, rounds, hp_lost) totals
+    """
+    scenario, fights, seed = task
+    context = RNGContext(seed)
+    spawning = context.stream('spawning')
+    roster = GameState.monster_roster(scenario.dungeon_level)
+    if scenario.opponent != LEVEL:
+        roster = [spec for spec in roster if spec[0] == scenario.opponent]
+    party = make_party(scenario.members, scenario.character_level)
+
+    wins = rounds = hp_lost = 0
+    with dice.using_rng(context.stream('combat')):
+        for _ in range(fights):
+            for character in party:
+                character.current_hp = character.max_hp
+            if scenario.opponent == LEVEL:
+                # One monster at a time, as they are met on the level
+                encounters = [[spawning.choice(roster)] for _ in range(scenario.monsters)]
+            else:
+                encounters = [roster * scenario.monsters]
+            for specs in encounters:
+                with dice.using_rng(spawning):
+                    monsters = [Monster(*spec) for spec in specs]
+                outcome = PartyCombat(party, monsters).simulate()
+                rounds += outcome.rounds
+                if outcome.status != 'victory':
+                    break
+            else:
+                wins += 1
+            hp_lost += sum(c.max_hp - max(0, c.current_hp) for c in party)
+    return wins, rounds, hp_lost
+
+
+def run_sweep(scenarios, fights, seed=0, workers=None, chunk_size=CHUNK_SIZE, confidence=0.95):
+    """
+    Simulate every scenario.
+
+    Args:
+        scenarios: List of Scenario
+        fights: Fights per scenario
+        seed: Master seed
+        workers: Worker processes (None for one per core, 0 to run here)
+        chunk_size: Fights per task
+        confidence: Confidence level of the intervals
+
+    Returns:
+        List of result dicts with the FIELDS keys, in scenario order
+    """
+    master = RNGContext(seed)
+    tasks, owners = [], []
+    for index, scenario in enumerate(scenarios):
+        for chunk, start in enumerate(range(0, fights, chunk_size)):
+            chunk_seed = master.child(f"{'/'.join(map(str, scenario))}/{chunk}").seed
+            tasks.append((scenario, min(chunk_size, fights - start), chunk_seed))
+            owners.append(index)
+
+    if workers == 0:
+        results = map(run_chunk, tasks)
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        results = executor.map(run_chunk, tasks)
+
+    totals = [[0, 0, 0] for _ in scenarios]
+    try:
+        for index, result in zip(owners, results):
+            for i, value in enumerate(result):
+                totals[index][i] += value
+    finally:
+        if workers != 0:
+            executor.shutdown()
+
+    default = create_default_party().members
+    rows = []
+    for scenario, (wins, rounds, hp_lost) in zip(scenarios, totals):
+        low, high = wilson_interval(wins, fights, confidence)
+        party = [default[member] for member in scenario.members]
+        rows.append({
+            'dungeon_level': scenario.dungeon_level,
+            'party': '+'.join(c.name for c in party),
+            'classes': '+'.join(c.char_class for c in party),
+            'character_level': scenario.character_level,
+            'opponent': scenario.opponent,
+            'monsters': scenario.monsters,
+            'fights': fights,
+            'wins': wins,
+            'win_rate': round(wins / fights, 4) if fights else 0.0,
+            'ci_low': round(low, 4),
+            'ci_high': round(high, 4),
+            'avg_rounds': round(rounds / fights, 2) if fights else 0.0,
+            'avg_hp_lost': round(hp_lost / fights, 2) if fights else 0.0,
+        })
+    return rows
+
+
+def write_results(rows, output, output_format, settings):
+    """Write rows as CSV, or as JSON together with the sweep settings"""
+    if output_format == 'json':
+        json.dump({'settings': settings, 'results': rows}, output, indent=2)
+        output.write('\n')
+    else:
+        writer = csv.DictWriter(output, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def parse_numbers(text):
+    """Parse '1-5' or '1,3,5' (or a mix) into a list of ints"""
+    numbers = []
+    for part in text.split(','):
+        if '-' in part:
+            first, last = part.split('-')
+            numbers.extend(range(int(first), int(last) + 1))
+        else:
+            numbers.append(int(part))
+    return numbers
+
+
+def main(argv=None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Monte Carlo balance checks for DungeonSurvival")
+    parser.add_argument('--levels', type=parse_numbers, default=[1, 2, 3, 4, 5],
+                        help="Dungeon levels, e.g. 1-5 or 1,3 (default 1-5)")
+    parser.add_argument('--members', type=parse_numbers, action='append',
+                        help="One party as default party members (0 fighter, 1 wizard, "
+                             "2 cleric), e.g. 0,1,2; repeat for more parties (default 0,1,2)")
+    parser.add_argument('--character-levels', type=parse_numbers, default=[1],
+                        help="Character levels to raise the members to")
+    parser.add_argument('--group', type=int, default=1,
+                        help="Monsters per fight against a roster monster")
+    parser.add_argument('--fights', type=int, default=10000, help="Fights per scenario")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Worker processes (default one per core, 0 for none)")
+    parser.add_argument('--confidence', type=float, default=0.95)
+    parser.add_argument('--format', choices=['csv', 'json'], default='csv')
+    parser.add_argument('-o', '--output', help="Output file (default stdout)")
+    args = parser.parse_args(argv)
+
+    parties = args.members or [DEFAULT_PARTY]
+    scenarios = build_scenarios(args.levels, parties, args.character_levels, args.group)
+    rows = run_sweep(scenarios, args.fights, args.seed, args.workers,
+                     confidence=args.confidence)
+    settings = {
+        'fights': args.fights,
+        'seed': args.seed,
+        'confidence': args.confidence,
+        'difficulty_multiplier': config.DIFFICULTY_MULTIPLIER,
+    }
+    if args.output:
+        with open(args.output, 'w', newline='') as output:
+            write_results(rows, output, args.format, settings)
+    else:
+        write_results(rows, sys.stdout, args.format, settings)
+
+
+if __name__ == "__main__":
+    main()
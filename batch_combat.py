@@ -0,0 +1,180 @@
+"""
+Vectorized combat for many copies of one encounter
+
+BatchCombat fights N independent copies of the same matchup at once. The
+hit points of the character and of every monster live in NumPy arrays,
+and each round's initiative, attack rolls, hits and damage are drawn and
+applied with array operations for all unfinished copies together.
+
+The rules are those of Combat.execute_round() with the character always
+attacking:
+
+    * Initiative is rolled every round (or once, with persistent
+      initiative); the character wins ties
+    * The character attacks the first monster alive at the start of the
+      round, even if it has already fallen this round
+    * Every living monster attacks on its own initiative
+    * Monsters ahead of the character attack before its blow lands
+    * A hit deals at least 1 damage
+    * At the end of the round a fallen character loses, even if the last
+      monster fell too
+
+Outcomes therefore follow the same distribution as Combat.simulate(),
+though not roll for roll, since the dice come from a NumPy generator.
+Requires NumPy.
+"""
+from collections import namedtuple
+import numpy
+import dice
+
+
+# Status codes in BatchOutcome.status
+ONGOING = 0
+VICTORY = 1
+DEFEAT = -1
+
+# Per-copy results of BatchCombat.run(); every field is an array of length n
+# (see combat.CombatOutcome for the meaning of the fields)
+BatchOutcome = namedtuple('BatchOutcome', [
+    'status', 'rounds', 'character_hp', 'monsters_defeated', 'damage_dealt', 'damage_taken'
+])
+
+
+class BatchCombat:
+    """
+    N parallel copies of one character fighting one group of monsters
+    """
+
+    def __init__(self, character, monsters, n, rng=None, persistent_initiative=False):
+        """
+        Set up the copies; monsters' hit points are rolled per copy.
+
+        Args:
+            character: Character fighting in every copy (not modified)
+            monsters: List of (name, hit_dice, armor_class, attack_bonus, damage)
+                tuples, as in GameState.monster_roster()
+            n: Number of copies
+            rng: numpy.random.Generator, or a seed for one
+            persistent_initiative: Roll initiative once per copy, as
+                Combat(persistent_initiative=True) does
+        """
+        self.n = n
+        self.rng = rng if isinstance(rng, numpy.random.Generator) else numpy.random.default_rng(rng)
+
+        # Character, the same in every copy
+        self.dex_mod = character.get_ability_modifier('dexterity')
+        self.str_mod = character.get_ability_modifier('strength')
+        self.attack_bonus = character.base_attack_bonus + self.str_mod
+        self.weapon = dice.compile(character.get_weapon_damage())
+        self.character_ac = character.get_armor_class()
+        self.start_hp = character.current_hp
+
+        # Monsters: one column per monster
+        specs = [tuple(monster[:5]) for monster in monsters]
+        self.names = [spec[0] for spec in specs]
+        self.monster_ac = numpy.array([spec[2] for spec in specs], dtype=numpy.int64)
+        self.monster_attack = numpy.array([spec[3] for spec in specs], dtype=numpy.int64)
+        self.monster_damage = [dice.compile(spec[4]) for spec in specs]
+
+        # State of every copy
+        self.character_hp = numpy.full(n, self.start_hp, dtype=numpy.int64)
+        self.monster_hp = numpy.empty((n, len(specs)), dtype=numpy.int64)
+        for column, spec in enumerate(specs):
+            self.monster_hp[:, column] = numpy.maximum(1, dice.roll_many(spec[1], n, self.rng))
+        self.status = numpy.full(n, ONGOING, dtype=numpy.int8)
+        self.rounds = numpy.zeros(n, dtype=numpy.int32)
+        self.damage_dealt = numpy.zeros(n, dtype=numpy.int64)
+        # Monsters acting before the character, per copy, once rolled
+        self.persistent_initiative = persistent_initiative
+        self.ahead = None
+
+    def execute_round(self):
+        """
+        Fight one round in every unfinished copy.
+
+        Returns:
+            Number of copies that fought
+        """
+        active = numpy.flatnonzero(self.status == ONGOING)
+        count = active.size
+        if not count:
+            return 0
+        rng = self.rng
+        rows = numpy.arange(count)
+        hp = self.character_hp[active]
+        monster_hp = self.monster_hp[active]
+        self.rounds[active] += 1
+
+        alive = monster_hp > 0
+        target = alive.argmax(axis=1)  # First monster alive at the start
+
+        if self.persistent_initiative:
+            if self.ahead is None:
+                self.ahead = self._roll_initiative(self.n)
+            ahead = self.ahead[active]
+        else:
+            ahead = self._roll_initiative(count)
+
+        hp -= self._monsters_attack(ahead, alive)
+
+        hit = rng.integers(1, 21, count) + self.attack_bonus >= self.monster_ac[target]
+        damage = numpy.maximum(1, dice.roll_many(self.weapon, count, rng) + self.str_mod) * hit
+        monster_hp[rows, target] -= damage
+
+        hp -= self._monsters_attack(~ahead, monster_hp > 0)
+
+        defeat = hp <= 0
+        victory = ~defeat & (monster_hp <= 0).all(axis=1)
+        self.character_hp[active] = hp
+        self.monster_hp[active] = monster_hp
+        self.damage_dealt[active] += damage
+        self.status[active[defeat]] = DEFEAT
+        self.status[active[victory]] = VICTORY
+        return count
+
+    def _roll_initiative(self, count):
+        """(copies, monsters) mask of the monsters acting before the character"""
+        player_init = self.rng.integers(1, 21, count) + self.dex_mod
+        monster_init = self.rng.integers(1, 21, (count, len(self.names)))
+        return monster_init > player_init[:, None]  # Ties go to the character
+
+    def _monsters_attack(self, acting, alive):
+        """
+        Damage dealt to the character by one batch of monster turns.
+
+        Args:
+            acting: (copies, monsters) mask of turns taken now
+            alive: (copies, monsters) mask of monsters alive at that point
+
+        Returns:
+            Damage per copy
+        """
+        count = acting.shape[0]
+        total = numpy.zeros(count, dtype=numpy.int64)
+        for column, damage_dice in enumerate(self.monster_damage):
+            turn = acting[:, column] & alive[:, column]
+            if not turn.any():
+                continue
+            hit = self.rng.integers(1, 21, count) + self.monster_attack[column] >= self.character_ac
+            damage = numpy.maximum(1, dice.roll_many(damage_dice, count, self.rng))
+            total += damage * (turn & hit)
+        return total
+
+    def run(self, max_rounds=1000):
+        """
+        Fight until every copy is decided (or max_rounds have passed).
+
+        Returns:
+            BatchOutcome
+        """
+        for _ in range(max_rounds):
+            if not self.execute_round():
+                break
+        return BatchOutcome(
+            status=self.status.copy(),
+            rounds=self.rounds.copy(),
+            character_hp=self.character_hp.copy(),
+            monsters_defeated=(self.monster_hp <= 0).sum(axis=1),
+            damage_dealt=self.damage_dealt.copy(),
+            damage_taken=self.start_hp - self.character_hp,
+        )
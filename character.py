@@ -156,8 +156,11 @@ class Character:
         Get damage dice from equipped weapon
         
         Returns:
-            Damage dice string (e.g., "1d8") or "1d3" for unarmed
+            Compiled weapon damage, a damage dice string (e.g., "1d8"),
+            or "1d3" for unarmed
         """
+        if self.equipped_weapon and hasattr(self.equipped_weapon, 'damage_dice'):
+            return self.equipped_weapon.damage_dice
         if self.equipped_weapon and hasattr(self.equipped_weapon, 'damage'):
             return self.equipped_weapon.damage
         
@@ -191,23 +194,8 @@ class Character:
             return False, 0, attack_roll
             
     def _roll_damage(self, damage_dice):
-        """Parse and roll damage dice string (e.g., '2d6', '1d8+2')"""
-        if '+' in damage_dice:
-            dice_part, mod = damage_dice.split('+')
-            mod = int(mod)
-        elif '-' in damage_dice:
-            dice_part, mod = damage_dice.split('-')
-            mod = -int(mod)
-        else:
-            dice_part = damage_dice
-            mod = 0
-            
-        # Parse dice notation
-        count, sides = dice_part.split('d')
-        count = int(count)
-        sides = int(sides)
-        
-        return dice.roll(sides, count, mod)
+        """Roll damage dice (a string such as '1d8+2' or a compiled expression)"""
+        return dice.compile(damage_dice).roll()
         
     def take_damage(self, damage):
         """Take damage and return True if still alive"""
@@ -1,7 +1,108 @@
 """
 Combat system with D20 mechanics
 """
+import itertools
+from operator import itemgetter
+from collections import namedtuple, deque
 import dice
+import config
+from combat_events import RoundStart, Attack, Hit, Miss, Damage, Death, Flee, Note
+
+
+# Result of Combat.simulate():
+#   status:            'victory', 'defeat' or 'ongoing' (ran out of rounds)
+#   rounds:            Rounds fought in total
+#   character_hp:      Character's hit points at the end
+#   monsters_defeated: Monsters killed in the encounter
+#   damage_dealt:      Damage the character dealt
+#   damage_taken:      Damage the character took
+CombatOutcome = namedtuple('CombatOutcome', [
+    'status', 'rounds', 'character_hp', 'monsters_defeated', 'damage_dealt', 'damage_taken'
+])
+
+
+class CombatLog:
+    """
+    Bounded log of combat events with sequence cursors
+    
+    Every entry gets the next sequence number; only the newest `capacity`
+    entries are kept. A cursor is the sequence number of the next entry to
+    be added, so a reader remembers the cursor it last saw and asks for
+    the entries since then.
+    """
+    
+    def __init__(self, capacity=config.COMBAT_LOG_CAPACITY):
+        """
+        Initialize the log.
+        
+        Args:
+            capacity: Most entries kept; older ones are dropped
+        """
+        self._entries = deque(maxlen=capacity)
+        self.cursor = 0  # Sequence number of the next entry
+        
+    @property
+    def first(self):
+        """Sequence number of the oldest entry still kept"""
+        return self.cursor - len(self._entries)
+        
+    def append(self, entry):
+        """Add one entry"""
+        self._entries.append(entry)
+        self.cursor += 1
+        
+    def extend(self, entries):
+        """Add entries in order"""
+        entries = list(entries)
+        self._entries.extend(entries)
+        self.cursor += len(entries)
+            
+    def since(self, cursor=0):
+        """
+        Entries added at or after a cursor.
+        
+        Entries that were already dropped are skipped, so a reader that
+        fell more than `capacity` entries behind gets the newest ones.
+        
+        Returns:
+            List of entries
+        """
+        skip = max(0, cursor - self.first)
+        if skip >= len(self._entries):
+            return []
+        if not skip:
+            return list(self._entries)
+        return list(itertools.islice(self._entries, skip, None))
+        
+    def __len__(self):
+        return len(self._entries)
+        
+    def __iter__(self):
+        return iter(self._entries)
+
+
+def collect_rewards(monsters):
+    """
+    Treasure and experience for a group of defeated monsters.
+    
+    Sums the Treasure and xp each monster carries, so it costs
+    O(monsters) with no parsing.
+    
+    Returns:
+        {'gold': int, 'items': [names], 'experience': int}
+    """
+    rewards = {
+        'gold': 0,
+        'items': [],
+        'experience': 0
+    }
+    
+    for monster in monsters:
+        rewards['gold'] += monster.treasure.gold
+        rewards['items'].extend(monster.treasure.items)
+        rewards['experience'] += monster.xp
+        
+    return rewards
 
 
 class Combat:
@@ -9,13 +110,15 @@ class Combat:
     Handles turn-based combat between character and monsters
     """
     
-    def __init__(self, character, monsters):
+    def __init__(self, character, monsters, persistent_initiative=False):
         """
         Initialize combat.
         
         Args:
             character: Player character
             monsters: List of monsters or single monster
+            persistent_initiative: Roll initiative once and keep the order
+                for the whole fight (D20 rules) instead of every round
         """
         self.character = character
         
@@ -26,32 +129,43 @@ class Combat:
             self.monsters = monsters
             
         self.round = 0
-        self.combat_log = []
+        self.combat_log = CombatLog()
+        self.persistent_initiative = persistent_initiative
+        self.initiative = None  # Last order rolled
         
     def roll_initiative(self):
         """
         Roll initiative for all combatants.
         
+        Ties keep the order combatants joined the fight: the player first,
+        then the monsters in list order.
+        
         Returns:
-            Ordered list of (name, initiative, is_player) tuples
+            List of (combatant, initiative, is_player) tuples, highest first
         """
         initiatives = []
         
         # Player initiative
         dex_mod = self.character.get_ability_modifier('dexterity')
         player_init = dice.d20(1, dex_mod)
-        initiatives.append((self.character.name, player_init, True))
+        initiatives.append((self.character, player_init, True))
         
         # Monster initiatives
         for monster in self.monsters:
             monster_init = dice.d20()
-            initiatives.append((monster.name, monster_init, False))
+            initiatives.append((monster, monster_init, False))
             
-        # Sort by initiative (highest first)
-        initiatives.sort(key=lambda x: x[1], reverse=True)
+        # Sort by initiative (highest first); the sort is stable
+        initiatives.sort(key=itemgetter(1), reverse=True)
         return initiatives
         
-    def execute_round(self, player_action=None, target_index=0):
+    def initiative_order(self):
+        """Order for this round, rolled once or every round (see __init__)"""
+        if self.initiative is None or not self.persistent_initiative:
+            self.initiative = self.roll_initiative()
+        return self.initiative
+        
+    def execute_round(self, player_action=None, target_index=0, since=None):
         """
         Execute one round of combat.
         
@@ -62,12 +176,17 @@ class Combat:
                           {'type': 'item', 'item_name': 'Potion of Healing'}
                           {'type': 'flee'}
             target_index: Index of target monster (default 0)
+            since: Log cursor from an earlier result; by default only this
+                   call's entries are returned under 'log'
             
         Returns:
-            Dictionary with combat results
+            Dictionary with combat results; 'log' holds the entries since
+            the cursor and 'cursor' the cursor to pass next time
         """
+        if since is None:
+            since = self.combat_log.cursor
         self.round += 1
-        round_log = [f"\n--- Round {self.round} ---"]
+        round_log = [RoundStart(self.round)]
         
         # Default action is attack
         if player_action is None:
@@ -78,7 +197,8 @@ class Combat:
             return {
                 'status': 'defeat',
                 'message': 'You have been defeated!',
-                'log': self.combat_log
+                'log': self.combat_log.since(since),
+                'cursor': self.combat_log.cursor
             }
             
         alive_monsters = [m for m in self.monsters if m.is_alive()]
@@ -86,15 +206,13 @@ class Combat:
             return {
                 'status': 'victory',
                 'message': 'All enemies defeated!',
-                'log': self.combat_log,
+                'log': self.combat_log.since(since),
+                'cursor': self.combat_log.cursor,
                 'rewards': self._collect_rewards()
             }
             
-        # Get initiative order
-        init_order = self.roll_initiative()
-        
         # Execute actions in initiative order
-        for name, init, is_player in init_order:
+        for combatant, init, is_player in self.initiative_order():
             if is_player:
                 # Player's turn
                 if player_action['type'] == 'attack':
@@ -104,57 +222,60 @@ class Combat:
                         hit, damage, attack_roll = self.character.attack_roll(target.armor_class, weapon_dmg)
                         
                         # Detailed log entry
-                        char_ac = self.character.get_armor_class()
                         weapon_name = self.character.equipped_weapon.name if self.character.equipped_weapon else "unarmed"
-                        round_log.append(f"[{self.character.name}] Attack roll: {attack_roll} vs AC {target.armor_class} (weapon: {weapon_name})")
+                        round_log.append(Attack(self.character.name, attack_roll, target.armor_class, weapon_name))
                         
                         if hit:
                             target.take_damage(damage)
-                            msg = f"  -> HIT! {self.character.name} hits {target.name} for {damage} damage! ({target.name} HP: {target.current_hp}/{target.max_hp})"
+                            round_log.append(Hit(self.character.name, target.name, damage))
+                            round_log.append(Damage(target.name, damage, target.current_hp, target.max_hp))
                             if not target.is_alive():
-                                msg += f" {target.name} is defeated!"
+                                round_log.append(Death(target.name))
                         else:
-                            msg = f"  -> MISS! {self.character.name} misses {target.name}!"
-                        round_log.append(msg)
+                            round_log.append(Miss(self.character.name, target.name))
                         
                 elif player_action['type'] == 'spell':
                     spell = player_action['spell']
                     target = alive_monsters[target_index] if target_index < len(alive_monsters) else None
                     success, result = self.character.cast_spell(spell, target)
-                    round_log.append(result)
+                    round_log.append(result if success else Note(result))
                     
                 elif player_action['type'] == 'item':
                     item_name = player_action['item_name']
                     result = self.character.use_item(item_name)
                     if result:
-                        round_log.append(result)
+                        round_log.append(Note(result))
                     else:
-                        round_log.append(f"Cannot use {item_name}!")
+                        round_log.append(Note(f"Cannot use {item_name}!"))
                         
                 elif player_action['type'] == 'flee':
                     # Attempt to flee (DEX check)
                     flee_roll = dice.d20(1, self.character.get_ability_modifier('dexterity'))
                     if flee_roll >= 10:
+                        round_log.append(Flee(self.character.name, True))
+                        self.combat_log.extend(round_log)
                         return {
                             'status': 'fled',
                             'message': 'You successfully fled from combat!',
-                            'log': self.combat_log + round_log
+                            'log': self.combat_log.since(since),
+                            'cursor': self.combat_log.cursor
                         }
                     else:
-                        round_log.append(f"{self.character.name} fails to flee!")
+                        round_log.append(Flee(self.character.name, False))
             else:
-                # Monster's turn
-                for monster in self.monsters:
-                    if monster.name == name and monster.is_alive():
-                        hit, mattack_roll, damage, msg = monster.attack(self.character)
-                        
-                        # Add detailed log entry for monster attack
-                        char_ac = self.character.get_armor_class()
-                        round_log.append(f"[{monster.name}] Attack roll: {mattack_roll} vs AC {char_ac}")
-                        round_log.append(f"  -> {msg}")
-                        if hit:
-                            round_log.append(f"  -> {self.character.name} takes {damage} damage! (HP: {self.character.current_hp}/{self.character.max_hp})")
-                        break
+                # Monster's turn (fallen monsters lose theirs)
+                monster = combatant
+                if monster.is_alive():
+                    hit, mattack_roll, damage, event = monster.attack(self.character)
+                    
+                    # Add detailed log entry for monster attack
+                    char_ac = self.character.get_armor_class()
+                    round_log.append(Attack(monster.name, mattack_roll, char_ac, None))
+                    round_log.append(event)
+                    if hit:
+                        round_log.append(Damage(self.character.name, damage, self.character.current_hp, self.character.max_hp))
+                        if not self.character.is_alive():
+                            round_log.append(Death(self.character.name))
                         
         # Update combat log
         self.combat_log.extend(round_log)
@@ -164,7 +285,8 @@ class Combat:
             return {
                 'status': 'defeat',
                 'message': 'You have been defeated!',
-                'log': self.combat_log
+                'log': self.combat_log.since(since),
+                'cursor': self.combat_log.cursor
             }
             
         alive_monsters = [m for m in self.monsters if m.is_alive()]
@@ -172,7 +294,8 @@ class Combat:
             return {
                 'status': 'victory',
                 'message': 'All enemies defeated!',
-                'log': self.combat_log,
+                'log': self.combat_log.since(since),
+                'cursor': self.combat_log.cursor,
                 'rewards': self._collect_rewards()
             }
             
@@ -180,34 +303,92 @@ class Combat:
         return {
             'status': 'ongoing',
             'message': f'Round {self.round} complete.',
-            'log': self.combat_log,
+            'log': self.combat_log.since(since),
+            'cursor': self.combat_log.cursor,
             'alive_monsters': alive_monsters,
             'character_hp': f"{self.character.current_hp}/{self.character.max_hp}"
         }
         
-    def _collect_rewards(self):
-        """Collect treasure from defeated monsters"""
-        rewards = {
-            'gold': 0,
-            'items': [],
-            'experience': 0
-        }
+    def simulate(self, max_rounds=1000):
+        """
+        Resolve the rest of the encounter with the character attacking
+        every round, without building any log text.
         
-        for monster in self.monsters:
-            # Add treasure
-            for item in monster.treasure:
-                if 'gold' in item.lower():
-                    # Extract gold amount
-                    amount = int(''.join(filter(str.isdigit, item)))
-                    rewards['gold'] += amount
-                else:
-                    rewards['items'].append(item)
-                    
-            # Award XP based on monster HD
-            hd = int(monster.hit_dice.split('d')[0])
-            rewards['experience'] += hd * 100
+        Follows the same rules and draws the same dice, in the same
+        order, as calling execute_round() with an attack each round.
+        
+        Args:
+            max_rounds: Give up (status 'ongoing') after this many rounds
             
-        return rewards
+        Returns:
+            CombatOutcome
+        """
+        character = self.character
+        monsters = self.monsters
+        rng = dice.active_rng()
+        randint = rng.randint
+        
+        # Everything execute_round() looks up each round, looked up once
+        dex_mod = character.get_ability_modifier('dexterity')
+        str_mod = character.get_ability_modifier('strength')
+        attack_bonus = character.base_attack_bonus + str_mod
+        weapon = dice.compile(character.get_weapon_damage())
+        char_ac = character.get_armor_class()
+        start_hp = character.current_hp
+        dealt = 0
+        status = 'ongoing'
+        
+        for _ in range(max_rounds):
+            self.round += 1
+            if character.current_hp <= 0:
+                status = 'defeat'
+                break
+            alive_monsters = [m for m in monsters if m.current_hp > 0]
+            if not alive_monsters:
+                status = 'victory'
+                break
+                
+            if self.persistent_initiative:
+                order = self.initiative_order()
+            else:
+                # roll_initiative(), inlined
+                order = [(character, randint(1, 20) + dex_mod, True)]
+                order.extend((monster, randint(1, 20), False) for monster in monsters)
+                order.sort(key=itemgetter(1), reverse=True)
+                self.initiative = order
+                
+            for combatant, _, is_player in order:
+                if is_player:
+                    # Character.attack_roll()
+                    target = alive_monsters[0]
+                    if randint(1, 20) + attack_bonus >= target.armor_class:
+                        damage = max(1, weapon.roll(rng) + str_mod)
+                        target.current_hp -= damage
+                        dealt += damage
+                elif combatant.current_hp > 0:
+                    # Monster.attack()
+                    if randint(1, 20) + combatant.attack_bonus >= char_ac:
+                        character.current_hp -= max(1, combatant.damage_dice.roll(rng))
+                            
+            if character.current_hp <= 0:
+                status = 'defeat'
+                break
+            if all(m.current_hp <= 0 for m in monsters):
+                status = 'victory'
+                break
+                
+        return CombatOutcome(
+            status=status,
+            rounds=self.round,
+            character_hp=character.current_hp,
+            monsters_defeated=sum(1 for m in monsters if m.current_hp <= 0),
+            damage_dealt=dealt,
+            damage_taken=start_hp - character.current_hp,
+        )
+        
+    def _collect_rewards(self):
+        """Collect treasure from defeated monsters"""
+        return collect_rewards(self.monsters)
         
     def get_combat_summary(self):
         """Get current combat status summary"""
@@ -266,6 +447,7 @@ class Weapon:
     def __init__(self, name, damage, bonus=0, description=""):
         self.name = name
         self.damage = damage
+        self.damage_dice = dice.compile(damage)
         self.bonus = bonus
         self.description = description
         
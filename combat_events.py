@@ -0,0 +1,125 @@
+"""
+Combat event records
+
+Combat, monsters and spells describe what happens as small immutable
+records instead of formatted text. A record holds names and numbers only
+and turns into its log line when rendered (str() does the same), so
+fights that nobody reads - headless runs, simulations, a log written by a
+background thread - never pay for the formatting.
+"""
+from collections import namedtuple
+
+
+class RoundStart(namedtuple('RoundStart', ['round'])):
+    """A new round begins"""
+    __slots__ = ()
+    kind = 'round'
+
+    def render(self):
+        return f"\n--- Round {self.round} ---"
+
+    __str__ = render
+
+
+class Attack(namedtuple('Attack', ['attacker', 'roll', 'armor_class', 'weapon'])):
+    """An attack roll against an armor class (weapon is None for monsters)"""
+    __slots__ = ()
+    kind = 'attack'
+
+    def render(self):
+        text = f"[{self.attacker}] Attack roll: {self.roll} vs AC {self.armor_class}"
+        if self.weapon is not None:
+            text += f" (weapon: {self.weapon})"
+        return text
+
+    __str__ = render
+
+
+class Hit(namedtuple('Hit', ['attacker', 'target', 'damage'])):
+    """An attack hits"""
+    __slots__ = ()
+    kind = 'hit'
+
+    def render(self):
+        return f"  -> HIT! {self.attacker} hits {self.target} for {self.damage} damage!"
+
+    __str__ = render
+
+
+class Miss(namedtuple('Miss', ['attacker', 'target'])):
+    """An attack misses"""
+    __slots__ = ()
+    kind = 'miss'
+
+    def render(self):
+        return f"  -> MISS! {self.attacker} misses {self.target}!"
+
+    __str__ = render
+
+
+class Damage(namedtuple('Damage', ['target', 'amount', 'hp', 'max_hp'])):
+    """Hit points lost, with what is left"""
+    __slots__ = ()
+    kind = 'damage'
+
+    def render(self):
+        return f"  -> {self.target} takes {self.amount} damage! (HP: {self.hp}/{self.max_hp})"
+
+    __str__ = render
+
+
+class Death(namedtuple('Death', ['target'])):
+    """A combatant falls"""
+    __slots__ = ()
+    kind = 'death'
+
+    def render(self):
+        return f"  -> {self.target} is defeated!"
+
+    __str__ = render
+
+
+class SpellCast(namedtuple('SpellCast', ['caster', 'spell', 'target', 'text', 'values'])):
+    """
+    A spell and its effect
+
+    text is a str.format() template; it can use {caster}, {spell},
+    {target} and the keys of values (a dict of the rolled numbers).
+    """
+    __slots__ = ()
+    kind = 'spell'
+
+    def render(self):
+        return self.text.format(caster=self.caster, spell=self.spell, target=self.target,
+                                **self.values)
+
+    __str__ = render
+
+
+class Flee(namedtuple('Flee', ['character', 'success'])):
+    """An attempt to flee"""
+    __slots__ = ()
+    kind = 'flee'
+
+    def render(self):
+        if self.success:
+            return f"{self.character} flees from combat!"
+        return f"{self.character} fails to flee!"
+
+    __str__ = render
+
+
+class Note(namedtuple('Note', ['text'])):
+    """Anything else, already formatted (e.g. the effect of an item)"""
+    __slots__ = ()
+    kind = 'note'
+
+    def render(self):
+        return self.text
+
+    __str__ = render
+
+
+def render(events):
+    """Log lines for a sequence of events"""
+    return [event.render() for event in events]
@@ -0,0 +1,155 @@
+"""
+Asynchronous combat debug log
+
+Combat rounds are handed to a background thread through a queue, so the
+game loop never waits on file I/O. Each round's new events are queued as
+they are (see combat_events) and only rendered to text by that thread,
+and the file is rotated once it reaches a size limit.
+
+One logger serves every fight in the process (server sessions and HTTP
+API games included), so each fight gets a number: its header says
+"=== COMBAT LOG n ===" and each of its lines starts with "[n]". Fights
+running side by side can then be told apart even where their lines mix.
+Disabled unless config.Features.COMBAT_DEBUG_LOG is True or the
+DUNGEON_COMBAT_LOG environment variable is set to 1.
+"""
+import os
+import queue
+import itertools
+import threading
+from collections import OrderedDict
+import logging
+import logging.handlers
+import config
+
+
+# Environment variable that turns the combat log on
+ENV_FLAG = 'DUNGEON_COMBAT_LOG'
+
+# Fights whose numbers are remembered; one not seen for longer gets a new one
+TRACKED_COMBATS = 1024
+
+
+class _EventQueueHandler(logging.handlers.QueueHandler):
+    """Queues records unformatted; events are immutable, so the writer renders them"""
+    
+    def prepare(self, record):
+        return record
+
+
+class _TaggedFormatter(logging.Formatter):
+    """Prefixes every line of a record with its fight's number"""
+    
+    def format(self, record):
+        text = record.getMessage()
+        number = getattr(record, 'combat', None)
+        if number is None:
+            return text
+        return '\n'.join(f"[{number}] {line}" if line else line for line in text.split('\n'))
+
+
+class CombatLogger:
+    """
+    Writes new combat log entries to a rotating file from a background thread
+    """
+    
+    def __init__(self, filename=config.COMBAT_LOG_FILE, enabled=False,
+                 max_bytes=config.COMBAT_LOG_MAX_BYTES,
+                 backup_count=config.COMBAT_LOG_BACKUPS):
+        """
+        Initialize the logger. The file and thread are only created on the
+        first write.
+        
+        Args:
+            filename: Log file path
+            enabled: Write anything at all
+            max_bytes: Rotate the file once it reaches this size
+            backup_count: Number of rotated files to keep
+        """
+        self.filename = filename
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        
+        self._logger = None
+        self._listener = None
+        self._lock = threading.Lock()  # Callers may be on several threads
+        self._numbers = itertools.count(1)
+        self._combats = OrderedDict()  # id(combat) -> (combat, number), least recent first
+        
+    @classmethod
+    def from_config(cls):
+        """Create a logger enabled by the feature flag or environment"""
+        enabled = (config.Features.COMBAT_DEBUG_LOG or
+                   os.environ.get(ENV_FLAG, '') not in ('', '0'))
+        return cls(enabled=enabled)
+        
+    def _start(self):
+        """Open the rotating file and start the writer thread"""
+        handler = logging.handlers.RotatingFileHandler(
+            self.filename,
+            maxBytes=self.max_bytes,
+            backupCount=self.backup_count,
+            encoding='utf-8'
+        )
+        handler.setFormatter(_TaggedFormatter())
+        
+        log_queue = queue.SimpleQueue()
+        self._listener = logging.handlers.QueueListener(log_queue, handler)
+        self._listener.start()
+        
+        # Private logger so records never reach the root logger's handlers
+        self._logger = logging.getLogger(f"{__name__}.{id(self)}")
+        self._logger.setLevel(logging.DEBUG)
+        self._logger.propagate = False
+        self._logger.addHandler(_EventQueueHandler(log_queue))
+        
+    def log_entries(self, combat, entries):
+        """
+        Queue new entries of a combat log.
+        
+        Args:
+            combat: Combat the entries belong to
+            entries: Events (or strings) added since the last call for this combat
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._logger is None:
+                self._start()
+            logger = self._logger
+            number, new = self._number(combat)
+            if new:
+                logger.debug("\n=== COMBAT LOG %d ===", number)
+                
+        tag = {'combat': number}
+        for entry in entries:
+            logger.debug(entry, extra=tag)
+            
+    def _number(self, combat):
+        """
+        A fight's number (call with the lock held).
+        
+        Returns:
+            (number, True if the fight is new)
+        """
+        known = self._combats.get(id(combat))
+        if known is not None and known[0] is combat:
+            self._combats.move_to_end(id(combat))
+            return known[1], False
+        number = next(self._numbers)
+        self._combats[id(combat)] = (combat, number)
+        if len(self._combats) > TRACKED_COMBATS:
+            self._combats.popitem(last=False)
+        return number, True
+        
+    def close(self):
+        """Flush everything queued and stop the writer thread"""
+        with self._lock:
+            if self._listener is not None:
+                self._listener.stop()
+                for handler in self._listener.handlers:
+                    handler.close()
+                self._listener = None
+                self._logger = None
+                self._combats.clear()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Headless combat simulator
+
+Fights one party member against a group of monsters many times with
+Combat.simulate() and reports the outcome and the throughput:
+
+    python combat_sim.py --monster Orc --count 2 --fights 100000
+    python combat_sim.py --member 2 --monster Goblin --monster Kobold --compare
+    python combat_sim.py --monster Ogre --fights 500000 --batch
+
+Monsters are picked by name from the spawn roster. --compare also times
+the same fights played through execute_round(), the interactive path.
+--batch fights all copies at once with the NumPy engine in batch_combat.py.
+"""
+import time
+import argparse
+import dice
+from rng import RNGContext
+from combat import Combat
+from monster import Monster
+from game_state import GameState
+from main import create_default_party
+
+
+# Deep enough that every roster monster is available
+ROSTER_LEVEL = 99
+
+
+def find_monster(name):
+    """Get a roster entry by (case-insensitive) name"""
+    for spec in GameState.monster_roster(ROSTER_LEVEL):
+        if spec[0].lower() == name.lower():
+            return spec
+    names = ', '.join(spec[0] for spec in GameState.monster_roster(ROSTER_LEVEL))
+    raise ValueError(f"Unknown monster '{name}' (choose from {names})")
+
+
+def play_round_by_round(combat):
+    """Fight with execute_round() until the encounter is decided"""
+    while True:
+        result = combat.execute_round(player_action={'type': 'attack'}, target_index=0)
+        if result['status'] != 'ongoing':
+            return result['status']
+
+
+def run_matchup(character, specs, fights, seed, round_by_round=False):
+    """
+    Fight the same matchup many times, restoring the character in between.
+
+    Args:
+        character: Character to fight with
+        specs: Roster entries of the monsters to fight
+        fights: Number of encounters
+        seed: Master seed; fights draw from its 'combat' stream
+        round_by_round: Use execute_round() instead of simulate()
+
+    Returns:
+        (list of CombatOutcome (or status strings when round_by_round), seconds)
+    """
+    outcomes = []
+    stream = RNGContext(seed).stream('combat')
+    start = time.perf_counter()
+    with dice.using_rng(stream):
+        for _ in range(fights):
+            character.current_hp = character.max_hp
+            combat = Combat(character, [Monster(*spec) for spec in specs])
+            if round_by_round:
+                outcomes.append(play_round_by_round(combat))
+            else:
+                outcomes.append(combat.simulate())
+    elapsed = time.perf_counter() - start
+    character.current_hp = character.max_hp
+    return outcomes, elapsed
+
+
+def main(argv=None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Simulate DungeonSurvival encounters")
+    parser.add_argument('--member', type=int, default=0,
+                        help="Default party member to fight with (0 fighter, 1 wizard, 2 cleric)")
+    parser.add_argument('--monster', action='append',
+                        help="Monster to fight (repeat for mixed groups; default Orc)")
+    parser.add_argument('--count', type=int, default=1,
+                        help="How many of each monster")
+    parser.add_argument('--fights', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--compare', action='store_true',
+                        help="Also time the fights through execute_round()")
+    parser.add_argument('--batch', action='store_true',
+                        help="Use the vectorized NumPy engine")
+    args = parser.parse_args(argv)
+
+    character = create_default_party().members[args.member]
+    specs = [find_monster(name) for name in args.monster or ['Orc'] for _ in range(args.count)]
+
+    if args.batch:
+        from batch_combat import BatchCombat, VICTORY
+        start = time.perf_counter()
+        batch = BatchCombat(character, specs, args.fights, rng=args.seed).run()
+        elapsed = time.perf_counter() - start
+        won = batch.status == VICTORY
+        win_count = int(won.sum())
+        total_rounds = int(batch.rounds.sum())
+        hp_lost_on_wins = int(batch.damage_taken[won].sum())
+    else:
+        outcomes, elapsed = run_matchup(character, specs, args.fights, args.seed)
+        wins = [o for o in outcomes if o.status == 'victory']
+        win_count = len(wins)
+        total_rounds = sum(o.rounds for o in outcomes)
+        hp_lost_on_wins = sum(o.damage_taken for o in wins)
+
+    print(f"Matchup:         {character.name} vs {', '.join(spec[0] for spec in specs)}")
+    print(f"Encounters:      {args.fights} in {elapsed:.3f}s "
+          f"({args.fights / elapsed:.0f} encounters/s)")
+    print(f"Win rate:        {win_count / args.fights:.1%}")
+    print(f"Average rounds:  {total_rounds / args.fights:.2f}")
+    print(f"HP lost on wins: {hp_lost_on_wins / max(1, win_count):.2f}")
+
+    if args.compare:
+        _, slow = run_matchup(character, specs, args.fights, args.seed, round_by_round=True)
+        print(f"execute_round(): {args.fights / slow:.0f} encounters/s "
+              f"(simulate() is {slow / elapsed:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -28,6 +28,14 @@ BASE_GOLD_MAX = 50
 # Combat settings
 BASE_WEAPON_DAMAGE = "1d8"
 FLEE_SUCCESS_CHANCE = 0.5  # 50% chance to flee
+ENCOUNTER_RADIUS = 1  # Monsters this close to the one attacked join its fight
+ENCOUNTER_ROOM_RADIUS = 8  # Monsters in the same room this close wake up and join too
+COMBAT_LOG_CAPACITY = 500  # Entries a fight's combat log keeps (see combat.CombatLog)
+
+# Combat debug log (see Features.COMBAT_DEBUG_LOG)
+COMBAT_LOG_FILE = "combat_debug.log"
+COMBAT_LOG_MAX_BYTES = 1024 * 1024  # Rotate after 1 MB
+COMBAT_LOG_BACKUPS = 3  # Keep combat_debug.log.1 .. .3
 
 # Character progression
 XP_PER_LEVEL = 1000
@@ -39,6 +47,7 @@ STARTING_GOLD = 0
 
 # Game balance
 DIFFICULTY_MULTIPLIER = 1.0  # Increase for harder game
+DESCEND_WARNING_WIN_CHANCE = 0.9  # Warn before stairs if a fight below is riskier
 
 # Symbol definitions (for consistency)
 class Symbols:
@@ -155,6 +164,24 @@ class Colors:
         return f"{color}{text}{Colors.RESET}"
 
 
+class MapColors:
+    """Map cell colors used when Features.USE_COLORS is on (None = terminal default)"""
+    PARTY = Colors.BRIGHT_YELLOW
+    MONSTER = Colors.BRIGHT_RED
+    REMEMBERED = Colors.BRIGHT_BLACK  # Explored but not currently visible
+    
+    # Visible tiles by character
+    TILES = {
+        Symbols.WALL: None,
+        Symbols.FLOOR: None,
+        Symbols.CHEST: Colors.YELLOW,
+        Symbols.STAIRS_DOWN: Colors.BRIGHT_CYAN,
+        Symbols.STAIRS_UP: Colors.BRIGHT_CYAN,
+        Symbols.DOOR_HORIZONTAL: Colors.YELLOW,
+        Symbols.DOOR_VERTICAL: Colors.YELLOW,
+    }
+
+
 # Feature flags (enable/disable features)
 class Features:
     """Toggle features on/off"""
@@ -164,6 +191,7 @@ class Features:
     SHOW_MONSTER_HP = True  # Show monster HP bars
     DIAGONAL_MOVEMENT = True  # Allow diagonal movement
     FOG_OF_WAR = False  # Hide unexplored areas (not yet implemented)
+    COMBAT_DEBUG_LOG = False  # Write combat rounds to COMBAT_LOG_FILE
     
     
 # Key bindings (for customization)
@@ -0,0 +1,307 @@
+"""
+curses frontend
+
+An alternative to the raw-mode terminal loop in main.py (run with
+`python main.py --curses`). The map is drawn into a curses pad that
+scrolls to keep the party in view, and the header, party, message and
+control panels each get their own window. Only the parts whose text
+changed are redrawn; all of them are staged with noutrefresh() and sent
+in a single doupdate(), leaving the terminal output itself to curses.
+"""
+import os
+import locale
+import curses
+from game_state import GameMode
+from input_handler import InputHandler
+from metrics import NULL_METRICS
+
+
+# Curses key codes translated to the keys the game handlers expect
+KEY_MAP = {
+    curses.KEY_UP: InputHandler.ARROW_UP,
+    curses.KEY_DOWN: InputHandler.ARROW_DOWN,
+    curses.KEY_LEFT: InputHandler.ARROW_LEFT,
+    curses.KEY_RIGHT: InputHandler.ARROW_RIGHT,
+}
+
+# Panel heights (the map view gets whatever is left)
+HEADER_HEIGHT = 2
+PARTY_HEIGHT = 7     # Title + up to 6 members
+MESSAGE_HEIGHT = 6   # Title + last 5 messages
+CONTROLS_HEIGHT = 1
+
+
+class Panel:
+    """
+    A window that is only redrawn when its text changes
+    """
+
+    def __init__(self, height, width, y, x):
+        self.window = curses.newwin(max(1, height), max(1, width), y, x)
+        self.lines = None
+
+    def update(self, lines):
+        """
+        Stage new contents for the next doupdate().
+
+        Args:
+            lines: Text lines to show
+        """
+        if lines == self.lines:
+            return
+        self.lines = list(lines)
+
+        self.window.erase()
+        height, width = self.window.getmaxyx()
+        for row, line in enumerate(self.lines[:height]):
+            # Stay off the last column so the bottom-right cell never scrolls
+            self.window.addnstr(row, 0, line, max(0, width - 1))
+        self.window.noutrefresh()
+
+    def invalidate(self):
+        """Force a redraw on the next update()"""
+        self.lines = None
+
+
+class MapView:
+    """
+    Map (or combat view) drawn into a pad, shown through a scrolling viewport
+    """
+
+    def __init__(self):
+        self.pad = None
+        self.rows = []
+        self.top = 0
+        self.height = 1
+        self.width = 1
+        self.offset = None  # (pad_y, pad_x) last shown
+
+    def place(self, top, height, width):
+        """Set the screen area the viewport occupies"""
+        self.top = top
+        self.height = max(1, height)
+        self.width = max(1, width)
+        self.offset = None
+
+    def invalidate(self):
+        """Force the viewport to be shown again on the next update()"""
+        self.offset = None
+
+    def update(self, text, focus=None):
+        """
+        Stage new map contents for the next doupdate().
+
+        Args:
+            text: Rendered map, lines separated by newlines
+            focus: (x, y) to keep inside the viewport, or None
+        """
+        lines = text.split('\n')
+        need_height = len(lines) + 1
+        need_width = max((len(line) for line in lines), default=0) + 1
+
+        if (self.pad is None or self.pad.getmaxyx()[0] < need_height or
+                self.pad.getmaxyx()[1] < need_width):
+            self.pad = curses.newpad(need_height, need_width)
+            self.rows = []
+            self.offset = None
+
+        # Rewrite only the rows that changed
+        changed = False
+        for row, line in enumerate(lines):
+            if row >= len(self.rows) or self.rows[row] != line:
+                self.pad.move(row, 0)
+                self.pad.clrtoeol()
+                self.pad.addstr(row, 0, line)
+                changed = True
+        for row in range(len(lines), len(self.rows)):
+            self.pad.move(row, 0)
+            self.pad.clrtoeol()
+            changed = True
+        self.rows = lines
+
+        offset = (self._scroll(len(lines), focus[1] if focus else 0, self.height),
+                  self._scroll(need_width - 1, focus[0] if focus else 0, self.width))
+        if changed or offset != self.offset:
+            self.offset = offset
+            self.pad.noutrefresh(offset[0], offset[1],
+                                 self.top, 0,
+                                 self.top + self.height - 1, self.width - 1)
+
+    @staticmethod
+    def _scroll(size, focus, view):
+        """Offset that centres focus in the view without scrolling past the edges"""
+        if size <= view:
+            return 0
+        return max(0, min(focus - view // 2, size - view))
+
+
+class CursesScreen:
+    """
+    Lays out the panels and turns game state into staged updates
+    """
+
+    def __init__(self, stdscr):
+        self.stdscr = stdscr
+        self.map_view = MapView()
+        self.layout()
+
+    def layout(self):
+        """(Re)create all windows for the current terminal size"""
+        rows, cols = self.stdscr.getmaxyx()
+        bottom = PARTY_HEIGHT + MESSAGE_HEIGHT + CONTROLS_HEIGHT
+        map_height = max(1, rows - HEADER_HEIGHT - bottom)
+
+        y = 0
+        self.header = Panel(HEADER_HEIGHT, cols, y, 0)
+        y += HEADER_HEIGHT
+        self.map_view.place(y, min(map_height, max(1, rows - y)), cols)
+        y = min(rows - 1, y + map_height)
+        self.party = Panel(PARTY_HEIGHT, cols, min(rows - 1, y), 0)
+        y = min(rows - 1, y + PARTY_HEIGHT)
+        self.messages = Panel(MESSAGE_HEIGHT, cols, y, 0)
+        y = min(rows - 1, y + MESSAGE_HEIGHT)
+        self.controls = Panel(CONTROLS_HEIGHT, cols, y, 0)
+
+    def resize(self):
+        """Handle a terminal resize"""
+        curses.update_lines_cols()
+        self.stdscr.clear()
+        self.stdscr.noutrefresh()
+        self.layout()
+        self.invalidate()
+
+    def invalidate(self):
+        """Redraw everything on the next frame (after a full-screen view)"""
+        for panel in (self.header, self.party, self.messages, self.controls):
+            panel.invalidate()
+        self.map_view.invalidate()
+
+    def draw(self, game_state, status_line=None):
+        """Stage the panels for one frame"""
+        # curses draws its own attributes: ANSI escapes would land in the pad as text
+        display = game_state.get_display(colors=False)
+
+        title = f"DUNGEON SURVIVAL - Level {display['dungeon_level']} | Turn {display['turn_count']}"
+        self.header.update([title, status_line or ""])
+
+        focus = tuple(game_state.party.position) if display['mode'] == GameMode.EXPLORATION else None
+        self.map_view.update(display['map'] or "", focus)
+
+        self.party.update(["Party:"] + [f"  {info}" for info in display['party_info']])
+        self.messages.update(["Messages:"] + [f"  {msg}" for msg in display['messages'][-5:]])
+
+        if display['mode'] == GameMode.EXPLORATION:
+            if game_state.pending_door_action:
+                controls = "Door Controls: L: lockpick | S: smash | Move away to cancel"
+            else:
+                controls = "Arrows/WASD: move | D: descend | U: ascend | Q: quit | I: inventory | C: character"
+        elif display['mode'] == GameMode.COMBAT:
+            controls = "Combat: A: attack | S: spell | I: item | F: flee | Q: quit"
+        else:
+            controls = ""
+        self.controls.update([controls])
+
+    def show_page(self, lines):
+        """Show a full-screen page of text and wait for a key"""
+        rows, cols = self.stdscr.getmaxyx()
+        page = curses.newwin(rows, cols, 0, 0)
+        lines = list(lines) + ["", "Press any key to continue..."]
+        for row, line in enumerate(lines[:rows]):
+            page.addnstr(row, 0, line, max(0, cols - 1))
+        page.noutrefresh()
+        curses.doupdate()
+        page.getch()
+        del page
+        self.stdscr.touchwin()
+        self.stdscr.noutrefresh()
+        self.invalidate()
+
+
+def read_keys(stdscr):
+    """
+    Wait for a key, then take every other key already typed.
+
+    Returns:
+        List of keys (strings), with curses.KEY_RESIZE passed through as is
+    """
+    keys = []
+    stdscr.nodelay(False)
+    while True:
+        try:
+            key = stdscr.get_wch()
+        except curses.error:
+            break  # Nothing more waiting
+        if isinstance(key, int):
+            if key == curses.KEY_RESIZE:
+                keys.append(key)
+            elif key in KEY_MAP:
+                keys.append(KEY_MAP[key])
+        else:
+            keys.append(key)
+        stdscr.nodelay(True)
+    stdscr.nodelay(False)
+    return keys
+
+
+def _session(stdscr, game_state, handle_input, metrics):
+    """Game loop inside curses.wrapper()"""
+    try:
+        curses.curs_set(0)
+    except curses.error:
+        pass  # Terminal cannot hide the cursor
+    stdscr.keypad(True)
+
+    screen = CursesScreen(stdscr)
+    running = True
+
+    while running:
+        status_line = metrics.overlay_line() if metrics.enabled else None
+        screen.draw(game_state, status_line)
+        with metrics.phase('write'):
+            curses.doupdate()
+        metrics.end_frame()
+
+        if game_state.mode == GameMode.GAME_OVER:
+            screen.show_page(["GAME OVER - Your party has been defeated!", ""] +
+                             game_state.get_game_statistics())
+            break
+        elif game_state.mode == GameMode.VICTORY:
+            screen.show_page(["VICTORY! - You have escaped the dungeon!", ""] +
+                             game_state.get_game_statistics())
+            break
+
+        keys = read_keys(stdscr)
+        metrics.mark_input()
+
+        with metrics.phase('update'):
+            for key in keys:
+                if key == curses.KEY_RESIZE:
+                    screen.resize()
+                    continue
+
+                mode = game_state.mode
+                running = handle_input(game_state, key, interactive=False)
+                if not running or game_state.mode in (GameMode.GAME_OVER, GameMode.VICTORY):
+                    break
+
+                # Character sheets are a full-screen view, drawn by curses here
+                if mode == GameMode.EXPLORATION and key in ('c', 'C'):
+                    sheets = []
+                    for member in game_state.party.members:
+                        sheets.extend(member.get_character_sheet(detailed=False).split('\n'))
+                        sheets.append("")
+                    screen.show_page(["CHARACTER SHEETS", ""] + sheets)
+
+
+def run(game_state, handle_input, metrics=NULL_METRICS):
+    """
+    Play a game in curses until the player quits or the game ends.
+
+    Args:
+        game_state: Initialized GameState
+        handle_input: Key handler, main.handle_input
+        metrics: Frame timing collector
+    """
+    locale.setlocale(locale.LC_ALL, '')  # Needed for the box and dot characters
+    os.environ.setdefault('ESCDELAY', '25')  # Don't stall a second on ESC
+    curses.wrapper(_session, game_state, handle_input, metrics)
@@ -1,7 +1,47 @@
 """
 Dice rolling utilities for D20 system
 """
+import re
+import math
 import random
+import threading
+from functools import lru_cache
+from contextlib import contextmanager
+from collections import namedtuple
+
+try:
+    import numpy
+except ImportError:  # Optional: roll_many() falls back to pure Python
+    numpy = None
+
+
+# One term of a dice expression: "+2d6", "-1d4", "+3"
+_TERM = re.compile(r'\s*([+-]?)\s*(?:(\d*)\s*[dD]\s*(\d+)|(\d+))\s*')
+
+
+# Per-thread stream set by using_rng(); the random module when unset
+_active = threading.local()
+
+
+def active_rng():
+    """Get the random source dice rolls currently draw from"""
+    return getattr(_active, 'rng', None) or random
+
+
+@contextmanager
+def using_rng(rng):
+    """
+    Make dice rolls in this thread draw from rng for the duration of a block.
+
+    Args:
+        rng: random.Random (e.g. an RNGContext stream)
+    """
+    previous = getattr(_active, 'rng', None)
+    _active.rng = rng
+    try:
+        yield rng
+    finally:
+        _active.rng = previous
 
 
 def roll(sides, count=1, modifier=0):
@@ -16,7 +56,8 @@ def roll(sides, count=1, modifier=0):
     Returns:
         Total result of the roll
     """
-    total = sum(random.randint(1, sides) for _ in range(count))
+    randint = active_rng().randint
+    total = sum(randint(1, sides) for _ in range(count))
     return total + modifier
 
 
@@ -62,7 +103,8 @@ def ability_score():
     Returns:
         Ability score (3-18)
     """
-    rolls = [random.randint(1, 6) for _ in range(4)]
+    randint = active_rng().randint
+    rolls = [randint(1, 6) for _ in range(4)]
     rolls.sort()
     return sum(rolls[1:])  # Drop lowest
 
@@ -78,3 +120,305 @@ def modifier(score):
         Modifier value
     """
     return (score - 10) // 2
+
+
+class DiceExpression(namedtuple('DiceExpression', ['text', 'dice', 'modifier', 'min', 'max', 'mean'])):
+    """
+    A parsed dice expression such as "2d6+1d4+3".
+
+    Immutable and shared: get one with compile() rather than building it.
+
+    Fields:
+        text: Normalized notation, e.g. "1d6-1"
+        dice: Tuple of (count, sides); a negative count subtracts those dice
+        modifier: Flat amount added to every roll
+        min, max: Smallest and largest possible result
+        mean: Expected result
+    """
+
+    __slots__ = ()
+
+    def roll(self, rng=None):
+        """Roll the expression (with rng, or the active stream - see using_rng())"""
+        randint = (rng or active_rng()).randint
+        total = self.modifier
+        for count, sides in self.dice:
+            if count > 0:
+                total += sum(randint(1, sides) for _ in range(count))
+            else:
+                total -= sum(randint(1, sides) for _ in range(-count))
+        return total
+
+    def __str__(self):
+        return self.text
+
+
+@lru_cache(maxsize=None)
+def _compile(text):
+    dice_terms = []
+    modifier = 0
+    position = 0
+    while position < len(text):
+        match = _TERM.match(text, position)
+        if not match or match.end() == position or (position and not match.group(1)):
+            raise ValueError(f"Invalid dice expression: {text!r}")
+        sign = -1 if match.group(1) == '-' else 1
+        if match.group(4) is not None:
+            modifier += sign * int(match.group(4))
+        else:
+            count = int(match.group(2) or 1)
+            sides = int(match.group(3))
+            if sides < 1:
+                raise ValueError(f"Invalid dice expression: {text!r}")
+            if count:
+                dice_terms.append((sign * count, sides))
+        position = match.end()
+    if not position:
+        raise ValueError(f"Invalid dice expression: {text!r}")
+
+    low = high = modifier
+    for count, sides in dice_terms:
+        if count > 0:
+            low, high = low + count, high + count * sides
+        else:
+            low, high = low + count * sides, high + count
+    normalized = ''.join(f"{'-' if count < 0 else '+'}{abs(count)}d{sides}"
+                         for count, sides in dice_terms)
+    if modifier or not normalized:
+        normalized += f"{modifier:+d}"
+
+    return DiceExpression(
+        text=normalized.lstrip('+'),
+        dice=tuple(dice_terms),
+        modifier=modifier,
+        min=low,
+        max=high,
+        mean=(low + high) / 2,
+    )
+
+
+def compile(expression):
+    """
+    Parse dice notation once and reuse the result.
+
+    Args:
+        expression: Notation such as "4d8+8", "1d6-1", "2d6+1d4+3" or "5",
+            or an already compiled DiceExpression
+
+    Returns:
+        Cached DiceExpression
+
+    Raises:
+        ValueError: If the notation can't be parsed
+    """
+    if isinstance(expression, DiceExpression):
+        return expression
+    return _compile(str(expression).strip())
+
+
+def roll_many(expression, n, rng=None):
+    """
+    Roll a dice expression many times at once.
+
+    Uses a NumPy Generator when NumPy is installed; otherwise (or when rng
+    is a random.Random) draws with getrandbits in pure Python.
+
+    Args:
+        expression: Dice notation or a compiled DiceExpression
+        n: Number of rolls
+        rng: numpy.random.Generator or random.Random; defaults to the
+            active stream (see using_rng()), which also seeds the NumPy
+            generator, so seeded runs repeat with or without NumPy
+
+    Returns:
+        NumPy integer array of n results (a list on the pure Python path)
+    """
+    expr = compile(expression)
+    if numpy is not None and not isinstance(rng, random.Random):
+        return _numpy_rolls(expr, n, rng)
+    return _python_rolls(expr, n, rng or active_rng())
+
+
+def _numpy_rolls(expr, n, rng):
+    if rng is None:
+        rng = numpy.random.default_rng(active_rng().getrandbits(64))
+
+    results = numpy.full(n, expr.modifier, dtype=numpy.int64)
+    for count, sides in expr.dice:
+        rolls = rng.integers(1, sides + 1, size=(n, abs(count)), dtype=numpy.int64).sum(axis=1)
+        if count > 0:
+            results += rolls
+        else:
+            results -= rolls
+    return results
+
+
+def _python_rolls(expr, n, rng):
+    getrandbits = rng.getrandbits
+    results = [expr.modifier] * n
+    for count, sides in expr.dice:
+        bits = (sides - 1).bit_length()
+        sign = 1 if count > 0 else -1
+        for _ in range(abs(count)):
+            for i in range(n):
+                # Rejection sampling keeps every face equally likely
+                value = getrandbits(bits)
+                while value >= sides:
+                    value = getrandbits(bits)
+                results[i] += sign * (value + 1)
+    return results
+
+
+class Distribution(namedtuple('Distribution', ['low', 'probs'])):
+    """
+    Probability mass function over a range of integers.
+
+    Fields:
+        low: Smallest value with an entry
+        probs: Tuple of probabilities; probs[i] is P(value == low + i)
+    """
+
+    __slots__ = ()
+
+    @property
+    def high(self):
+        return self.low + len(self.probs) - 1
+
+    @property
+    def mean(self):
+        return math.fsum((self.low + i) * p for i, p in enumerate(self.probs))
+
+    def probability(self, value):
+        """P(result == value)"""
+        index = value - self.low
+        return self.probs[index] if 0 <= index < len(self.probs) else 0.0
+
+    def at_least(self, value):
+        """P(result >= value)"""
+        index = max(0, value - self.low)
+        return min(1.0, math.fsum(self.probs[index:]))
+
+    def items(self):
+        """(value, probability) pairs with non-zero probability"""
+        return [(self.low + i, p) for i, p in enumerate(self.probs) if p]
+
+    def shift(self, amount):
+        """Distribution of result + amount"""
+        return Distribution(self.low + amount, self.probs)
+
+    def clamp_min(self, minimum):
+        """Distribution of max(minimum, result)"""
+        if self.low >= minimum:
+            return self
+        cut = minimum - self.low
+        if cut >= len(self.probs):
+            return Distribution(minimum, (1.0,))
+        return Distribution(minimum, (math.fsum(self.probs[:cut + 1]),) + self.probs[cut + 1:])
+
+    def add(self, other):
+        """Distribution of the sum of two independent results"""
+        return Distribution(self.low + other.low, _convolve(self.probs, other.probs))
+
+
+def _convolve(a, b):
+    out = [0] * (len(a) + len(b) - 1)
+    for i, x in enumerate(a):
+        if x:
+            for j, y in enumerate(b):
+                out[i + j] += x * y
+    return tuple(out)
+
+
+@lru_cache(maxsize=4096)
+def _pmf(expr):
+    # Convolve integer outcome counts so the result is exact up to the
+    # final division
+    counts = (1,)
+    low = expr.modifier
+    outcomes = 1
+    for count, sides in expr.dice:
+        for _ in range(abs(count)):
+            counts = _convolve(counts, (1,) * sides)
+            outcomes *= sides
+        low += count if count > 0 else count * sides
+    return Distribution(low, tuple(c / outcomes for c in counts))
+
+
+def pmf(expression):
+    """
+    Get the exact probability mass function of a dice expression.
+
+    Args:
+        expression: Dice notation or a compiled DiceExpression
+
+    Returns:
+        Cached Distribution
+    """
+    return _pmf(compile(expression))
+
+
+@lru_cache(maxsize=4096)
+def hit_probability(attack_bonus, armor_class):
+    """
+    P(d20 + attack_bonus >= armor_class), the game's to-hit rule.
+
+    Returns:
+        Probability between 0 and 1
+    """
+    faces = 21 - (armor_class - attack_bonus)  # Faces of the d20 that hit
+    return min(20, max(0, faces)) / 20
+
+
+@lru_cache(maxsize=4096)
+def _damage_on_hit(expr, bonus, minimum):
+    return _pmf(expr).shift(bonus).clamp_min(minimum)
+
+
+def damage_on_hit(expression, bonus=0, minimum=1):
+    """
+    Distribution of the damage a hit deals: max(minimum, roll + bonus).
+
+    Args:
+        expression: Damage dice notation or a compiled DiceExpression
+        bonus: Flat bonus added after the roll (e.g. a strength modifier)
+        minimum: Least damage a hit deals
+
+    Returns:
+        Cached Distribution
+    """
+    return _damage_on_hit(compile(expression), bonus, minimum)
+
+
+@lru_cache(maxsize=4096)
+def _attack_damage(expr, attack_bonus, armor_class, bonus, minimum):
+    hit = hit_probability(attack_bonus, armor_class)
+    on_hit = _damage_on_hit(expr, bonus, minimum)
+    low = min(0, on_hit.low)
+    probs = [0.0] * (on_hit.high - low + 1)
+    probs[-low] = 1.0 - hit
+    for value, p in on_hit.items():
+        probs[value - low] += hit * p
+    return Distribution(low, tuple(probs))
+
+
+def attack_damage(expression, attack_bonus, armor_class, bonus=0, minimum=1):
+    """
+    Distribution of one attack's damage, with a miss counting as 0.
+
+    Args:
+        expression: Damage dice notation or a compiled DiceExpression
+        attack_bonus: Bonus to the d20 attack roll
+        armor_class: Target's armor class
+        bonus: Flat damage bonus
+        minimum: Least damage a hit deals
+
+    Returns:
+        Cached Distribution
+    """
+    return _attack_damage(compile(expression), attack_bonus, armor_class, bonus, minimum)
+
+
+def expected_damage(expression, attack_bonus, armor_class, bonus=0, minimum=1):
+    """Expected damage of one attack, misses included"""
+    return (hit_probability(attack_bonus, armor_class)
+            * damage_on_hit(expression, bonus, minimum).mean)
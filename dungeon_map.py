@@ -3,6 +3,14 @@ Dungeon map generation and rendering
 """
 import random
 import json
+from config import Colors, MapColors
+
+
+# Side of the square buckets the monster index groups positions into
+MONSTER_BUCKET = 8
+
+# Characters that separate regions (see DungeonMap.region_at)
+REGION_BOUNDARIES = frozenset(('#', '-', '|'))
 
 
 class Tile:
@@ -41,6 +49,64 @@ class Tile:
         """Create a door tile"""
         char = Tile.DOOR_HORIZONTAL if horizontal else Tile.DOOR_VERTICAL
         return Tile(char, blocked=True, block_sight=True)
+        
+    @staticmethod
+    def from_char(char):
+        """Create a tile from its map file character"""
+        if char == Tile.WALL:
+            tile = Tile.create_wall()
+        elif char == Tile.FLOOR:
+            tile = Tile.create_floor()
+        elif char in (Tile.STAIRS_UP, Tile.STAIRS_DOWN, Tile.CHEST):
+            tile = Tile(char, blocked=False)
+        else:
+            tile = Tile.create_floor()
+        tile.char = char
+        return tile
+
+
+class TileRow:
+    """
+    One row of a map built from a shared, read-only template row
+    
+    Tiles are created from the template characters the first time they
+    are accessed, so a session only pays for the tiles it has touched
+    (explored, lit, or changed) instead of a full copy of the level.
+    Supports the same indexing as a list of Tile objects.
+    """
+    
+    __slots__ = ('base', 'cells')
+    
+    def __init__(self, base):
+        self.base = base   # Template characters (shared str)
+        self.cells = {}    # x -> Tile, for tiles this session has touched
+        
+    def __getitem__(self, x):
+        tile = self.cells.get(x)
+        if tile is None:
+            if x < 0:
+                x += len(self.base)
+            tile = self.cells[x] = Tile.from_char(self.base[x])
+        return tile
+        
+    def __setitem__(self, x, tile):
+        self.cells[x] = tile
+        
+    def __len__(self):
+        return len(self.base)
+        
+    def __iter__(self):
+        for x in range(len(self.base)):
+            yield self[x]
+            
+    def peek(self, x):
+        """Get the tile at x if it has been created, else None (never touched)"""
+        return self.cells.get(x)
+        
+    def char_at(self, x):
+        """Get the current character at x without creating a tile"""
+        tile = self.cells.get(x)
+        return tile.char if tile is not None else self.base[x]
 
 
 class Room:
@@ -76,21 +142,69 @@ class DungeonMap:
         self.height = height
         self.tiles = [[Tile.create_wall() for _ in range(width)] for _ in range(height)]
         self.rooms = []
-        self.monsters = []  # List of (monster, x, y) tuples
+        self._clear_monsters()  # monsters: list of (monster, x, y) tuples
         self.chests = []    # List of (x, y) tuples
         self.doors = []     # List of (door, x, y) tuples
         self.stairs_down = None
         self.stairs_up = None
+        self._lit = []      # Tiles marked visible by the last update_fov()
+        
+    @classmethod
+    def from_template(cls, template):
+        """
+        Create a playable level on top of a shared level template
+        
+        The tile layout stays in the template (see map_templates.py); this
+        map only holds the tiles, monsters, doors and chests it changes.
+        
+        Args:
+            template: LevelTemplate
+            
+        Returns:
+            DungeonMap
+        """
+        from monster import Monster
+        from door import Door
+        
+        dungeon = cls.__new__(cls)
+        dungeon.width = template.width
+        dungeon.height = template.height
+        dungeon.tiles = [TileRow(row) for row in template.rows]
+        dungeon.rooms = []
+        dungeon._clear_monsters()
+        dungeon.chests = list(template.chests)
+        dungeon.doors = []
+        dungeon.stairs_up = template.stairs_up
+        dungeon.stairs_down = template.stairs_down
+        dungeon._lit = []
+        
+        for name, hit_dice, armor_class, attack_bonus, damage, x, y in template.monsters:
+            monster = Monster(
+                name=name,
+                hit_dice=hit_dice,
+                armor_class=armor_class,
+                attack_bonus=attack_bonus,
+                damage=damage
+            )
+            dungeon.place_monster(monster, x, y)
+            
+        for door_data in template.doors:
+            door_data = dict(door_data)
+            x, y = door_data['position']
+            dungeon.place_door(Door.from_dict(door_data), x, y)
+            
+        return dungeon
         
-    def generate(self, max_rooms=10, min_room_size=4, max_room_size=10):
-        """Generate a random dungeon with rooms and corridors"""
+    def generate(self, max_rooms=10, min_room_size=4, max_room_size=10, rng=None):
+        """Generate a random dungeon with rooms and corridors (rng: random.Random)"""
+        rng = rng or random
         for _ in range(max_rooms):
             # Random room size
-            w = random.randint(min_room_size, max_room_size)
-            h = random.randint(min_room_size, max_room_size)
+            w = rng.randint(min_room_size, max_room_size)
+            h = rng.randint(min_room_size, max_room_size)
             # Random position
-            x = random.randint(1, self.width - w - 1)
-            y = random.randint(1, self.height - h - 1)
+            x = rng.randint(1, self.width - w - 1)
+            y = rng.randint(1, self.height - h - 1)
             
             new_room = Room(x, y, w, h)
             
@@ -103,7 +217,7 @@ class DungeonMap:
                     prev_center = self.rooms[-1].center()
                     new_center = new_room.center()
                     
-                    if random.random() < 0.5:
+                    if rng.random() < 0.5:
                         # Horizontal then vertical
                         self._create_h_tunnel(prev_center[0], new_center[0], prev_center[1])
                         self._create_v_tunnel(prev_center[1], new_center[1], new_center[0])
@@ -148,19 +262,152 @@ class DungeonMap:
             return True
         return self.tiles[y][x].blocked
         
+    def _clear_monsters(self):
+        """Start without monsters, with an empty spatial index"""
+        self.monsters = []
+        self._slots = {}             # (x, y) -> index in self.monsters
+        self._buckets = {}           # (bx, by) -> {(x, y): monster}
+        self._positions = {}         # id(monster) -> (x, y)
+        self._region_grid = None     # Region of every tile, once computed
+        self._region_monsters = None # Region -> {(x, y): monster}, once computed
+        
     def place_monster(self, monster, x, y):
         """Place a monster on the map"""
         if not self.is_blocked(x, y):
-            self.monsters.append((monster, x, y))
+            slot = self._slots.get((x, y))
+            if slot is None:
+                self._slots[(x, y)] = len(self.monsters)
+                self.monsters.append((monster, x, y))
+            else:
+                # One monster per tile: the new one takes the old one's place
+                self._positions.pop(id(self.monsters[slot][0]), None)
+                self.monsters[slot] = (monster, x, y)
             self.tiles[y][x].monster = monster
+            self._buckets.setdefault((x // MONSTER_BUCKET, y // MONSTER_BUCKET), {})[(x, y)] = monster
+            self._positions[id(monster)] = (x, y)
+            if self._region_monsters is not None:
+                region = self.region_at(x, y)
+                if region is not None:
+                    self._region_monsters.setdefault(region, {})[(x, y)] = monster
             return True
         return False
         
     def remove_monster(self, x, y):
-        """Remove a monster from the map"""
-        self.monsters = [(m, mx, my) for m, mx, my in self.monsters if not (mx == x and my == y)]
+        """Remove a monster from the map (the last one listed takes its place)"""
+        slot = self._slots.pop((x, y), None)
+        if slot is not None:
+            last = self.monsters.pop()
+            if slot < len(self.monsters):
+                self.monsters[slot] = last
+                self._slots[(last[1], last[2])] = slot
         if 0 <= x < self.width and 0 <= y < self.height:
             self.tiles[y][x].monster = None
+        bucket = self._buckets.get((x // MONSTER_BUCKET, y // MONSTER_BUCKET))
+        monster = bucket.pop((x, y), None) if bucket else None
+        if monster is not None:
+            self._positions.pop(id(monster), None)
+        if self._region_monsters is not None:
+            self._region_monsters.get(self.region_at(x, y), {}).pop((x, y), None)
+            
+    def monsters_within(self, x, y, radius):
+        """
+        Monsters at most radius tiles away (Chebyshev distance, as update_fov)
+        
+        Only the index buckets overlapping the square are visited, so the
+        cost follows the area and the monsters found, not the whole level.
+        
+        Returns:
+            List of (monster, x, y) tuples
+        """
+        found = []
+        for by in range((y - radius) // MONSTER_BUCKET, (y + radius) // MONSTER_BUCKET + 1):
+            for bx in range((x - radius) // MONSTER_BUCKET, (x + radius) // MONSTER_BUCKET + 1):
+                bucket = self._buckets.get((bx, by))
+                if bucket:
+                    for (mx, my), monster in bucket.items():
+                        if abs(mx - x) <= radius and abs(my - y) <= radius:
+                            found.append((monster, mx, my))
+        return found
+        
+    def monsters_in_region(self, x, y):
+        """
+        Monsters in the same room as a tile (see region_at)
+        
+        Returns:
+            List of (monster, x, y) tuples; empty outside rooms
+        """
+        region = self.region_at(x, y)
+        if region is None:
+            return []
+        if self._region_monsters is None:
+            self._region_monsters = {}
+            for monster, mx, my in self.monsters:
+                other = self.region_at(mx, my)
+                if other is not None:
+                    self._region_monsters.setdefault(other, {})[(mx, my)] = monster
+        return [(monster, mx, my)
+                for (mx, my), monster in self._region_monsters.get(region, {}).items()]
+        
+    def region_at(self, x, y):
+        """
+        Room a tile belongs to, as a number (None for walls, doors and corridors)
+        
+        Rooms are the open areas between walls and doors. One tile wide
+        passages are corridors and connect no rooms, so rooms joined by a
+        corridor stay separate. Computed from the layout the first time it
+        is needed.
+        """
+        if self._region_grid is None:
+            self._region_grid = self._label_regions()
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self._region_grid[y][x]
+        return None
+        
+    def _label_regions(self):
+        """Number the rooms of the layout by flood fill"""
+        def boundary(x, y):
+            if not (0 <= x < self.width and 0 <= y < self.height):
+                return True
+            row = self.tiles[y]
+            tile = row.peek(x) if isinstance(row, TileRow) else row[x]
+            if tile is None:
+                return row.char_at(x) in REGION_BOUNDARIES
+            return tile.blocked or tile.door is not None or tile.char in REGION_BOUNDARIES
+            
+        open_tiles = [[not boundary(x, y) for x in range(self.width)] for y in range(self.height)]
+        
+        def open_square(x, y):
+            # The 2x2 block with (x, y) at its top left is all open
+            return (0 <= x < self.width - 1 and 0 <= y < self.height - 1 and
+                    open_tiles[y][x] and open_tiles[y][x + 1] and
+                    open_tiles[y + 1][x] and open_tiles[y + 1][x + 1])
+            
+        def room_tile(x, y):
+            # Corridors (one tile wide) are in no open 2x2 block
+            return (open_square(x, y) or open_square(x - 1, y) or
+                    open_square(x, y - 1) or open_square(x - 1, y - 1))
+            
+        grid = [[None] * self.width for _ in range(self.height)]
+        region = 0
+        for sy in range(self.height):
+            for sx in range(self.width):
+                if grid[sy][sx] is not None or not room_tile(sx, sy):
+                    continue
+                grid[sy][sx] = region
+                stack = [(sx, sy)]
+                while stack:
+                    x, y = stack.pop()
+                    for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                        if (0 <= nx < self.width and 0 <= ny < self.height and
+                                grid[ny][nx] is None and room_tile(nx, ny)):
+                            grid[ny][nx] = region
+                            stack.append((nx, ny))
+                region += 1
+        return grid
+        
+    def position_of(self, monster):
+        """Position of a monster on the map, or None"""
+        return self._positions.get(id(monster))
             
     def get_monster_at(self, x, y):
         """Get monster at specified position"""
@@ -202,16 +449,17 @@ class DungeonMap:
                 self.tiles[y][x].blocked = not door.is_passable()
                 self.tiles[y][x].block_sight = door.is_blocking_sight()
         
-    def populate_monsters(self, monster_factory, count=5):
-        """Populate dungeon with random monsters"""
+    def populate_monsters(self, monster_factory, count=5, rng=None):
+        """Populate dungeon with random monsters (rng: random.Random for positions)"""
+        rng = rng or random
         placed = 0
         attempts = 0
         max_attempts = count * 10
         
         while placed < count and attempts < max_attempts:
             attempts += 1
-            x = random.randint(1, self.width - 2)
-            y = random.randint(1, self.height - 2)
+            x = rng.randint(1, self.width - 2)
+            y = rng.randint(1, self.height - 2)
             
             if not self.is_blocked(x, y) and not self.get_monster_at(x, y):
                 monster = monster_factory()
@@ -226,10 +474,10 @@ class DungeonMap:
             party_x, party_y: Party position
             radius: Vision radius (default 3)
         """
-        # Clear all visible flags
-        for y in range(self.height):
-            for x in range(self.width):
-                self.tiles[y][x].visible = False
+        # Clear the visible flags set last time (nothing else sets them)
+        for tile in self._lit:
+            tile.visible = False
+        lit = []
         
         # Mark tiles within radius as visible and explored
         for dy in range(-radius, radius + 1):
@@ -241,41 +489,65 @@ class DungeonMap:
                     ty = party_y + dy
                     
                     if 0 <= tx < self.width and 0 <= ty < self.height:
-                        self.tiles[ty][tx].visible = True
-                        self.tiles[ty][tx].explored = True
+                        tile = self.tiles[ty][tx]
+                        tile.visible = True
+                        tile.explored = True
+                        lit.append(tile)
+        self._lit = lit
     
-    def render(self, party_x, party_y, in_combat=False):
+    def render(self, party_x, party_y, in_combat=False, colors=False):
         """
         Render the map as ASCII with fog of war
         
         Args:
             party_x, party_y: Party position
             in_combat: If True, don't show party symbol (combat view)
+            colors: If True, add ANSI colors. An escape code is only written
+                    where the color changes, so runs of same-colored cells
+                    cost one code, and every line ends in the default color
+                    so lines can be redrawn independently.
         """
         lines = []
         for y in range(self.height):
+            row = self.tiles[y]
+            # Template rows hand out None for tiles never touched (unexplored)
+            get_tile = row.peek if isinstance(row, TileRow) else row.__getitem__
             line = []
+            current = None  # Color in effect on this line
             for x in range(self.width):
-                tile = self.tiles[y][x]
+                tile = get_tile(x)
+                color = None
                 
                 # Show only explored tiles
-                if not tile.explored:
-                    line.append(' ')  # Unexplored area
+                if tile is None or not tile.explored:
+                    char = ' '  # Unexplored area
                 elif tile.visible:
                     # Currently visible
                     if x == party_x and y == party_y and not in_combat:
-                        line.append(Tile.PARTY)
+                        char = Tile.PARTY
+                        color = MapColors.PARTY
                     elif tile.monster and tile.monster.is_alive():
                         # Show monster as its first letter (uppercase)
-                        line.append(tile.monster.name[0].upper())
+                        char = tile.monster.name[0].upper()
+                        color = MapColors.MONSTER
                     else:
-                        line.append(tile.char)
+                        char = tile.char
+                        color = MapColors.TILES.get(char)
                 else:
                     # Explored but not currently visible - show darker/grayed version
                     if tile.char == Tile.WALL:
-                        line.append(Tile.WALL)
+                        char = Tile.WALL
                     else:
-                        line.append('·')  # Dimmed floor for explored areas
+                        char = '·'  # Dimmed floor for explored areas
+                    color = MapColors.REMEMBERED
+                    
+                # Blanks look the same in any color, so they never break a run
+                if colors and color != current and char != ' ':
+                    line.append(color or Colors.RESET)
+                    current = color
+                line.append(char)
+            if current:
+                line.append(Colors.RESET)
             lines.append(''.join(line))
         return '\n'.join(lines)
     
@@ -299,10 +571,11 @@ class DungeonMap:
         
         # Save tile layout
         for y in range(self.height):
-            row = []
-            for x in range(self.width):
-                tile = self.tiles[y][x]
-                row.append(tile.char)
+            tiles = self.tiles[y]
+            if isinstance(tiles, TileRow):
+                row = [tiles.char_at(x) for x in range(self.width)]
+            else:
+                row = [tiles[x].char for x in range(self.width)]
             map_data['tiles'].append(''.join(row))
         
         # Save monsters with their positions and stats
@@ -345,28 +618,13 @@ class DungeonMap:
         for y in range(self.height):
             row = []
             for x in range(self.width):
-                char = map_data['tiles'][y][x]
-                
-                if char == Tile.WALL or char == '#':
-                    tile = Tile.create_wall()
-                elif char == Tile.FLOOR or char == '.':
-                    tile = Tile.create_floor()
-                elif char == Tile.STAIRS_UP or char == '>':
-                    tile = Tile(Tile.STAIRS_UP, blocked=False)
-                elif char == Tile.STAIRS_DOWN or char == '<':
-                    tile = Tile(Tile.STAIRS_DOWN, blocked=False)
-                elif char == Tile.CHEST or char == '$':
-                    tile = Tile(Tile.CHEST, blocked=False)
-                else:
-                    tile = Tile.create_floor()
-                
-                tile.char = char
-                row.append(tile)
+                row.append(Tile.from_char(map_data['tiles'][y][x]))
             self.tiles.append(row)
         
         self.rooms = []
-        self.monsters = []
+        self._clear_monsters()
         self.doors = []
+        self._lit = []
         
         # Load predefined monsters if they exist in the map data
         if 'monsters' in map_data and map_data['monsters']:
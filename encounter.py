@@ -0,0 +1,224 @@
+"""
+Analytic encounter predictions
+
+Predicts how a fight will go from the exact per-round damage
+distributions in dice.py instead of simulating it. Each side's hit point
+pool is an absorbing Markov chain: every round the other side's damage
+distribution is applied, and the chain records how likely the pool is
+to be used up by each round. Per-round damage doesn't depend on the
+target's remaining hit points, so the two chains are independent and a
+fight is won when the party empties the monsters' pool first. When both
+would fall in the same round, initiative decides.
+
+This matches Combat exactly for one character against one monster. For
+groups it is an estimate:
+    * Each side's hit points and attacks are pooled: every member attacks
+      every round and overkill carries over, so the party only falls once
+      its total hit points are gone
+    * Each monster attack goes to a random party member, as in
+      PartyCombat, so it faces each member's armor class equally often
+    * The party faces the toughest armor class among the monsters
+    * Initiative uses the party's average chance to act first
+"""
+from functools import lru_cache
+from collections import namedtuple
+import dice
+
+
+# Rounds after which an unfinished fight counts as not won
+MAX_ROUNDS = 100
+
+# Probability mass below which the chains stop
+EPSILON = 1e-9
+
+# Result of predict():
+#   win_probability:  chance the party wins
+#   expected_hp_lost: party hit points lost, on average (a loss loses them all)
+#   expected_rounds:  rounds the fight lasts, on average
+Prediction = namedtuple('Prediction', ['win_probability', 'expected_hp_lost', 'expected_rounds'])
+
+# What the predictor needs to know about a monster
+MonsterProfile = namedtuple('MonsterProfile', [
+    'hit_points', 'armor_class', 'attack_bonus', 'damage'
+])
+
+
+def monster_profile(monster):
+    """
+    Describe a monster for prediction.
+
+    Args:
+        monster: A Monster (its current hit points are used) or a
+            (name, hit_dice, armor_class, attack_bonus, damage) tuple for
+            one that hasn't been spawned yet (hit points are rolled as
+            Monster does)
+
+    Returns:
+        MonsterProfile with a Distribution of hit points
+    """
+    if isinstance(monster, tuple):
+        _, hit_dice, armor_class, attack_bonus, damage = monster[:5]
+        return MonsterProfile(dice.pmf(hit_dice).clamp_min(1), armor_class,
+                              attack_bonus, dice.compile(damage))
+    return MonsterProfile(dice.Distribution(monster.current_hp, (1.0,)), monster.armor_class,
+                          monster.attack_bonus, monster.damage_dice)
+
+
+def _character_attack(character, armor_class):
+    """Damage distribution of one character's attack (see Character.attack_roll)"""
+    str_mod = character.get_ability_modifier('strength')
+    return dice.attack_damage(dice.compile(character.get_weapon_damage()),
+                              character.base_attack_bonus + str_mod, armor_class, str_mod)
+
+
+def _total(distributions):
+    """Distribution of the sum of independent results"""
+    total = dice.Distribution(0, (1.0,))
+    for distribution in distributions:
+        total = total.add(distribution)
+    return total
+
+
+def _mixture(distributions):
+    """Distribution of a result drawn from one of several, picked at random"""
+    distributions = list(distributions)
+    low = min(d.low for d in distributions)
+    probs = [0.0] * (max(d.high for d in distributions) - low + 1)
+    for distribution in distributions:
+        for value, p in distribution.items():
+            probs[value - low] += p / len(distributions)
+    return dice.Distribution(low, tuple(probs))
+
+
+def _clear_probability(dex_mod):
+    """P(d20 + dex_mod >= d20): the player acts first (ties go to the player)"""
+    return dice.pmf("1d20-1d20").shift(dex_mod).at_least(0)
+
+
+@lru_cache(maxsize=1024)
+def _depletion(pool, damage, rounds=MAX_ROUNDS):
+    """
+    Chain for a pool of hit points taking damage every round.
+
+    Rounds that deal no damage just repeat the current state, so the
+    chain only steps through the rounds that do ("hits"), which use up
+    the pool within a few steps. The number of hits in r rounds is
+    binomial, which turns the hit chain back into a per-round one.
+
+    Args:
+        pool: Distribution of starting hit points (all >= 1)
+        damage: Distribution of damage per round (all >= 0)
+        rounds: Most rounds to follow
+
+    Returns:
+        (alive, taken): lists indexed by round r = 0, 1, ..., ending once
+        the pool is surely used up (or after the given rounds)
+            alive[r]: P(the pool lasts through round r)
+            taken[r]: E[damage taken through round r; the pool lasts]
+    """
+    start = pool.items()
+    limit = pool.high  # Damage totals from here on empty every pool
+    idle = damage.probability(0)
+    busy = 1.0 - idle
+    if busy <= 0:
+        return [1.0] * (rounds + 1), [0.0] * (rounds + 1)
+    hits = [(amount, p / busy) for amount, p in damage.items() if amount > 0]
+
+    # alive_k / taken_k after k hits
+    totals = [1.0] + [0.0] * (limit - 1)  # P(damage so far == t), t < limit
+    alive_k, taken_k = [1.0], [0.0]
+    while alive_k[-1] >= EPSILON and len(alive_k) <= rounds:  # At most one hit a round
+        following = [0.0] * limit
+        for t, p in enumerate(totals):
+            if p:
+                for amount, q in hits:
+                    if t + amount < limit:
+                        following[t + amount] += p * q
+                    else:
+                        break
+        totals = following
+
+        # Pool h lasts while the total is below h
+        below = mass = 0.0
+        cumulative = []
+        for t, p in enumerate(totals):
+            cumulative.append((below, mass))
+            below += p
+            mass += t * p
+        cumulative.append((below, mass))
+        alive_k.append(sum(p * cumulative[h][0] for h, p in start))
+        taken_k.append(sum(p * cumulative[h][1] for h, p in start))
+
+    # weights[k] = P(k hits in r rounds), updated one round at a time;
+    # more hits than the chain has steps leave nothing alive
+    alive, taken = [1.0], [0.0]
+    weights = [1.0]
+    for _ in range(rounds):
+        weights = [idle * w + busy * v for w, v in zip(weights + [0.0], [0.0] + weights)]
+        del weights[len(alive_k):]
+        alive.append(sum(w * a for w, a in zip(weights, alive_k)))
+        taken.append(sum(w * t for w, t in zip(weights, taken_k)))
+        if alive[-1] < EPSILON:
+            break
+    return alive, taken
+
+
+def predict(characters, monsters):
+    """
+    Predict a fight.
+
+    Args:
+        characters: Character or list of Characters fighting (alive ones count)
+        monsters: Monster, spec tuple (see monster_profile) or a list of them
+
+    Returns:
+        Prediction
+    """
+    if not isinstance(characters, (list, tuple)):
+        characters = [characters]
+    if not isinstance(monsters, list):
+        monsters = [monsters]
+    characters = [c for c in characters if c.is_alive()]
+    profiles = [monster_profile(m) for m in monsters]
+    if not characters:
+        return Prediction(0.0, 0.0, 0.0)
+    if not profiles:
+        return Prediction(1.0, 0.0, 0.0)
+
+    party_hp = sum(c.current_hp for c in characters)
+    monster_ac = max(p.armor_class for p in profiles)
+    party_damage = _total(_character_attack(c, monster_ac) for c in characters)
+    # Monsters pick their target at random among the living members
+    armor_classes = sorted(c.get_armor_class() for c in characters)
+    monster_damage = _total(
+        _mixture(dice.attack_damage(p.damage, p.attack_bonus, ac) for ac in armor_classes)
+        for p in profiles)
+    monster_pool = _total(p.hit_points for p in profiles)
+    first = sum(_clear_probability(c.get_ability_modifier('dexterity'))
+                for c in characters) / len(characters)
+
+    # The fight is over once either side has surely fallen: follow the
+    # side expected to fall first, and the other only that long
+    party_pool = dice.Distribution(party_hp, (1.0,))
+    if monster_pool.mean * monster_damage.mean <= party_hp * party_damage.mean:
+        monsters_alive, _ = _depletion(monster_pool, party_damage)
+        standing, taken = _depletion(party_pool, monster_damage, len(monsters_alive) - 1)
+    else:
+        standing, taken = _depletion(party_pool, monster_damage)
+        monsters_alive, _ = _depletion(monster_pool, party_damage, len(standing) - 1)
+    last = min(len(standing), len(monsters_alive)) - 1
+
+    win = hp_lost = rounds = 0.0
+    for r in range(1, last + 1):
+        killed = monsters_alive[r - 1] - monsters_alive[r]  # Monsters fall in round r
+        survived = monsters_alive[r]
+        # Acting first the party only has to last r - 1 rounds of attacks,
+        # otherwise the monsters get round r as well
+        before, after = standing[r - 1], standing[r]
+        won = killed * (first * before + (1 - first) * after)
+        lost = (before - after) * (survived + killed * (1 - first))
+        win += won
+        hp_lost += killed * (first * taken[r - 1] + (1 - first) * taken[r])
+        hp_lost += lost * party_hp
+        rounds += r * (won + lost)
+    return Prediction(win, hp_lost, rounds)
@@ -9,7 +9,7 @@ This file demonstrates how to:
 """
 
 from character import Character
-from monster import Monster
+from monster import Monster, Treasure
 from party import Party
 from dungeon_map import DungeonMap
 from game_state import GameState
@@ -51,7 +51,7 @@ def create_boss_monster():
         attack_bonus=8,
         damage="2d6+6",
         special_abilities=["Fire Breath", "Flight", "Frightful Presence"],
-        treasure=["500 gold", "Magic Sword +1", "Ring of Protection"]
+        treasure=Treasure(gold=500, items=("Magic Sword +1", "Ring of Protection"))
     )
     return dragon
 
@@ -4,9 +4,16 @@ Game state management and main game loop
 from enum import Enum
 from party import Party
 from dungeon_map import DungeonMap
-from combat import Combat
+from map_templates import TEMPLATE_CACHE
+from party_combat import PartyCombat
 from monster import Monster
-import random
+from combat import Item
+from loot import load_loot_tables
+from metrics import NULL_METRICS
+from config import Features, DESCEND_WARNING_WIN_CHANCE, ENCOUNTER_RADIUS, ENCOUNTER_ROOM_RADIUS
+from rng import RNGContext
+from encounter import predict
+import dice
 
 
 class GameMode(Enum):
@@ -25,7 +32,7 @@ class GameState:
     Manages the overall game state
     """
     
-    def __init__(self, use_predesigned=False, map_file=None):
+    def __init__(self, use_predesigned=False, map_file=None, seed=None):
         self.mode = GameMode.EXPLORATION
         self.party = Party()
         self.current_map = None
@@ -38,12 +45,24 @@ class GameState:
         # Map generation settings
         self.use_predesigned = use_predesigned
         self.map_file = map_file
-        self.predesigned_levels = []  # Template maps loaded from file
+        self.predesigned_levels = ()  # Shared read-only LevelTemplates from file
         self.visited_levels = {}  # Dictionary to store instantiated levels {level_num: DungeonMap}
         
         # Door interaction state
         self.pending_door_action = None  # (x, y, door) when waiting for L/S input
         
+        # Random streams for generation, spawning, combat and loot (see rng.py)
+        self.rng = RNGContext(seed)
+        
+        # Chest and monster drop tables, shared by every game (see loot.py)
+        self.loot = load_loot_tables()
+        
+        # Frame timing collector (see metrics.py)
+        self.metrics = NULL_METRICS
+        
+        # Render the map with ANSI colors
+        self.use_colors = Features.USE_COLORS
+        
         # Statistics tracking
         self.stats = {
             'monsters_defeated': 0,
@@ -59,7 +78,7 @@ class GameState:
         """Initialize a new game"""
         # Load predesigned maps if specified
         if self.use_predesigned and self.map_file:
-            self.predesigned_levels = DungeonMap.load_multilevel_dungeon(self.map_file)
+            self.predesigned_levels = TEMPLATE_CACHE.get(self.map_file)
             self.add_message(f"Loaded predesigned dungeon with {len(self.predesigned_levels)} levels")
         
         # Generate first dungeon level
@@ -93,9 +112,9 @@ class GameState:
         if self.use_predesigned and self.predesigned_levels:
             level_index = self.dungeon_level - 1
             if level_index < len(self.predesigned_levels):
-                # Create a copy of the predesigned level
-                import copy
-                self.current_map = copy.deepcopy(self.predesigned_levels[level_index])
+                # Build this session's level on top of the shared template
+                with dice.using_rng(self.rng.stream('spawning')):
+                    self.current_map = DungeonMap.from_template(self.predesigned_levels[level_index])
                 self.add_message(f"Entered predesigned dungeon level {self.dungeon_level}")
             else:
                 # Fall back to random generation if we run out of predesigned levels
@@ -112,17 +131,24 @@ class GameState:
             monster_count = 3 + self.dungeon_level * 2
             self.current_map.populate_monsters(
                 lambda: self.create_random_monster(),
-                count=monster_count
+                count=monster_count,
+                rng=self.rng.stream('spawning')
             )
             self.add_message(f"Monsters spawned randomly ({monster_count} monsters)")
         else:
             # Monsters were predefined in the map
             self.add_message(f"Found {len(self.current_map.monsters)} predefined monsters")
         
+        # Monsters carry their drops from the start
+        loot = self.rng.stream('loot')
+        for monster, _, _ in self.current_map.monsters:
+            self.loot.roll_drop(monster, loot)
+        
         # Place some treasure chests only if not in predesigned map with chests
         if not (self.use_predesigned and self.current_map.chests):
+            generation = self.rng.stream('generation')
             for room in getattr(self.current_map, 'rooms', []):
-                if random.random() < 0.3:  # 30% chance per room
+                if generation.random() < 0.3:  # 30% chance per room
                     cx, cy = room.center()
                     self.current_map.place_chest(cx, cy)
         
@@ -132,13 +158,20 @@ class GameState:
     def _generate_random_level(self):
         """Generate a random dungeon level"""
         self.current_map = DungeonMap(width=80, height=24)
-        self.current_map.generate(max_rooms=10, min_room_size=4, max_room_size=10)
+        self.current_map.generate(max_rooms=10, min_room_size=4, max_room_size=10,
+                                  rng=self.rng.stream('generation'))
         self.add_message(f"Entered dungeon level {self.dungeon_level}")
                 
         self.add_message(f"Entered dungeon level {self.dungeon_level}")
         
-    def create_random_monster(self):
-        """Create a random monster appropriate for the dungeon level"""
+    @staticmethod
+    def monster_roster(dungeon_level):
+        """
+        Monsters that spawn randomly on a dungeon level
+        
+        Returns:
+            List of (name, hit_dice, armor_class, attack_bonus, damage)
+        """
         monster_types = [
             ("Goblin", "1d8", 12, 1, "1d6"),
             ("Orc", "2d8", 13, 2, "1d8+1"),
@@ -148,14 +181,19 @@ class GameState:
         ]
         
         # Higher level dungeons get tougher monsters
-        if self.dungeon_level >= 3:
+        if dungeon_level >= 3:
             monster_types.extend([
                 ("Bugbear", "3d8+3", 14, 3, "1d8+2"),
                 ("Ogre", "4d8+8", 13, 5, "2d6+3"),
             ])
-            
-        name, hd, ac, ab, dmg = random.choice(monster_types)
-        return Monster(name, hit_dice=hd, armor_class=ac, attack_bonus=ab, damage=dmg)
+        return monster_types
+        
+    def create_random_monster(self):
+        """Create a random monster appropriate for the dungeon level"""
+        spawning = self.rng.stream('spawning')
+        name, hd, ac, ab, dmg = spawning.choice(self.monster_roster(self.dungeon_level))
+        with dice.using_rng(spawning):
+            return Monster(name, hit_dice=hd, armor_class=ac, attack_bonus=ab, damage=dmg)
         
     def move_party(self, dx, dy):
         """
@@ -210,33 +248,95 @@ class GameState:
         self.turn_count += 1
         return True
         
+    def gather_encounter(self, x, y):
+        """
+        Monsters that fight when the party attacks the one at (x, y)
+        
+        Besides that monster, these are the living monsters next to it
+        (ENCOUNTER_RADIUS) and those in the same room within
+        ENCOUNTER_ROOM_RADIUS, nearest first. Uses the map's spatial index,
+        so the cost follows the monsters found, not the whole level.
+        
+        Returns:
+            List of monsters (empty if there is none at (x, y))
+        """
+        first = self.current_map.get_monster_at(x, y)
+        if first is None:
+            return []
+        found = self.current_map.monsters_within(x, y, ENCOUNTER_RADIUS)
+        found.extend((m, mx, my) for m, mx, my in self.current_map.monsters_in_region(x, y)
+                     if max(abs(mx - x), abs(my - y)) <= ENCOUNTER_ROOM_RADIUS)
+        
+        def distance(entry):
+            _, mx, my = entry
+            return max(abs(mx - x), abs(my - y)), my, mx
+            
+        monsters = [first]
+        seen = {id(first)}
+        for monster, _, _ in sorted(found, key=distance):
+            if id(monster) not in seen and monster.is_alive():
+                seen.add(id(monster))
+                monsters.append(monster)
+        return monsters
+        
     def start_combat(self, x, y):
         """Start combat at given location"""
-        # Gather all monsters in adjacent tiles
-        monsters = []
-        monster_at_pos = self.current_map.get_monster_at(x, y)
-        if monster_at_pos:
-            monsters.append(monster_at_pos)
-            
+        monsters = self.gather_encounter(x, y)
+        
         if monsters:
             self.mode = GameMode.COMBAT
-            # For now, use first party member in combat
+            # The whole party fights
             if self.party.members:
-                self.combat_instance = Combat(self.party.members[0], monsters)
+                self.combat_instance = PartyCombat(self.party.members, monsters)
                 self.add_message(f"Combat started against {len(monsters)} enemy(ies)!")
             
     def handle_chest(self, x, y):
         """Handle opening a treasure chest"""
         if (x, y) in self.current_map.chests:
-            gold = random.randint(10, 50) * self.dungeon_level
-            self.party.distribute_gold(gold)
-            self.stats['total_gold_collected'] += gold
+            treasure = self.loot.roll_chest(self.dungeon_level, self.rng.stream('loot'))
+            if treasure.gold or treasure.items:
+                self.add_message("You open the chest...")
+                self.claim_rewards({'gold': treasure.gold, 'items': list(treasure.items),
+                                    'experience': 0})
+            else:
+                self.add_message("The chest is empty.")
             self.stats['chests_opened'] += 1
-            self.add_message(f"Found {gold} gold!")
             self.current_map.chests.remove((x, y))
             # Change tile back to floor
             self.current_map.tiles[y][x].char = '.'
             
+    def claim_rewards(self, rewards, monsters_defeated=0):
+        """
+        Hand out rewards to the party and record them.
+        
+        Victories and chests both come through here.
+        
+        Args:
+            rewards: {'gold': int, 'items': [names], 'experience': int}, as
+                     combat.collect_rewards() returns
+            monsters_defeated: Monsters the rewards were won from
+        """
+        gold = rewards.get('gold', 0)
+        experience = rewards.get('experience', 0)
+        items = rewards.get('items', [])
+        
+        if experience:
+            self.party.distribute_experience(experience)
+            self.stats['total_experience'] += experience
+            self.add_message(f"Gained {experience} experience!")
+        if gold:
+            self.party.distribute_gold(gold)
+            self.stats['total_gold_collected'] += gold
+            self.add_message(f"Found {gold} gold!")
+        if items:
+            # The first living member carries the loot
+            alive = self.party.get_alive_members()
+            if alive:
+                for name in items:
+                    alive[0].add_item(Item(name, "Treasure"))
+                self.add_message(f"Found {', '.join(items)}!")
+        self.stats['monsters_defeated'] += monsters_defeated
+        
     def handle_door_interaction(self, x, y, door):
         """
         Handle player attempting to interact with a door.
@@ -250,7 +350,8 @@ class GameState:
             return
             
         character = self.party.members[0]
-        success, message = door.attempt_open(character)
+        with dice.using_rng(self.rng.stream('doors')):
+            success, message = door.attempt_open(character)
         self.add_message(message)
         
         if not success and door.is_locked:
@@ -272,7 +373,8 @@ class GameState:
             return
             
         character = self.party.members[0]
-        success, message = door.attempt_lockpick(character)
+        with dice.using_rng(self.rng.stream('doors')):
+            success, message = door.attempt_lockpick(character)
         self.add_message(message)
         
         if success:
@@ -293,7 +395,8 @@ class GameState:
             return
             
         character = self.party.members[0]
-        success, message = door.attempt_smash(character)
+        with dice.using_rng(self.rng.stream('doors')):
+            success, message = door.attempt_smash(character)
         self.add_message(message)
         
         if success:
@@ -309,13 +412,17 @@ class GameState:
     def descend_stairs(self):
         """Go down to next dungeon level"""
         if tuple(self.party.position) == self.current_map.stairs_down:
-            # Check if party level is significantly lower than next dungeon level
+            # Predict the riskiest fight waiting on the next level
             next_level = self.dungeon_level + 1
-            avg_party_level = self.party.average_level()
+            worst = self.predict_level_danger(next_level)
             
-            # Warn if dungeon level is higher than party average level
-            if next_level > avg_party_level:
+            # Warn if the party might lose it
+            if worst and worst[1].win_probability < DESCEND_WARNING_WIN_CHANCE:
+                name, prediction = worst
                 self.add_message(f"WARNING: Level {next_level} ahead! Monsters will be dangerous!")
+                # A party estimate: hit points are pooled (see encounter.py)
+                self.add_message(f"A {name} fight: ~{prediction.win_probability:.0%} to win, "
+                                 f"~{prediction.expected_hp_lost:.0f} party HP lost (estimate)")
                 self.add_message("Press 'D' again to confirm descent, or move away to cancel.")
                 # Set a flag to require confirmation
                 if not hasattr(self, '_descend_confirmed'):
@@ -342,6 +449,35 @@ class GameState:
                 radius=3
             )
                 
+    def predict_level_danger(self, dungeon_level):
+        """
+        Find the monster on a level the party is least likely to beat
+        
+        Uses the level's predesigned monsters if it has any, otherwise the
+        random spawn roster (see encounter.predict).
+        
+        Returns:
+            (monster name, Prediction), or None without a party
+        """
+        # The whole party fights (see start_combat)
+        fighters = self.party.get_alive_members()
+        if not fighters:
+            return None
+        
+        level_index = dungeon_level - 1
+        if dungeon_level in self.visited_levels:
+            specs = [(m.name, m) for m, _, _ in self.visited_levels[dungeon_level].monsters
+                     if m.is_alive()]
+        elif self.use_predesigned and level_index < len(self.predesigned_levels):
+            specs = [(m[0], m[:5]) for m in self.predesigned_levels[level_index].monsters]
+        else:
+            specs = []
+        if not specs:
+            specs = [(m[0], m) for m in self.monster_roster(dungeon_level)]
+        
+        predictions = [(name, predict(fighters, monster)) for name, monster in specs]
+        return min(predictions, key=lambda item: item[1].win_probability)
+        
     def ascend_stairs(self):
         """Go up to previous dungeon level"""
         if tuple(self.party.position) == self.current_map.stairs_up:
@@ -367,10 +503,14 @@ class GameState:
         if len(self.message_log) > self.max_log_messages:
             self.message_log.pop(0)
             
-    def get_display(self):
+    def get_display(self, colors=None):
         """
         Get the current display to render
         
+        Args:
+            colors: Render the map with ANSI colors (default self.use_colors);
+                    frontends that can't show escape codes pass False
+        
         Returns:
             Dictionary with display information
         """
@@ -385,15 +525,18 @@ class GameState:
         
         if self.mode == GameMode.EXPLORATION:
             # Update field of view before rendering
-            self.current_map.update_fov(
-                self.party.position[0],
-                self.party.position[1],
-                radius=3
-            )
-            display['map'] = self.current_map.render(
-                self.party.position[0],
-                self.party.position[1]
-            )
+            with self.metrics.phase('fov'):
+                self.current_map.update_fov(
+                    self.party.position[0],
+                    self.party.position[1],
+                    radius=3
+                )
+            with self.metrics.phase('render'):
+                display['map'] = self.current_map.render(
+                    self.party.position[0],
+                    self.party.position[1],
+                    colors=self.use_colors if colors is None else colors
+                )
         elif self.mode == GameMode.COMBAT:
             display['map'] = self.get_combat_display()
             
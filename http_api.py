@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Local HTTP/JSON API for bots and tools
+
+Drives games without a terminal, using only the standard library:
+
+    POST   /games                  {"map": "random", "seed": 1}  -> new game
+    POST   /games/<id>/step        {"actions": ["d", "d"], "since": 3}
+    GET    /games/<id>/observe?since=3
+    POST   /games/<id>/save
+    DELETE /games/<id>
+
+Actions are keys, exactly as the terminal would send them, applied in one
+request through main.handle_input(). Every game keeps a revision number
+and remembers in which revision each part of its state last changed, so
+a client that passes the last revision it saw as "since" only receives
+the parts that changed after it.
+"""
+import os
+import json
+import argparse
+import itertools
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from game_state import GameMode
+from input_handler import InputHandler
+from main import create_game, handle_input, resolve_map_choice
+
+
+class ApiGame:
+    """
+    A game driven over the API, with per-section change tracking
+    """
+
+    def __init__(self, game_id, game):
+        self.game_id = game_id
+        self.game = game
+        self.running = True
+        self.revision = 0
+        self.lock = threading.Lock()
+        self._sections = {}  # name -> (value, revision it last changed in)
+        self.refresh()
+
+    def snapshot(self):
+        """Get the current state, split into independently tracked sections"""
+        game = self.game
+        display = game.get_display()
+        return {
+            'mode': game.mode.name,
+            'running': self.running,
+            'dungeon_level': game.dungeon_level,
+            'turn_count': game.turn_count,
+            'position': list(game.party.position),
+            'party': [
+                {'name': m.name, 'class': m.char_class, 'level': m.level,
+                 'hp': m.current_hp, 'max_hp': m.max_hp,
+                 'experience': m.experience, 'gold': m.gold}
+                for m in game.party.members
+            ],
+            'messages': list(game.message_log),
+            'view': display['map'],
+            'stats': dict(game.stats),
+        }
+
+    def refresh(self):
+        """Record which sections changed; bump the revision if any did"""
+        changed = [(name, value) for name, value in self.snapshot().items()
+                   if name not in self._sections or self._sections[name][0] != value]
+        if changed:
+            self.revision += 1
+            for name, value in changed:
+                self._sections[name] = (value, self.revision)
+
+    def changes_since(self, since):
+        """
+        Get the sections that changed after a revision.
+
+        Args:
+            since: Last revision the client has seen, or None for everything
+
+        Returns:
+            Response dictionary
+        """
+        since = -1 if since is None else since
+        return {
+            'id': self.game_id,
+            'revision': self.revision,
+            'changed': {name: value for name, (value, rev) in self._sections.items()
+                        if rev > since},
+        }
+
+    def step(self, actions):
+        """Apply a batch of keys in order"""
+        for key in actions:
+            if not self.running:
+                break
+            self.running = handle_input(self.game, key, interactive=False)
+            if self.game.mode in (GameMode.GAME_OVER, GameMode.VICTORY):
+                self.running = False
+        self.refresh()
+
+    def save(self, directory):
+        """Write the game's current state to <directory>/game_<id>.json"""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"game_{self.game_id}.json")
+        data = self.snapshot()
+        data['revision'] = self.revision
+        data['map'] = self.game.current_map.to_dict()
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2)
+        return path
+
+
+def parse_since(since):
+    """Accept a revision number or None"""
+    if since is not None and (not isinstance(since, int) or isinstance(since, bool)):
+        raise ValueError("'since' must be an integer")
+    return since
+
+
+def parse_actions(actions):
+    """Accept a list of keys or a string of raw keys"""
+    if isinstance(actions, str):
+        keys, rest = InputHandler.parse_keys(actions)
+        return keys + list(rest)
+    if not isinstance(actions, list) or not all(isinstance(a, str) for a in actions):
+        raise ValueError("'actions' must be a string or a list of strings")
+    return actions
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    """Routes requests to the games held by the server"""
+
+    protocol_version = 'HTTP/1.1'  # Keep-alive: bots reuse one connection
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def send_json(self, status, data):
+        body = json.dumps(data, separators=(',', ':')).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        data = json.loads(self.rfile.read(length))
+        if not isinstance(data, dict):
+            raise ValueError("Request body must be a JSON object")
+        return data
+
+    def route(self):
+        """Split the path into (game, action); game is None for /games"""
+        parts = [p for p in urlparse(self.path).path.split('/') if p]
+        if not parts or parts[0] != 'games' or len(parts) > 3:
+            return None, None, False
+        if len(parts) == 1:
+            return None, None, True
+        game = self.server.games.get(parts[1]) if parts[1].isdigit() else None
+        return game, (parts[2] if len(parts) == 3 else None), game is not None
+
+    def query_since(self):
+        value = parse_qs(urlparse(self.path).query).get('since', [None])[0]
+        return int(value) if value is not None else None
+
+    def do_POST(self):
+        try:
+            body = self.read_json()
+            game, action, found = self.route()
+            if not found:
+                return self.send_json(404, {'error': 'not found'})
+
+            if game is None and action is None:
+                self.send_json(201, self.server.new_game(body.get('map'), body.get('seed')))
+            elif action == 'step':
+                # Validate everything before the game changes
+                actions = parse_actions(body.get('actions', []))
+                since = parse_since(body.get('since'))
+                with game.lock:
+                    game.step(actions)
+                    self.send_json(200, game.changes_since(since))
+            elif action == 'save':
+                with game.lock:
+                    path = game.save(self.server.save_dir)
+                self.send_json(200, {'id': game.game_id, 'saved': path})
+            else:
+                self.send_json(404, {'error': 'not found'})
+        except (ValueError, TypeError) as e:
+            self.send_json(400, {'error': str(e)})
+
+    def do_GET(self):
+        try:
+            game, action, found = self.route()
+            if not found or game is None or action != 'observe':
+                return self.send_json(404, {'error': 'not found'})
+            with game.lock:
+                self.send_json(200, game.changes_since(self.query_since()))
+        except ValueError as e:
+            self.send_json(400, {'error': str(e)})
+
+    def do_DELETE(self):
+        game, action, found = self.route()
+        if not found or game is None or action is not None:
+            return self.send_json(404, {'error': 'not found'})
+        self.server.games.pop(str(game.game_id), None)
+        self.send_json(200, {'id': game.game_id, 'deleted': True})
+
+
+class ApiServer(ThreadingHTTPServer):
+    """HTTP server holding the games"""
+
+    daemon_threads = True
+
+    def __init__(self, address, save_dir='saves', verbose=False):
+        super().__init__(address, ApiHandler)
+        self.games = {}
+        self.save_dir = save_dir
+        self.verbose = verbose
+        self._ids = itertools.count(1)
+        self._create_lock = threading.Lock()
+
+    def new_game(self, map_choice=None, seed=None):
+        """Create a game and return its full state"""
+        map_file = resolve_map_choice(map_choice)
+        with self._create_lock:
+            game_id = next(self._ids)
+        game = ApiGame(game_id, create_game(map_file, seed))
+        self.games[str(game_id)] = game
+        return game.changes_since(None)
+
+
+def main(argv=None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="DungeonSurvival HTTP/JSON API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--save-dir', default='saves')
+    parser.add_argument('--verbose', action='store_true', help="Log every request")
+    args = parser.parse_args(argv)
+
+    server = ApiServer((args.host, args.port), args.save_dir, args.verbose)
+    print(f"Dungeon Survival API on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Server stopped.")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
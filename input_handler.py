@@ -1,10 +1,13 @@
 """
 Input handling for keyboard controls
 """
+import os
 import sys
 import tty
 import termios
 import select
+import codecs
+from metrics import NULL_METRICS
 
 
 class InputHandler:
@@ -18,8 +21,20 @@ class InputHandler:
     ARROW_RIGHT = '\x1b[C'
     ARROW_LEFT = '\x1b[D'
     
-    def __init__(self):
+    ESCAPE = '\x1b'
+    
+    # How long to wait for the rest of an escape sequence split across reads
+    ESCAPE_TIMEOUT = 0.05
+    
+    # Maximum number of bytes pulled from stdin per read() call
+    READ_CHUNK = 1024
+    
+    def __init__(self, metrics=NULL_METRICS):
         self.old_settings = None
+        self.metrics = metrics
+        self._pending = ''  # Incomplete escape sequence carried between reads
+        self._queued = []   # Parsed keys not yet handed out by get_key()
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
         
     def __enter__(self):
         """Set terminal to raw mode for character-by-character input"""
@@ -84,19 +99,118 @@ class InputHandler:
                 return char
         else:
             # Unix/Linux implementation
-            if timeout:
-                ready, _, _ = select.select([sys.stdin], [], [], timeout)
-                if not ready:
-                    return None
-                    
-            char = sys.stdin.read(1)
+            if not self._queued:
+                self._queued = self.get_keys(timeout)
+            if not self._queued:
+                return None
+            return self._queued.pop(0)
+            
+    def get_keys(self, timeout=None):
+        """
+        Get every keypress currently available, as a batch
+        
+        Blocks (up to timeout) for the first key, then drains everything
+        else already buffered by the terminal, so held or pasted keys come
+        back in one call instead of one render per key.
+        
+        Args:
+            timeout: Optional timeout in seconds (None for blocking)
+            
+        Returns:
+            List of keys in the order they were typed (empty if timeout)
+        """
+        if sys.platform == 'win32':
+            import msvcrt
+            key = self.get_key(timeout)
+            if key is None:
+                return []
+            keys = [key]
+            while msvcrt.kbhit():
+                keys.append(self.get_key())
+            return keys
+            
+        # Keys left over from a previous get_key() call come first
+        keys, self._queued = self._queued, []
+        if keys:
+            timeout = 0
             
-            # Check for escape sequences (arrow keys, etc.)
-            if char == '\x1b':
-                # Read the next two characters for arrow keys
-                char += sys.stdin.read(2)
+        fd = sys.stdin.fileno()
+        ready, _, _ = select.select([fd], [], [], timeout)
+        while ready:
+            data = os.read(fd, self.READ_CHUNK)
+            if not data:
+                break
+            with self.metrics.phase('input'):
+                parsed, self._pending = self.parse_keys(
+                    self._pending + self._decoder.decode(data))
+            keys.extend(parsed)
+            
+            # Give the tail of a split escape sequence a moment to arrive
+            wait = self.ESCAPE_TIMEOUT if self._pending else 0
+            ready, _, _ = select.select([fd], [], [], wait)
+            
+        # Nothing more is coming: a lone ESC really was just ESC
+        if self._pending:
+            keys.extend(self._pending)
+            self._pending = ''
+            
+        return keys
+        
+    @staticmethod
+    def parse_keys(buffer):
+        """
+        Split raw terminal input into individual keys
+        
+        Escape sequences (CSI such as '\x1b[A', SS3 such as '\x1bOA') are
+        kept whole. A sequence cut off at the end of the buffer is returned
+        as the remainder so the next read can complete it.
+        
+        Args:
+            buffer: Decoded input text
+            
+        Returns:
+            Tuple (keys, remainder)
+        """
+        keys = []
+        i = 0
+        length = len(buffer)
+        while i < length:
+            char = buffer[i]
+            if char != InputHandler.ESCAPE:
+                keys.append(char)
+                i += 1
+                continue
+                
+            if i + 1 >= length:
+                break  # Bare ESC at the end - may be the start of a sequence
                 
-            return char
+            intro = buffer[i + 1]
+            if intro == '[':
+                # CSI: parameter/intermediate bytes, then one final byte
+                j = i + 2
+                while j < length and not ('\x40' <= buffer[j] <= '\x7e'):
+                    j += 1
+                if j >= length:
+                    break
+                key = buffer[i:j + 1]
+                i = j + 1
+            elif intro == 'O':
+                # SS3: exactly one more character
+                if i + 2 >= length:
+                    break
+                key = buffer[i:i + 3]
+                i += 3
+            else:
+                # ESC followed by an ordinary key
+                key = char
+                i += 1
+                
+            # Normalise application-mode arrows to the usual CSI form
+            if key[:2] == '\x1bO' and key[2] in 'ABCD':
+                key = '\x1b[' + key[2]
+            keys.append(key)
+            
+        return keys, buffer[i:]
             
     def parse_movement_key(self, key):
         """
@@ -0,0 +1,195 @@
+"""
+Weighted loot tables
+
+Chests draw from a table for their dungeon depth, and monsters draw an
+extra drop from a table for their type. Each table is built once with
+Vose's alias method: building costs O(entries), and every draw afterwards
+takes one index and one coin flip, so rolling loot costs the same for a
+table of five entries or five hundred.
+
+Tables are loaded from a JSON file (see data/loot_tables.json):
+
+    {
+      "chests": [
+        {"min_level": 1, "entries": [{"weight": 60, "gold": "4d10+6"}, ...]},
+        {"min_level": 3, "entries": [...]}
+      ],
+      "monsters": {
+        "Orc": [{"weight": 50}, {"weight": 35, "gold": "2d6"},
+                {"weight": 5, "items": ["Battle axe"]}]
+      }
+    }
+
+An entry gives gold (a dice expression, default none) and/or items, and
+an entry with neither means no loot. A chest uses the table with the
+highest min_level not above its depth, and its gold is multiplied by the
+depth. Monsters without a table drop nothing extra.
+"""
+import os
+import json
+import bisect
+from functools import lru_cache
+from collections import namedtuple
+import dice
+from monster import Treasure, NO_TREASURE
+
+
+# Default tables, next to this module
+DEFAULT_LOOT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                 'data', 'loot_tables.json')
+
+# One entry of a loot table: gold is a compiled dice expression or None
+LootEntry = namedtuple('LootEntry', ['weight', 'gold', 'items'])
+
+
+class AliasTable:
+    """
+    Constant-time sampling of indices with given weights (Vose's alias method)
+    """
+
+    def __init__(self, weights):
+        """
+        Build the probability and alias columns.
+
+        Args:
+            weights: Non-negative weights, at least one of them positive
+
+        Raises:
+            ValueError: If there is nothing to sample
+        """
+        weights = list(weights)
+        total = sum(weights)
+        if not weights or total <= 0 or min(weights) < 0:
+            raise ValueError(f"Invalid loot weights: {weights}")
+        n = len(weights)
+        scaled = [weight * n / total for weight in weights]
+        self.probability = [1.0] * n
+        self.alias = list(range(n))
+
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.probability[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] += scaled[less] - 1.0
+            (small if scaled[more] < 1.0 else large).append(more)
+        # Whatever is left holds (up to rounding) exactly its share
+
+    def __len__(self):
+        return len(self.alias)
+
+    def sample(self, rng):
+        """Draw an index with a random.Random"""
+        i = rng.randrange(len(self.alias))
+        return i if rng.random() < self.probability[i] else self.alias[i]
+
+
+class LootTable:
+    """
+    Weighted loot entries with constant-time rolls
+    """
+
+    def __init__(self, entries):
+        """
+        Args:
+            entries: List of LootEntry
+        """
+        self.entries = tuple(entries)
+        self._alias = AliasTable(entry.weight for entry in self.entries)
+
+    @classmethod
+    def from_data(cls, data):
+        """Build a table from its JSON list of entries"""
+        return cls(LootEntry(weight=entry['weight'],
+                             gold=dice.compile(entry['gold']) if entry.get('gold') else None,
+                             items=tuple(entry.get('items', ())))
+                   for entry in data)
+
+    def roll(self, rng, gold_multiplier=1):
+        """
+        Roll one entry.
+
+        Args:
+            rng: random.Random to draw from
+            gold_multiplier: Factor applied to the entry's gold
+
+        Returns:
+            Treasure
+        """
+        entry = self.entries[self._alias.sample(rng)]
+        gold = max(0, entry.gold.roll(rng)) * gold_multiplier if entry.gold else 0
+        if not gold and not entry.items:
+            return NO_TREASURE
+        return Treasure(gold, entry.items)
+
+
+class LootTables:
+    """
+    Chest tables by dungeon depth and drop tables by monster name
+    """
+
+    def __init__(self, chests, monsters):
+        """
+        Args:
+            chests: List of (min_level, LootTable)
+            monsters: Dictionary of monster name -> LootTable
+        """
+        chests = sorted(chests, key=lambda chest: chest[0])
+        self._levels = [level for level, _ in chests]
+        self._chests = [table for _, table in chests]
+        self.monsters = dict(monsters)
+
+    @classmethod
+    def from_data(cls, data):
+        """Build the tables from a loot file's dictionary"""
+        chests = [(chest['min_level'], LootTable.from_data(chest['entries']))
+                  for chest in data.get('chests', [])]
+        monsters = {name: LootTable.from_data(entries)
+                    for name, entries in data.get('monsters', {}).items()}
+        return cls(chests, monsters)
+
+    def chest_table(self, dungeon_level):
+        """The table for chests on a dungeon level (None if there is none)"""
+        index = bisect.bisect_right(self._levels, dungeon_level) - 1
+        return self._chests[index] if index >= 0 else None
+
+    def roll_chest(self, dungeon_level, rng):
+        """
+        Contents of a chest.
+
+        Returns:
+            Treasure (gold scaled by the depth)
+        """
+        table = self.chest_table(dungeon_level)
+        if table is None:
+            return NO_TREASURE
+        return table.roll(rng, gold_multiplier=dungeon_level)
+
+    def roll_drop(self, monster, rng):
+        """
+        Give a monster its drop on top of its own treasure.
+
+        Returns:
+            The drop rolled (a Treasure)
+        """
+        table = self.monsters.get(monster.name)
+        if table is None:
+            return NO_TREASURE
+        drop = table.roll(rng)
+        if drop is not NO_TREASURE:
+            monster.treasure = Treasure(monster.treasure.gold + drop.gold,
+                                        monster.treasure.items + drop.items)
+        return drop
+
+
+@lru_cache(maxsize=None)
+def load_loot_tables(filename=DEFAULT_LOOT_FILE):
+    """
+    Load loot tables from a JSON file, once per process.
+
+    Returns:
+        LootTables, shared by every caller
+    """
+    with open(filename) as f:
+        return LootTables.from_data(json.load(f))
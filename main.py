@@ -5,13 +5,23 @@ Main game entry point
 """
 import os
 import sys
+import json
+import time
 import shutil
+import hashlib
+import argparse
+import dice
 from game_state import GameState, GameMode
 from character import Character
 from input_handler import InputHandler
+from metrics import FrameMetrics, NULL_METRICS
+from combat_logger import CombatLogger
+from screen import ScreenBuffer
 
 # Global variables
 width = 80  # Default terminal width
+combat_logger = CombatLogger.from_config()  # Off unless enabled in config/env
+screen = ScreenBuffer()  # Last frame drawn, for redrawing only changed lines
 
 def raw_print(text=''):
     """Print with proper line endings for raw terminal mode"""
@@ -26,57 +36,79 @@ def clear_screen():
     sys.stdout.flush()
 
 
-def render_game(game_state):
-    """Render the current game state"""
-    global width
-    clear_screen()
-    
-    columns, rows = shutil.get_terminal_size(fallback=(80, 24))
-    width = min(columns, 120)  # Cap at 120 for readability
-    
-    # Debug output
-    raw_print(f"DEBUG: Terminal columns={columns}, rows={rows}, width={width}")
-    raw_print(f"DEBUG: Equals line length={len('=' * width)}")
-    
+def compose_frame(game_state, width, status_line=None):
+    """
+    Build the lines of one game frame
+    
+    Args:
+        game_state: Current GameState
+        width: Width of the separator lines
+        status_line: Optional line shown above the title (metrics overlay)
+        
+    Returns:
+        List of lines, without line endings
+    """
     display = game_state.get_display()
+    lines = []
+    
+    if status_line:
+        lines.append(status_line)
     
     # Title
-    raw_print("=" * width)
-    raw_print(f"DUNGEON SURVIVAL - Level {display['dungeon_level']} | Turn {display['turn_count']}")
-    raw_print("=" * width)
-    raw_print()
+    lines.append("=" * width)
+    lines.append(f"DUNGEON SURVIVAL - Level {display['dungeon_level']} | Turn {display['turn_count']}")
+    lines.append("=" * width)
+    lines.append("")
     
     # Map or combat view
     if display['map']:
-        for line in display['map'].split('\n'):
-            raw_print(line)
-        raw_print()
+        lines.extend(display['map'].split('\n'))
+        lines.append("")
     
     # Party info
-    raw_print("-" * width)
-    raw_print("Party:")
+    lines.append("-" * width)
+    lines.append("Party:")
     for info in display['party_info']:
-        raw_print(f"  {info}")
-    raw_print()
+        lines.append(f"  {info}")
+    lines.append("")
     
     # Message log
-    raw_print("-" * width)
-    raw_print("Messages:")
+    lines.append("-" * width)
+    lines.append("Messages:")
     for msg in display['messages'][-5:]:  # Show last 5 messages
-        raw_print(f"  {msg}")
-    raw_print()
+        lines.append(f"  {msg}")
+    lines.append("")
 
     # Controls hint
-    raw_print("-" * width)
+    lines.append("-" * width)
     if display['mode'] == GameMode.EXPLORATION:
         # Check if there's a pending door action
         if hasattr(game_state, 'pending_door_action') and game_state.pending_door_action:
-            raw_print("Door Controls: L: lockpick | S: smash | Move away to cancel")
+            lines.append("Door Controls: L: lockpick | S: smash | Move away to cancel")
         else:
-            raw_print("Controls: Arrow keys/WASD to move | D: descend stairs | U: ascend stairs | Q: quit | I: inventory | C: character")
+            lines.append("Controls: Arrow keys/WASD to move | D: descend stairs | U: ascend stairs | Q: quit | I: inventory | C: character")
     elif display['mode'] == GameMode.COMBAT:
-        raw_print("Combat: A: attack | S: spell | I: item | F: flee | Q: quit")
-    raw_print("=" * width)
+        lines.append("Combat: A: attack | S: spell | I: item | F: flee | Q: quit")
+    lines.append("=" * width)
+    return lines
+
+
+def render_game(game_state, metrics=NULL_METRICS):
+    """Render the current game state"""
+    global width
+    
+    columns, rows = shutil.get_terminal_size(fallback=(80, 24))
+    if min(columns, 120) != width:
+        screen.reset()  # Resized - old lines may have wrapped
+    width = min(columns, 120)  # Cap at 120 for readability
+    
+    status_line = metrics.overlay_line() if metrics.enabled else None
+    lines = compose_frame(game_state, width, status_line)
+    
+    # Write only the lines that changed since the last frame, in one call
+    with metrics.phase('write'):
+        sys.stdout.write(screen.diff(lines))
+        sys.stdout.flush()
 
 
 def create_default_party():
@@ -140,8 +172,16 @@ def create_default_party():
     return party
 
 
-def handle_exploration_input(game_state, key):
-    """Handle input during exploration mode"""
+def handle_exploration_input(game_state, key, interactive=True):
+    """
+    Handle input during exploration mode
+    
+    Args:
+        game_state: Current GameState
+        key: Key string from the input handler
+        interactive: False when there is no terminal (headless runs), which
+                     skips full-screen views that wait for a keypress
+    """
     input_handler = InputHandler()
     
     # Check for special commands first (before movement)
@@ -182,7 +222,7 @@ def handle_exploration_input(game_state, key):
     # Other commands
     if key.lower() == 'i':
         game_state.add_message("Inventory not yet implemented")
-    elif key.lower() == 'c':
+    elif key.lower() == 'c' and interactive:
         # Display character sheets for all party members
         display_character_sheets(game_state)
         
@@ -212,6 +252,9 @@ def display_character_sheets(game_state):
     input_handler = InputHandler()
     with input_handler:
         input_handler.get_key()
+    
+    # The game frame has to be redrawn from scratch
+    screen.reset()
 
 
 def handle_combat_input(game_state, key):
@@ -227,34 +270,25 @@ def handle_combat_input(game_state, key):
         if combat.character.is_alive() and combat.monsters:
             alive_monsters = [m for m in combat.monsters if m.is_alive()]
             if alive_monsters:
-                result = combat.execute_round(
-                    player_action={'type': 'attack'},
-                    target_index=0
-                )
+                with dice.using_rng(game_state.rng.stream('combat')):
+                    result = combat.execute_round(
+                        player_action={'type': 'attack'},
+                        target_index=0
+                    )
                 
-                # Debug: Write combat log to file
-                with open('combat_debug.log', 'a') as f:
-                    f.write("\n=== COMBAT LOG DEBUG ===\n")
-                    for log_entry in result.get('log', []):
-                        f.write(log_entry + "\n")
-                    f.write("========================\n\n")
+                # Debug: queue this round's log entries for the combat log file
+                combat_logger.log_entries(combat, result.get('log', []))
                 
                 if result['status'] == 'victory':
                     game_state.add_message(result['message'])
-                    # Award XP
-                    xp = 100 * len(combat.monsters)
-                    game_state.party.distribute_experience(xp)
-                    game_state.add_message(f"Gained {xp} experience!")
-                    
-                    # Track statistics
-                    game_state.stats['monsters_defeated'] += len(combat.monsters)
-                    game_state.stats['total_experience'] += xp
+                    # Award XP, gold and items
+                    game_state.claim_rewards(result['rewards'], len(combat.monsters))
                     
                     # Remove dead monsters from map
                     for monster in combat.monsters:
-                        for i, (m, mx, my) in enumerate(game_state.current_map.monsters):
-                            if m == monster:
-                                game_state.current_map.remove_monster(mx, my)
+                        position = game_state.current_map.position_of(monster)
+                        if position is not None:
+                            game_state.current_map.remove_monster(*position)
                                 
                     game_state.mode = GameMode.EXPLORATION
                     game_state.combat_instance = None
@@ -283,6 +317,20 @@ def handle_combat_input(game_state, key):
     return True
 
 
+def handle_input(game_state, key, interactive=True):
+    """
+    Route a single key to the handler for the current game mode
+    
+    Returns:
+        False if the player asked to quit
+    """
+    if game_state.mode == GameMode.EXPLORATION:
+        return handle_exploration_input(game_state, key, interactive)
+    elif game_state.mode == GameMode.COMBAT:
+        return handle_combat_input(game_state, key)
+    return True
+
+
 def get_available_maps():
     """Get list of available predesigned map files"""
     maps_dir = "maps"
@@ -297,8 +345,181 @@ def get_available_maps():
     return sorted(map_files)
 
 
-def main():
-    """Main game loop"""
+def create_game(map_file=None, seed=None):
+    """
+    Create and initialize a new game with the default party
+    
+    Args:
+        map_file: Path to a predesigned dungeon, or None for a random one
+        seed: Master seed for the game's random streams (see rng.py)
+        
+    Returns:
+        Initialized GameState
+    """
+    game_state = GameState(use_predesigned=map_file is not None, map_file=map_file,
+                           seed=seed)
+    game_state.party = create_default_party()
+    game_state.initialize_game()
+    
+    game_state.add_message("Welcome to Dungeon Survival!")
+    game_state.add_message("Your quest: Survive and collect treasure!")
+    return game_state
+
+
+def resolve_map_choice(choice):
+    """
+    Turn a headless map choice into a map file path
+    
+    Args:
+        choice: 'random' (or '1') for a generated dungeon, a 1-based index
+                into get_available_maps(), a file name in maps/, or a path
+                
+    Returns:
+        Path to the map file, or None for a random dungeon
+    """
+    if choice in (None, '', 'random', '1'):
+        return None
+    
+    available_maps = get_available_maps()
+    if choice.isdigit():
+        idx = int(choice) - 1
+        if not 0 <= idx < len(available_maps):
+            raise ValueError(f"Map number must be between 1 and {len(available_maps)}")
+        return os.path.join("maps", available_maps[idx])
+    if choice in available_maps:
+        return os.path.join("maps", choice)
+    if os.path.exists(choice):
+        return choice
+    raise ValueError(f"Unknown map: {choice}")
+
+
+def read_key_script(source):
+    """
+    Read a key script for headless play
+    
+    The script is raw keys exactly as a terminal would send them (WASD,
+    digits, escape sequences for arrows...). Whitespace is ignored so
+    scripts can be split over lines.
+    
+    Args:
+        source: Path to the script file, or '-' for stdin
+        
+    Returns:
+        List of keys
+    """
+    if source == '-':
+        text = sys.stdin.read()
+    else:
+        with open(source, 'r') as f:
+            text = f.read()
+    keys, rest = InputHandler.parse_keys(text)
+    keys.extend(rest)
+    return [key for key in keys if not key.isspace()]
+
+
+def state_digest(game_state):
+    """
+    Get a short, stable fingerprint of the game state
+    
+    Two runs with the same map, seed and key script must produce the same
+    digest, which makes regression comparisons a one-line check.
+    """
+    state = {
+        'mode': game_state.mode.name,
+        'dungeon_level': game_state.dungeon_level,
+        'turn_count': game_state.turn_count,
+        'position': list(game_state.party.position),
+        'party': [
+            [m.name, m.level, m.current_hp, m.max_hp, m.experience, m.gold]
+            for m in game_state.party.members
+        ],
+        'monsters': sorted(
+            [m.name, x, y, m.current_hp]
+            for m, x, y in game_state.current_map.monsters
+        ),
+        'chests': sorted(list(c) for c in game_state.current_map.chests),
+        'stats': game_state.stats,
+    }
+    encoded = json.dumps(state, sort_keys=True).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+def run_headless(map_choice, seed, keys):
+    """
+    Run the game loop without a terminal
+    
+    Keys go through the same handle_input() path as interactive play and
+    each turn's frame is composed, but nothing is written to a terminal and
+    nothing waits for a keypress.
+    
+    Args:
+        map_choice: See resolve_map_choice()
+        seed: Random seed for a reproducible run
+        keys: List of keys to play
+        
+    Returns:
+        Process exit code
+    """
+    game_state = create_game(resolve_map_choice(map_choice), seed)
+    metrics = FrameMetrics.from_env()
+    game_state.metrics = metrics
+    
+    processed = 0
+    start = time.perf_counter()
+    for key in keys:
+        processed += 1
+        with metrics.phase('update'):
+            running = handle_input(game_state, key, interactive=False)
+        if not running or game_state.mode in (GameMode.GAME_OVER, GameMode.VICTORY):
+            break
+        # Build the frame as the interactive loop would, minus the I/O
+        compose_frame(game_state, width)
+        metrics.end_frame()
+    elapsed = time.perf_counter() - start
+    combat_logger.close()
+    
+    rate = processed / elapsed if elapsed > 0 else float('inf')
+    print(f"Keys processed:  {processed}/{len(keys)}")
+    print(f"Game turns:      {game_state.turn_count}")
+    print(f"Elapsed:         {elapsed:.4f}s")
+    print(f"Turns/second:    {rate:.0f}")
+    print(f"Final mode:      {game_state.mode.name}")
+    print(f"Dungeon level:   {game_state.dungeon_level}")
+    print(f"State digest:    {state_digest(game_state)}")
+    if metrics.enabled:
+        for line in metrics.summary():
+            print(line)
+    return 0
+
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="DungeonSurvival - A roguelike adventure")
+    parser.add_argument('--curses', action='store_true',
+                        help="Use the curses frontend")
+    parser.add_argument('--headless', action='store_true',
+                        help="Play a key script without a terminal and report throughput")
+    parser.add_argument('--map', default='random',
+                        help="Headless map: 'random', a map number, or a file in maps/")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="Random seed for headless runs")
+    parser.add_argument('--script', default='-',
+                        help="Headless key script file ('-' for stdin)")
+    args = parser.parse_args(argv)
+    try:
+        resolve_map_choice(args.map)
+    except ValueError as error:
+        parser.error(str(error))
+    return args
+
+
+def main(use_curses=False):
+    """
+    Set up a game from the interactive menus and play it
+    
+    Args:
+        use_curses: Play in the curses frontend instead of the raw terminal
+    """
     columns, rows = shutil.get_terminal_size(fallback=(80, 24))
     global width
     width = min(columns, 120)  # Cap at 120 for readability
@@ -364,53 +585,22 @@ def main():
     input("Press Enter to continue...")
     
     # Initialize game
-    game_state = GameState(use_predesigned=use_predesigned, map_file=map_file)
-    game_state.party = create_default_party()
-    game_state.initialize_game()
-    
-    game_state.add_message("Welcome to Dungeon Survival!")
-    game_state.add_message("Your quest: Survive and collect treasure!")
+    game_state = create_game(map_file if use_predesigned else None)
     
-    # Main game loop
-    running = True
+    # Frame timing (enabled with DUNGEON_METRICS=1)
+    metrics = FrameMetrics.from_env()
+    game_state.metrics = metrics
     
     try:
-        with InputHandler() as input_handler:
-            while running:
-                # Render
-                render_game(game_state)
-                
-                # Check win/lose conditions
-                if game_state.mode == GameMode.GAME_OVER:
-                    raw_print()
-                    raw_print("╔" + "═" * 58 + "╗")
-                    raw_print("║" + " " * 22 + "GAME OVER" + " " * 27 + "║")
-                    raw_print("║" + " " * 17 + "Your party has been defeated!" + " " * 12 + "║")
-                    raw_print("╚" + "═" * 58 + "╝")
-                    raw_print()
-                    for line in game_state.get_game_statistics():
-                        raw_print(line)
-                    break
-                elif game_state.mode == GameMode.VICTORY:
-                    raw_print()
-                    raw_print("╔" + "═" * 58 + "╗")
-                    raw_print("║" + " " * 23 + "VICTORY!" + " " * 27 + "║")
-                    raw_print("║" + " " * 15 + "You have escaped the dungeon!" + " " * 14 + "║")
-                    raw_print("╚" + "═" * 58 + "╝")
-                    raw_print()
-                    for line in game_state.get_game_statistics():
-                        raw_print(line)
-                    break
-                    
-                # Get input
-                key = input_handler.get_key()
-                
-                if key:
-                    # Handle input based on game mode
-                    if game_state.mode == GameMode.EXPLORATION:
-                        running = handle_exploration_input(game_state, key)
-                    elif game_state.mode == GameMode.COMBAT:
-                        running = handle_combat_input(game_state, key)
+        if use_curses:
+            import curses_frontend
+            curses_frontend.run(game_state, handle_input, metrics)
+            # Leave the final result on the normal terminal as well
+            if game_state.mode in (GameMode.GAME_OVER, GameMode.VICTORY):
+                for line in compose_end_screen(game_state):
+                    raw_print(line)
+        else:
+            run_terminal(game_state, metrics)
                         
     except KeyboardInterrupt:
         raw_print("\n\nGame interrupted by user.")
@@ -420,9 +610,59 @@ def main():
         traceback.print_exc()
     finally:
         #clear_screen()
+        combat_logger.close()
+        if metrics.enabled:
+            for line in metrics.summary():
+                raw_print(line)
         raw_print("Thanks for playing Dungeon Survival!")
         raw_print()
 
 
+def compose_end_screen(game_state):
+    """Get the game over / victory banner and statistics lines"""
+    lines = [""]
+    lines.append("╔" + "═" * 58 + "╗")
+    if game_state.mode == GameMode.GAME_OVER:
+        lines.append("║" + " " * 22 + "GAME OVER" + " " * 27 + "║")
+        lines.append("║" + " " * 17 + "Your party has been defeated!" + " " * 12 + "║")
+    else:
+        lines.append("║" + " " * 23 + "VICTORY!" + " " * 27 + "║")
+        lines.append("║" + " " * 15 + "You have escaped the dungeon!" + " " * 14 + "║")
+    lines.append("╚" + "═" * 58 + "╝")
+    lines.append("")
+    lines.extend(game_state.get_game_statistics())
+    return lines
+
+
+def run_terminal(game_state, metrics=NULL_METRICS):
+    """Main game loop on a raw-mode terminal"""
+    running = True
+    
+    with InputHandler(metrics) as input_handler:
+        while running:
+            # Render
+            render_game(game_state, metrics)
+            metrics.end_frame()
+            
+            # Check win/lose conditions
+            if game_state.mode in (GameMode.GAME_OVER, GameMode.VICTORY):
+                for line in compose_end_screen(game_state):
+                    raw_print(line)
+                break
+                
+            # Get input - every key typed since the last frame, in order
+            keys = input_handler.get_keys()
+            metrics.mark_input()
+            
+            with metrics.phase('update'):
+                for key in keys:
+                    running = handle_input(game_state, key)
+                    if not running or game_state.mode in (GameMode.GAME_OVER, GameMode.VICTORY):
+                        break
+
+
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    if args.headless:
+        sys.exit(run_headless(args.map, args.seed, read_key_script(args.script)))
+    main(use_curses=args.curses)
@@ -0,0 +1,117 @@
+"""
+Shared, read-only templates for predesigned dungeons
+
+Every session playing the same file from maps/ used to parse it and then
+deep-copy each level it entered. The template cache parses a file once
+per process, keyed by its path and content hash, into immutable level
+templates. Sessions build their levels with DungeonMap.from_template(),
+which only stores what that session changes.
+"""
+import os
+import json
+import hashlib
+from collections import namedtuple
+
+
+# Immutable description of one predesigned level.
+#   rows:     tuple of str, one per map row
+#   chests:   tuple of (x, y)
+#   monsters: tuple of (name, hit_dice, armor_class, attack_bonus, damage, x, y)
+#   doors:    tuple of door dicts frozen as tuples of (key, value) items
+LevelTemplate = namedtuple('LevelTemplate', [
+    'width', 'height', 'rows', 'stairs_up', 'stairs_down',
+    'chests', 'monsters', 'doors'
+])
+
+
+def _freeze(value):
+    """Turn JSON lists into tuples so templates cannot be changed in place"""
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def parse_level(level_data):
+    """
+    Build a level template from its map file dictionary.
+
+    Args:
+        level_data: One entry of the file's 'levels' list (see DungeonMap.to_dict)
+
+    Returns:
+        LevelTemplate
+    """
+    width = level_data['width']
+    height = level_data['height']
+    rows = tuple(level_data['tiles'][y][:width] for y in range(height))
+
+    monsters = tuple(
+        (m['name'], m['hit_dice'], m['armor_class'], m['attack_bonus'],
+         m['damage'], m['position'][0], m['position'][1])
+        for m in level_data.get('monsters') or []
+    )
+    doors = tuple(
+        tuple(sorted((key, _freeze(value)) for key, value in door.items()))
+        for door in level_data.get('doors') or []
+    )
+
+    return LevelTemplate(
+        width=width,
+        height=height,
+        rows=rows,
+        stairs_up=tuple(level_data['stairs_up']) if level_data['stairs_up'] else None,
+        stairs_down=tuple(level_data['stairs_down']) if level_data['stairs_down'] else None,
+        chests=tuple(tuple(chest) for chest in level_data['chests']),
+        monsters=monsters,
+        doors=doors,
+    )
+
+
+class MapTemplateCache:
+    """
+    Process-wide cache of parsed dungeon files
+    """
+
+    def __init__(self):
+        self._templates = {}  # (real path, sha256) -> tuple of LevelTemplate
+        self._stamps = {}     # real path -> (mtime_ns, size, sha256)
+
+    def get(self, filename):
+        """
+        Get the level templates of a multi-level dungeon file.
+
+        The file is only re-read when its modification time or size
+        changes, and only re-parsed when its content hash changes.
+
+        Args:
+            filename: Path to a dungeon file (see DungeonMap.save_multilevel_dungeon)
+
+        Returns:
+            Tuple of LevelTemplate, shared by every caller
+        """
+        path = os.path.realpath(filename)
+        stat = os.stat(path)
+        stamp = self._stamps.get(path)
+
+        if stamp and stamp[:2] == (stat.st_mtime_ns, stat.st_size):
+            digest = stamp[2]
+        else:
+            with open(path, 'rb') as f:
+                content = f.read()
+            digest = hashlib.sha256(content).hexdigest()
+            self._stamps[path] = (stat.st_mtime_ns, stat.st_size, digest)
+            if (path, digest) not in self._templates:
+                dungeon_data = json.loads(content)
+                self._templates[(path, digest)] = tuple(
+                    parse_level(level) for level in dungeon_data['levels'])
+
+        return self._templates[(path, digest)]
+
+    def clear(self):
+        """Forget every cached file"""
+        self._templates.clear()
+        self._stamps.clear()
+
+
+# Shared by every GameState in the process
+TEMPLATE_CACHE = MapTemplateCache()
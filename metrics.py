@@ -0,0 +1,154 @@
+"""
+Frame timing instrumentation
+
+Set the DUNGEON_METRICS environment variable to 1 to record how long each
+phase of a frame takes (input parsing, game update, field of view, map
+rendering and terminal write), show a one-line overlay while playing and
+print a percentile summary on exit.
+"""
+import os
+import time
+from collections import deque
+
+
+# Phases recorded per frame, in the order they happen
+PHASES = ('input', 'update', 'fov', 'render', 'write')
+
+# Environment variable that turns instrumentation on
+ENV_FLAG = 'DUNGEON_METRICS'
+
+
+class _PhaseTimer:
+    """Context manager adding the elapsed time of a block to one phase"""
+
+    __slots__ = ('metrics', 'name', 'start')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, type, value, traceback):
+        current = self.metrics._current
+        current[self.name] = current.get(self.name, 0.0) + time.perf_counter() - self.start
+
+
+class _NullTimer:
+    """Context manager that does nothing (instrumentation disabled)"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class FrameMetrics:
+    """
+    Collects per-frame phase timings over a rolling window
+    """
+
+    def __init__(self, enabled=False, window=240):
+        """
+        Initialize the collector.
+
+        Args:
+            enabled: Record timings (when False every call is a no-op)
+            window: Number of recent frames kept for percentiles
+        """
+        self.enabled = enabled
+        self.frames = 0
+        self.samples = {name: deque(maxlen=window)
+                        for name in PHASES + ('frame', 'latency')}
+        self._current = {}
+        self._input_time = None
+
+    @classmethod
+    def from_env(cls):
+        """Create a collector enabled by the DUNGEON_METRICS variable"""
+        return cls(enabled=os.environ.get(ENV_FLAG, '') not in ('', '0'))
+
+    def phase(self, name):
+        """
+        Time a block of code as part of the current frame.
+
+        Args:
+            name: One of PHASES
+
+        Returns:
+            Context manager
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _PhaseTimer(self, name)
+
+    def mark_input(self):
+        """Note that input arrived; latency is measured from here to the end of the frame"""
+        if self.enabled:
+            self._input_time = time.perf_counter()
+
+    def end_frame(self):
+        """Close the current frame and add its timings to the window"""
+        if not self.enabled:
+            return
+
+        current = self._current
+        for name in PHASES:
+            self.samples[name].append(current.get(name, 0.0))
+        self.samples['frame'].append(sum(current.values()))
+        if self._input_time is not None:
+            self.samples['latency'].append(time.perf_counter() - self._input_time)
+            self._input_time = None
+
+        self._current = {}
+        self.frames += 1
+
+    def percentiles(self, name):
+        """
+        Get rolling percentiles for a phase.
+
+        Returns:
+            Tuple (p50, p95, p99) in seconds, or None if there are no samples
+        """
+        values = sorted(self.samples[name])
+        if not values:
+            return None
+        last = len(values) - 1
+        return tuple(values[min(last, int(p * len(values)))] for p in (0.50, 0.95, 0.99))
+
+    def overlay_line(self):
+        """Get a one-line status overlay (p95 per phase, in milliseconds)"""
+        parts = []
+        for name in ('frame',) + PHASES + ('latency',):
+            stats = self.percentiles(name)
+            if stats:
+                parts.append(f"{name} {stats[1] * 1000:.2f}")
+        return "p95 ms: " + " | ".join(parts) if parts else "p95 ms: (no frames yet)"
+
+    def summary(self):
+        """Get formatted summary lines for display on exit"""
+        lines = []
+        lines.append("=" * 60)
+        lines.append(f"FRAME METRICS (last {len(self.samples['frame'])} of {self.frames} frames)")
+        lines.append("=" * 60)
+        lines.append(f"{'phase':<10}{'p50 ms':>12}{'p95 ms':>12}{'p99 ms':>12}")
+        for name in PHASES + ('frame', 'latency'):
+            stats = self.percentiles(name)
+            if stats:
+                p50, p95, p99 = (s * 1000 for s in stats)
+                lines.append(f"{name:<10}{p50:>12.3f}{p95:>12.3f}{p99:>12.3f}")
+        lines.append("=" * 60)
+        return lines
+
+
+# Shared disabled collector for code paths that are not instrumented
+NULL_METRICS = FrameMetrics(enabled=False)
@@ -1,7 +1,42 @@
 """
 Monster and enemy classes for D20 combat
 """
+from functools import lru_cache
+from collections import namedtuple
 import dice
+from combat_events import Hit, Miss, SpellCast
+
+
+# What a monster carries: gold pieces and a tuple of item names
+Treasure = namedtuple('Treasure', ['gold', 'items'])
+NO_TREASURE = Treasure(0, ())
+
+# Experience for defeating a monster, per hit die
+XP_PER_HIT_DIE = 100
+
+
+@lru_cache(maxsize=None)
+def parse_treasure(lines):
+    """
+    Treasure from descriptions such as ("20 gold pieces", "Battle axe").
+    
+    Parsed once per distinct tuple of lines, so monsters of one type share
+    the result.
+    """
+    gold = 0
+    items = []
+    for line in lines:
+        if 'gold' in line.lower():
+            gold += int(''.join(filter(str.isdigit, line)) or 0)
+        else:
+            items.append(line)
+    return Treasure(gold, tuple(items))
+
+
+@lru_cache(maxsize=None)
+def experience_for(hit_dice):
+    """Experience for defeating a monster with the given hit dice"""
+    return XP_PER_HIT_DIE * sum(abs(count) for count, _ in dice.compile(hit_dice).dice)
 
 
 class Monster:
@@ -11,14 +46,27 @@ class Monster:
     
     def __init__(self, name, hit_dice="1d8", armor_class=10, 
                  attack_bonus=0, damage="1d6", 
-                 special_abilities=None, treasure=None):
+                 special_abilities=None, treasure=None, xp=None):
+        """
+        Create a monster and roll its hit points.
+        
+        Args:
+            treasure: Treasure, or a list of descriptions such as
+                      "20 gold pieces" (anything without "gold" is an item)
+            xp: Experience for defeating it (default by hit dice)
+        """
         self.name = name
         self.hit_dice = hit_dice
         self.armor_class = armor_class
         self.attack_bonus = attack_bonus
         self.damage = damage
+        self.hp_dice = dice.compile(hit_dice)
+        self.damage_dice = dice.compile(damage)
         self.special_abilities = special_abilities or []
-        self.treasure = treasure or []
+        if not isinstance(treasure, Treasure):
+            treasure = parse_treasure(tuple(treasure or ()))
+        self.treasure = treasure
+        self.xp = experience_for(hit_dice) if xp is None else xp
         
         # Calculate HP from hit dice
         self.max_hp = self._roll_hit_points()
@@ -31,26 +79,7 @@ class Monster:
         
     def _roll_hit_points(self):
         """Roll hit points based on hit dice"""
-        if 'd' in self.hit_dice:
-            count, sides = self.hit_dice.split('d')
-            count = int(count)
-            sides = int(sides.split('+')[0].split('-')[0])  # Handle modifiers
-            
-            hp = 0
-            for _ in range(count):
-                hp += dice.roll(sides)
-                
-            # Add any flat modifier
-            if '+' in self.hit_dice:
-                modifier = int(self.hit_dice.split('+')[1])
-                hp += modifier
-            elif '-' in self.hit_dice:
-                modifier = int(self.hit_dice.split('-')[1])
-                hp -= modifier
-                
-            return max(1, hp)
-        else:
-            return int(self.hit_dice)
+        return max(1, self.hp_dice.roll())
             
     def attack(self, target):
         """
@@ -60,7 +89,7 @@ class Monster:
             target: Character being attacked
             
         Returns:
-            Tuple of (hit: bool, damage: int, message: str)
+            Tuple of (hit: bool, attack_roll: int, damage: int, event: Hit or Miss)
         """
         attack_roll = dice.d20(1, self.attack_bonus)
         
@@ -68,27 +97,13 @@ class Monster:
             # Hit!
             damage_dealt = self._roll_damage()
             target.take_damage(damage_dealt)
-            return True, attack_roll,damage_dealt, f"{self.name} hits {target.name} for {damage_dealt} damage!"
+            return True, attack_roll, damage_dealt, Hit(self.name, target.name, damage_dealt)
         else:
-            return False, attack_roll,0, f"{self.name} misses {target.name}!"
+            return False, attack_roll, 0, Miss(self.name, target.name)
             
     def _roll_damage(self):
         """Roll damage dice"""
-        if '+' in self.damage:
-            dice_part, mod = self.damage.split('+')
-            mod = int(mod)
-        elif '-' in self.damage:
-            dice_part, mod = self.damage.split('-')
-            mod = -int(mod)
-        else:
-            dice_part = self.damage
-            mod = 0
-            
-        count, sides = dice_part.split('d')
-        count = int(count)
-        sides = int(sides)
-        
-        return max(1, dice.roll(sides, count, mod))
+        return max(1, self.damage_dice.roll())
         
     def take_damage(self, damage):
         """Take damage and return True if still alive"""
@@ -124,7 +139,7 @@ class Goblin(Monster):
             armor_class=12,
             attack_bonus=0,
             damage="1d4+2",
-            treasure=["10 gold pieces"]
+            treasure=Treasure(gold=10, items=())
         )
         self.reflex_save = 3
 
@@ -138,7 +153,7 @@ class Orc(Monster):
             armor_class=13,
             attack_bonus=1,
             damage="1d8",
-            treasure=["20 gold pieces", "Battle axe"]
+            treasure=Treasure(gold=20, items=("Battle axe",))
         )
         self.fortitude_save = 3
 
@@ -153,7 +168,7 @@ class Skeleton(Monster):
             attack_bonus=2,
             damage="1d6+1",
             special_abilities=["Undead: immune to mind-affecting"],
-            treasure=[]
+            treasure=NO_TREASURE
         )
         self.will_save = -2
 
@@ -167,7 +182,7 @@ class Ogre(Monster):
             armor_class=16,
             attack_bonus=8,
             damage="2d8+7",
-            treasure=["50 gold pieces", "Large club"]
+            treasure=Treasure(gold=50, items=("Large club",))
         )
         self.fortitude_save = 5
 
@@ -182,7 +197,7 @@ class Dragon(Monster):
             attack_bonus=18,
             damage="2d6+7",
             special_abilities=["Breath Weapon: 8d10 fire damage, Reflex DC 19 for half"],
-            treasure=["500 gold pieces", "Magic sword +1", "Ruby worth 1000gp"]
+            treasure=Treasure(gold=500, items=("Magic sword +1", "Ruby worth 1000gp"))
         )
         self.fortitude_save = 11
         self.reflex_save = 8
@@ -195,12 +210,12 @@ class Dragon(Monster):
         
         if save_roll >= 19:
             damage = damage // 2
-            result = f"{target.name} dodges! Takes {damage} fire damage (halved)."
+            text = "{caster} breathes fire! {target} dodges! Takes {damage} fire damage (halved)."
         else:
-            result = f"{target.name} is burned! Takes {damage} fire damage!"
+            text = "{caster} breathes fire! {target} is burned! Takes {damage} fire damage!"
             
         target.take_damage(damage)
-        return f"{self.name} breathes fire! {result}"
+        return SpellCast(self.name, "Breath Weapon", target.name, text, {'damage': damage})
 
 
 class GiantSpider(Monster):
@@ -213,7 +228,7 @@ class GiantSpider(Monster):
             attack_bonus=4,
             damage="1d6",
             special_abilities=["Poison: DC 14 Fort save or 1d4 STR damage"],
-            treasure=[]
+            treasure=NO_TREASURE
         )
         self.reflex_save = 4
 
@@ -228,7 +243,7 @@ class Zombie(Monster):
             attack_bonus=2,
             damage="1d6+1",
             special_abilities=["Undead: immune to mind-affecting"],
-            treasure=[]
+            treasure=NO_TREASURE
         )
         self.fortitude_save = 3
         self.will_save = -2
@@ -244,7 +259,7 @@ class Troll(Monster):
             attack_bonus=9,
             damage="1d6+6",
             special_abilities=["Regeneration 5: heals 5 HP per round"],
-            treasure=["30 gold pieces"]
+            treasure=Treasure(gold=30, items=())
         )
         self.fortitude_save = 9
 
@@ -0,0 +1,297 @@
+"""
+Combat between a whole party and a group of monsters
+
+Every living party member and monster takes a turn each round. Turns come
+from a priority queue ordered by (round, initiative); a combatant that has
+acted is pushed back for the next round, and fallen combatants are simply
+dropped when they come up, so each turn costs O(log n) however many fight.
+Ties keep the usual order: party members before monsters, then the order
+they joined the fight.
+
+Party members act on the player's orders (see execute_round()). Monsters
+attack a random living party member.
+"""
+import heapq
+import dice
+from combat import CombatLog, CombatOutcome, collect_rewards
+from combat_events import RoundStart, Attack, Hit, Miss, Damage, Death, Flee, Note
+
+
+class _Living:
+    """Living combatants of one side, with O(1) removal and random choice"""
+
+    def __init__(self, combatants):
+        self.members = [c for c in combatants if c.is_alive()]
+        self.slots = {id(c): i for i, c in enumerate(self.members)}
+
+    def remove(self, combatant):
+        """Drop a fallen combatant (swapping the last one into its place)"""
+        slot = self.slots.pop(id(combatant), None)
+        if slot is None:
+            return
+        last = self.members.pop()
+        if last is not combatant:
+            self.members[slot] = last
+            self.slots[id(last)] = slot
+
+    def __contains__(self, combatant):
+        return id(combatant) in self.slots
+
+    def __len__(self):
+        return len(self.members)
+
+
+class PartyCombat:
+    """
+    Turn-based combat between several characters and several monsters
+    """
+
+    def __init__(self, characters, monsters, persistent_initiative=False):
+        """
+        Initialize combat.
+
+        Args:
+            characters: Party members (fallen ones don't fight)
+            monsters: List of monsters or single monster
+            persistent_initiative: Roll initiative once and keep it for the
+                whole fight (D20 rules) instead of every round
+        """
+        self.characters = list(characters)
+        self.monsters = monsters if isinstance(monsters, list) else [monsters]
+        self.persistent_initiative = persistent_initiative
+        self.round = 0
+        self.combat_log = CombatLog()
+        self.damage_dealt = 0   # By the party's attacks
+
+        self._queue = []        # (round, -initiative, side, join order, combatant)
+        self._initiative = {}   # id(combatant) -> initiative, with persistent initiative
+        self._party = _Living(self.characters)
+        self._foes = _Living(self.monsters)
+        self._member_index = {id(c): i for i, c in enumerate(self.characters)}
+
+    @property
+    def character(self):
+        """The party member taking the player's orders: the first one alive"""
+        for character in self.characters:
+            if character.is_alive():
+                return character
+        return self.characters[0] if self.characters else None
+
+    def _schedule(self, combatant, is_player, join_order, round_number):
+        """Queue a combatant's turn in a round"""
+        initiative = self._initiative.get(id(combatant))
+        if initiative is None:
+            if is_player:
+                initiative = dice.d20(1, combatant.get_ability_modifier('dexterity'))
+            else:
+                initiative = dice.d20()
+            if self.persistent_initiative:
+                self._initiative[id(combatant)] = initiative
+        side = 0 if is_player else 1
+        heapq.heappush(self._queue, (round_number, -initiative, side, join_order, combatant))
+
+    def _fallen(self, combatant, log):
+        """Take a combatant out of the fight once it drops"""
+        if not combatant.is_alive():
+            log.append(Death(combatant.name))
+            self._party.remove(combatant)
+            self._foes.remove(combatant)
+
+    def _target_monster(self, preferred):
+        """The chosen monster if it is still up, otherwise any living one"""
+        if preferred is not None and preferred in self._foes:
+            return preferred
+        return self._foes.members[0] if self._foes.members else None
+
+    def _member_turn(self, character, action, target, log):
+        """
+        One party member acts.
+
+        Returns:
+            True if the party fled
+        """
+        kind = action.get('type', 'attack')
+        if kind == 'attack':
+            target = self._target_monster(target)
+            if target is None:
+                return False
+            hit, damage, attack_roll = character.attack_roll(target.armor_class,
+                                                             action.get('weapon_damage'))
+            weapon_name = character.equipped_weapon.name if character.equipped_weapon else "unarmed"
+            log.append(Attack(character.name, attack_roll, target.armor_class, weapon_name))
+            if hit:
+                target.take_damage(damage)
+                self.damage_dealt += damage
+                log.append(Hit(character.name, target.name, damage))
+                log.append(Damage(target.name, damage, target.current_hp, target.max_hp))
+                self._fallen(target, log)
+            else:
+                log.append(Miss(character.name, target.name))
+
+        elif kind == 'spell':
+            target = action['target'] if 'target' in action else self._target_monster(target)
+            success, result = character.cast_spell(action['spell'], target)
+            log.append(result if success else Note(result))
+            if target is not None:
+                self._fallen(target, log)
+
+        elif kind == 'item':
+            item_name = action['item_name']
+            result = character.use_item(item_name)
+            log.append(Note(result) if result else Note(f"Cannot use {item_name}!"))
+
+        elif kind == 'flee':
+            # Attempt to flee (DEX check)
+            flee_roll = dice.d20(1, character.get_ability_modifier('dexterity'))
+            log.append(Flee(character.name, flee_roll >= 10))
+            return flee_roll >= 10
+        return False
+
+    def _monster_turn(self, monster, log):
+        """One monster attacks a random living party member"""
+        rng = dice.active_rng()
+        target = self._party.members[rng.randrange(len(self._party))]
+        hit, attack_roll, damage, event = monster.attack(target)
+        log.append(Attack(monster.name, attack_roll, target.get_armor_class(), None))
+        log.append(event)
+        if hit:
+            log.append(Damage(target.name, damage, target.current_hp, target.max_hp))
+            self._fallen(target, log)
+
+    def execute_round(self, player_action=None, target_index=0, since=None, actions=None):
+        """
+        Execute one round of combat.
+
+        Args:
+            player_action: Action of the party member taking the player's
+                orders (see Combat.execute_round()); the others attack
+            target_index: Index among the living monsters that the party
+                attacks (anyone else still up once it falls)
+            since: Log cursor from an earlier result; by default only this
+                call's entries are returned under 'log'
+            actions: Optional {party member index: action} for members
+                that should do something else
+
+        Returns:
+            Dictionary with combat results; 'log' holds the entries since
+            the cursor and 'cursor' the cursor to pass next time
+        """
+        if since is None:
+            since = self.combat_log.cursor
+        self.round += 1
+        if player_action is None:
+            player_action = {'type': 'attack'}
+        actions = actions or {}
+
+        status = self._status()
+        if status != 'ongoing':
+            return self._result(status, since)
+
+        log = [RoundStart(self.round)]
+        fled = self._play_round(player_action, target_index, actions, log)
+        self.combat_log.extend(log)
+        return self._result('fled' if fled else self._status(), since)
+
+    def simulate(self, max_rounds=1000):
+        """
+        Resolve the rest of the encounter with every member attacking,
+        without keeping a log.
+
+        Plays the same rounds, with the same dice in the same order, as
+        calling execute_round() with an attack each round.
+
+        Args:
+            max_rounds: Give up (status 'ongoing') after this many rounds
+
+        Returns:
+            CombatOutcome; character_hp is the party's total hit points
+        """
+        start_hp = sum(c.current_hp for c in self.characters)
+        dealt = self.damage_dealt
+        status = 'ongoing'
+        attack = {'type': 'attack'}
+        for _ in range(max_rounds):
+            self.round += 1
+            status = self._status()
+            if status != 'ongoing':
+                break
+            self._play_round(attack, 0, {}, [])
+            status = self._status()
+            if status != 'ongoing':
+                break
+
+        party_hp = sum(c.current_hp for c in self.characters)
+        return CombatOutcome(
+            status=status,
+            rounds=self.round,
+            character_hp=party_hp,
+            monsters_defeated=sum(1 for m in self.monsters if not m.is_alive()),
+            damage_dealt=self.damage_dealt - dealt,
+            damage_taken=start_hp - party_hp,
+        )
+
+    def _play_round(self, player_action, target_index, actions, log):
+        """
+        Everyone still up takes this round's turn.
+
+        Returns:
+            True if the party fled
+        """
+        # Everyone still up gets a turn in the first round
+        if not self._queue:
+            for order, character in enumerate(self.characters):
+                if character in self._party:
+                    self._schedule(character, True, order, self.round)
+            for order, monster in enumerate(self.monsters):
+                if monster in self._foes:
+                    self._schedule(monster, False, order, self.round)
+
+        leader = self.character
+        alive_monsters = [m for m in self.monsters if m.is_alive()]
+        target = alive_monsters[target_index] if target_index < len(alive_monsters) else None
+
+        queue = self._queue
+        while queue and queue[0][0] == self.round:
+            _, _, side, order, combatant = heapq.heappop(queue)
+            if combatant not in self._party and combatant not in self._foes:
+                continue  # Fallen: no more turns
+            if side == 0:
+                action = actions.get(self._member_index[id(combatant)])
+                if action is None:
+                    action = player_action if combatant is leader else {'type': 'attack'}
+                if self._member_turn(combatant, action, target, log):
+                    return True
+            else:
+                self._monster_turn(combatant, log)
+            self._schedule(combatant, side == 0, order, self.round + 1)
+            if not self._party or not self._foes:
+                break
+        return False
+
+    def _status(self):
+        """'defeat', 'victory' or 'ongoing'"""
+        if not self._party:
+            return 'defeat'
+        if not self._foes:
+            return 'victory'
+        return 'ongoing'
+
+    def _result(self, status, since):
+        """Result dictionary, as Combat.execute_round() returns"""
+        result = {
+            'status': status,
+            'log': self.combat_log.since(since),
+            'cursor': self.combat_log.cursor,
+            'party_hp': [f"{c.current_hp}/{c.max_hp}" for c in self.characters],
+        }
+        if status == 'defeat':
+            result['message'] = 'Your party has been defeated!'
+        elif status == 'victory':
+            result['message'] = 'All enemies defeated!'
+            result['rewards'] = collect_rewards(self.monsters)
+        elif status == 'fled':
+            result['message'] = 'You successfully fled from combat!'
+        else:
+            result['message'] = f'Round {self.round} complete.'
+            result['alive_monsters'] = [m for m in self.monsters if m.is_alive()]
+        return result
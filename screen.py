@@ -0,0 +1,84 @@
+"""
+Incremental terminal output
+
+ScreenBuffer remembers the last frame that was drawn and turns the next
+frame into the ANSI output needed to update only the lines that changed.
+Lines are compared as plain strings, so colored lines (which always end
+in the default color) diff just like monochrome ones.
+"""
+
+# ANSI control sequences
+CLEAR = '\x1b[2J'
+CLEAR_LINE = '\x1b[K'
+HOME = '\x1b[H'
+
+
+def move_to(row, column=1):
+    """Cursor movement to a 1-based row and column"""
+    return f'\x1b[{row};{column}H'
+
+
+def full_redraw(lines, newline='\r\n'):
+    """Output that clears the screen and draws a whole frame"""
+    return HOME + CLEAR + newline.join(lines) + newline
+
+
+class ScreenBuffer:
+    """
+    Tracks what is on screen and produces minimal line updates
+    """
+
+    def __init__(self, newline='\r\n'):
+        """
+        Initialize an empty screen.
+
+        Args:
+            newline: Line ending for full redraws ('\r\n' works in raw mode)
+        """
+        self.newline = newline
+        self.lines = None  # None forces a full redraw
+
+    def reset(self):
+        """Forget the screen contents (after something else drew on it)"""
+        self.lines = None
+
+    def keyframe(self, lines):
+        """
+        Get the output for a full redraw of a frame.
+
+        Args:
+            lines: Frame lines, without line endings
+
+        Returns:
+            ANSI string
+        """
+        self.lines = list(lines)
+        return full_redraw(self.lines, self.newline)
+
+    def diff(self, lines):
+        """
+        Get the output that turns the previous frame into this one.
+
+        Args:
+            lines: Frame lines, without line endings
+
+        Returns:
+            ANSI string; empty if nothing changed
+        """
+        if self.lines is None:
+            return self.keyframe(lines)
+
+        old = self.lines
+        out = []
+        for row, line in enumerate(lines):
+            if row >= len(old) or old[row] != line:
+                out.append(move_to(row + 1) + line + CLEAR_LINE)
+        for row in range(len(lines), len(old)):
+            out.append(move_to(row + 1) + CLEAR_LINE)
+
+        self.lines = list(lines)
+        if not out:
+            return ''
+        # Leave the cursor below the frame, as a full redraw would
+        out.append(move_to(len(lines) + 1))
+        return ''.join(out)
@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+"""
+Multi-session game server
+
+Hosts one GameState per TCP connection on a single asyncio event loop.
+Any telnet client can play (`telnet localhost 4000`): the server asks for
+character-at-a-time mode and the window size, parses each session's
+input with the same InputHandler.parse_keys() the terminal uses, and
+sends only the lines of the frame that changed. A session waiting for
+input is just a pending read, so idle players cost no CPU.
+
+Spectators connect to a second port and pick a session to watch. Each
+turn the session computes one frame diff for all of its spectators and
+only writes it to their sockets. A spectator whose socket buffer backs
+up stops receiving diffs and gets a single keyframe once it has caught
+up, so a slow watcher never makes the server buffer without limit.
+
+Run server_loadtest.py to exercise it locally.
+"""
+import codecs
+import asyncio
+import argparse
+import itertools
+from game_state import GameMode
+from input_handler import InputHandler
+from screen import ScreenBuffer, full_redraw
+from main import (create_game, handle_input, compose_frame,
+                  compose_end_screen, resolve_map_choice)
+
+
+# Telnet protocol bytes (RFC 854 and option RFCs)
+IAC = 255
+DONT = 254
+DO = 253
+WONT = 252
+WILL = 251
+SB = 250
+AYT = 246
+SE = 240
+OPT_ECHO = 1
+OPT_SGA = 3
+OPT_NAWS = 31
+
+# Sent on connect: we echo (so the client doesn't), no go-ahead, report window size
+TELNET_HELLO = bytes([IAC, WILL, OPT_ECHO, IAC, WILL, OPT_SGA, IAC, DO, OPT_NAWS])
+
+# Reply to "Are You There"; the load-test client uses it as a round-trip marker
+AYT_REPLY = b'[Yes]'
+
+READ_SIZE = 4096
+DEFAULT_WIDTH = 80
+MAX_WIDTH = 120
+
+# Spectator backpressure: stop sending diffs above HIGH_WATER bytes queued
+# on the socket, send a keyframe once it has drained below LOW_WATER
+SPECTATOR_WIDTH = DEFAULT_WIDTH
+HIGH_WATER = 64 * 1024
+LOW_WATER = 16 * 1024
+
+
+class TelnetParser:
+    """
+    Splits a telnet byte stream into data and protocol events
+
+    Commands can be cut anywhere by TCP, so parser state is kept between
+    feed() calls.
+    """
+
+    def __init__(self):
+        self._state = 'data'
+        self._sub = bytearray()
+
+    def feed(self, data):
+        """
+        Parse received bytes.
+
+        Args:
+            data: Bytes from the socket
+
+        Returns:
+            List of events in stream order: ('data', bytes), ('ayt',),
+            ('naws', width, height)
+        """
+        events = []
+        text = bytearray()
+        for byte in data:
+            state = self._state
+            if state == 'data':
+                if byte == IAC:
+                    self._state = 'iac'
+                else:
+                    text.append(byte)
+            elif state == 'iac':
+                if byte == IAC:
+                    text.append(IAC)  # Escaped 255
+                    self._state = 'data'
+                elif byte in (DO, DONT, WILL, WONT):
+                    self._state = 'option'
+                elif byte == SB:
+                    self._sub.clear()
+                    self._state = 'sb'
+                else:
+                    if byte == AYT:
+                        if text:
+                            events.append(('data', bytes(text)))
+                            text.clear()
+                        events.append(('ayt',))
+                    self._state = 'data'
+            elif state == 'option':
+                self._state = 'data'  # Option replies need no action
+            elif state == 'sb':
+                if byte == IAC:
+                    self._state = 'sb_iac'
+                else:
+                    self._sub.append(byte)
+            elif state == 'sb_iac':
+                if byte == SE:
+                    event = self._subnegotiation(bytes(self._sub))
+                    if event:
+                        if text:
+                            events.append(('data', bytes(text)))
+                            text.clear()
+                        events.append(event)
+                    self._state = 'data'
+                else:
+                    self._sub.append(byte)  # IAC IAC inside a subnegotiation
+                    self._state = 'sb'
+        if text:
+            events.append(('data', bytes(text)))
+        return events
+
+    @staticmethod
+    def _subnegotiation(payload):
+        """Turn a finished subnegotiation into an event (only NAWS is used)"""
+        if len(payload) == 5 and payload[0] == OPT_NAWS:
+            width = (payload[1] << 8) | payload[2]
+            height = (payload[3] << 8) | payload[4]
+            return ('naws', width, height)
+        return None
+
+
+class Spectator:
+    """
+    A connection watching someone else's session
+    """
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.needs_keyframe = True  # Not in sync with the shared diff stream
+        self.keyframes = 0          # Keyframes sent (first one plus resyncs)
+
+    def buffered(self):
+        """Bytes written but not yet accepted by the socket"""
+        return self.writer.transport.get_write_buffer_size()
+
+    def send(self, diff, keyframe):
+        """
+        Forward one turn to this spectator.
+
+        Args:
+            diff: The turn's shared diff bytes
+            keyframe: Callable returning the full frame bytes (built once per turn)
+        """
+        if self.writer.is_closing():
+            return
+        if self.needs_keyframe:
+            if self.buffered() <= LOW_WATER:
+                self.writer.write(keyframe())
+                self.keyframes += 1
+                self.needs_keyframe = False
+        elif self.buffered() > HIGH_WATER:
+            self.needs_keyframe = True  # Too far behind - drop to keyframes
+        elif diff:
+            self.writer.write(diff)
+
+
+class Session:
+    """
+    One connected player and their game
+    """
+
+    def __init__(self, session_id, reader, writer, map_file=None):
+        self.session_id = session_id
+        self.reader = reader
+        self.writer = writer
+        self.game = create_game(map_file)
+        self.screen = ScreenBuffer()
+        self.telnet = TelnetParser()
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+        self.pending = ''  # Partial escape sequence
+        self.width = DEFAULT_WIDTH
+        self.running = True
+        self.spectators = []
+        self.broadcast = ScreenBuffer()  # What in-sync spectators see
+
+    def apply(self, text):
+        """Parse decoded input and apply the keys to the game"""
+        keys, self.pending = InputHandler.parse_keys(self.pending + text)
+        self.apply_keys(keys)
+
+    def apply_keys(self, keys):
+        """Apply parsed keys to the game in order"""
+        for key in keys:
+            if not self.running:
+                break
+            self.running = handle_input(self.game, key, interactive=False)
+            if self.game.mode in (GameMode.GAME_OVER, GameMode.VICTORY):
+                self.running = False
+
+    def frame_output(self):
+        """Bytes that bring the client's screen up to date"""
+        lines = compose_frame(self.game, self.width)
+        if self.spectators:
+            self.broadcast_frame(lines if self.width == SPECTATOR_WIDTH else None)
+        return self.screen.diff(lines).encode('utf-8')
+
+    def broadcast_frame(self, lines=None):
+        """
+        Send this turn to every spectator.
+
+        The diff (and, if anyone needs one, the keyframe) is built once
+        and the same bytes are written to each spectator's socket.
+
+        Args:
+            lines: This turn's frame at SPECTATOR_WIDTH, if already composed
+        """
+        if lines is None:
+            lines = compose_frame(self.game, SPECTATOR_WIDTH)
+        diff = self.broadcast.diff(lines).encode('utf-8')
+
+        cached = []
+        def keyframe():
+            if not cached:
+                cached.append(full_redraw(lines).encode('utf-8'))
+            return cached[0]
+
+        for spectator in self.spectators:
+            spectator.send(diff, keyframe)
+
+    def attach(self, spectator):
+        """Start streaming this session to a spectator"""
+        self.spectators.append(spectator)
+        if self.broadcast.lines is None:
+            self.broadcast.diff(compose_frame(self.game, SPECTATOR_WIDTH))
+        spectator.send(b'', lambda: full_redraw(self.broadcast.lines).encode('utf-8'))
+
+    def detach(self, spectator):
+        """Stop streaming to a spectator"""
+        if spectator in self.spectators:
+            self.spectators.remove(spectator)
+        if not self.spectators:
+            self.broadcast.reset()  # Nobody is following the diff stream
+
+    def handle_events(self, events):
+        """
+        Apply one read's worth of telnet events.
+
+        Returns:
+            Bytes to send back
+        """
+        out = bytearray()
+        dirty = False
+        for event in events:
+            if event[0] == 'data':
+                self.apply(self.decoder.decode(event[1]))
+                dirty = True
+            elif event[0] == 'naws':
+                self.width = max(20, min(event[1] or DEFAULT_WIDTH, MAX_WIDTH))
+                self.screen.reset()
+                dirty = True
+            elif event[0] == 'ayt':
+                out += self.frame_output()
+                out += AYT_REPLY
+                dirty = False
+        if dirty:
+            out += self.frame_output()
+        return bytes(out)
+
+    async def read(self):
+        """Read from the client, giving a split escape sequence a moment to finish"""
+        if not self.pending:
+            return await self.reader.read(READ_SIZE)
+        try:
+            return await asyncio.wait_for(self.reader.read(READ_SIZE),
+                                          InputHandler.ESCAPE_TIMEOUT)
+        except asyncio.TimeoutError:
+            # Nothing followed: a lone ESC really was just ESC
+            keys, self.pending = list(self.pending), ''
+            self.apply_keys(keys)
+            return None
+
+    async def run(self):
+        """Serve this player until they quit, the game ends or they disconnect"""
+        self.writer.write(TELNET_HELLO)
+        self.writer.write(self.frame_output())
+        await self.writer.drain()
+
+        while self.running:
+            data = await self.read()
+            if data is None:
+                out = self.frame_output()
+            elif not data:
+                break  # Disconnected
+            else:
+                out = self.handle_events(self.telnet.feed(data))
+            if out:
+                self.writer.write(out)
+                await self.writer.drain()
+
+        ending = b''
+        if self.game.mode in (GameMode.GAME_OVER, GameMode.VICTORY):
+            ending = ('\r\n'.join(compose_end_screen(self.game)) + '\r\n').encode('utf-8')
+        self.writer.write(ending + b"Thanks for playing Dungeon Survival!\r\n")
+        for spectator in self.spectators:
+            if not spectator.writer.is_closing():
+                spectator.writer.write(ending + b"The session has ended.\r\n")
+                spectator.writer.close()
+        await self.writer.drain()
+
+
+class GameServer:
+    """
+    Accepts connections and runs a Session for each
+    """
+
+    def __init__(self, host='127.0.0.1', port=4000, map_file=None, max_sessions=10000,
+                 spectate_port=None):
+        self.host = host
+        self.port = port
+        self.spectate_port = spectate_port
+        self.map_file = map_file
+        self.max_sessions = max_sessions
+        self.sessions = {}
+        self._ids = itertools.count(1)
+        self._server = None
+        self._spectate_server = None
+
+    async def start(self):
+        """Start listening; returns the bound port (useful with port=0)"""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        if self.spectate_port is not None:
+            self._spectate_server = await asyncio.start_server(
+                self._handle_spectator, self.host, self.spectate_port)
+            self.spectate_port = self._spectate_server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def serve_forever(self):
+        """Start (if needed) and serve until cancelled"""
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        """Stop accepting connections"""
+        for server in (self._server, self._spectate_server):
+            if server is not None:
+                server.close()
+                await server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        """Connection callback"""
+        if len(self.sessions) >= self.max_sessions:
+            writer.write(b"Server full, try again later.\r\n")
+            await writer.drain()
+            writer.close()
+            return
+
+        session_id = next(self._ids)
+        try:
+            session = Session(session_id, reader, writer, self.map_file)
+            self.sessions[session_id] = session
+            await session.run()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass  # Client went away
+        finally:
+            self.sessions.pop(session_id, None)
+            writer.close()
+
+    async def _handle_spectator(self, reader, writer):
+        """Spectator connection callback: pick a session, then watch it"""
+        session = None
+        spectator = Spectator(reader, writer)
+        try:
+            ids = ' '.join(str(i) for i in self.sessions) or '(none)'
+            writer.write(f"Sessions: {ids}\r\nWatch session: ".encode('utf-8'))
+            await writer.drain()
+            choice = (await reader.readline()).strip()
+            session = self.sessions.get(int(choice)) if choice.isdigit() else None
+            if session is None:
+                writer.write(b"No such session.\r\n")
+                await writer.drain()
+                return
+
+            session.attach(spectator)
+            # Input from spectators is ignored; wait until they leave
+            while await reader.read(READ_SIZE):
+                pass
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            if session is not None:
+                session.detach(spectator)
+            writer.close()
+
+
+def main(argv=None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="DungeonSurvival multi-session server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=4000)
+    parser.add_argument('--map', default='random',
+                        help="'random', a map number, or a file in maps/")
+    parser.add_argument('--max-sessions', type=int, default=10000)
+    parser.add_argument('--spectate-port', type=int, default=None,
+                        help="Port for spectators (disabled if not given)")
+    args = parser.parse_args(argv)
+    try:
+        map_file = resolve_map_choice(args.map)
+    except ValueError as error:
+        parser.error(str(error))
+
+    server = GameServer(args.host, args.port, map_file, args.max_sessions, args.spectate_port)
+    print(f"Dungeon Survival server on {args.host}:{args.port}")
+    if args.spectate_port is not None:
+        print(f"Spectators on {args.host}:{args.spectate_port}")
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("Server stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Load-test client for server.py
+
+Opens many connections to a game server, keeps some of them idle and has
+the rest play random movement keys. After each batch of keys the client
+sends telnet "Are You There" and waits for the server's reply, which
+gives a round-trip latency per batch. With --spawn the server is started
+in-process on a free port, so no outside service is needed:
+
+    python server_loadtest.py --spawn --players 200 --idle 2000
+
+--spectators attaches watchers to the players' sessions (round robin);
+--slow-spectators of them read slowly, to exercise backpressure.
+"""
+import time
+import random
+import asyncio
+import argparse
+from server import GameServer, IAC, AYT, AYT_REPLY
+
+
+MOVE_KEYS = 'wasd'
+
+
+async def player(host, port, batches, batch_size, latencies, seed, connected, go):
+    """Connect, wait for go, then play random moves in batches and record round-trip times"""
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    connected.append(writer)
+    try:
+        await go.wait()
+        for _ in range(batches):
+            keys = ''.join(rng.choice(MOVE_KEYS) for _ in range(batch_size))
+            start = time.perf_counter()
+            writer.write(keys.encode('ascii') + bytes([IAC, AYT]))
+            await writer.drain()
+            try:
+                await reader.readuntil(AYT_REPLY)
+            except asyncio.IncompleteReadError:
+                return  # Game over - the server closed the session
+            latencies.append(time.perf_counter() - start)
+        writer.write(b'q')
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+async def idler(host, port, connected, release):
+    """Connect and do nothing until released"""
+    reader, writer = await asyncio.open_connection(host, port)
+    connected.append(writer)
+    try:
+        await release.wait()
+    finally:
+        writer.close()
+
+
+async def read_session_ids(reader):
+    """Read the spectator prompt and return the session ids it offers"""
+    prompt = await reader.readuntil(b'Watch session: ')
+    return [int(i) for i in prompt.split(b'\r\n')[0].split()[1:] if i.isdigit()]
+
+
+async def list_sessions(host, port):
+    """Session ids currently on the server (asked through the spectator port)"""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        return set(await read_session_ids(reader))
+    finally:
+        writer.write(b'\r\n')
+        writer.close()
+
+
+async def spectator(host, port, index, slow, received, exclude, attached):
+    """Watch a session not in exclude, counting the bytes received until it ends"""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        ids = sorted(set(await read_session_ids(reader)) - exclude)
+        if not ids:
+            return
+        writer.write(str(ids[index % len(ids)]).encode('ascii') + b'\r\n')
+        await writer.drain()
+        # Attaching sends a full redraw first
+        total = len(await reader.read(1024 if slow else 65536))
+        attached.append(writer)
+        while data := await reader.read(1024 if slow else 65536):
+            total += len(data)
+            if slow:
+                await asyncio.sleep(0.05)  # Let the server's buffer back up
+        received.append(total)
+    finally:
+        writer.close()
+
+
+async def wait_for_connections(connected, count, tasks):
+    """
+    Wait until count of the tasks have connected.
+
+    Raises:
+        The first task's exception if one fails (e.g. connection refused),
+        RuntimeError if they all end without connecting
+    """
+    while len(connected) < count:
+        for task in tasks:
+            if task.done() and not task.cancelled() and task.exception() is not None:
+                raise task.exception()
+        if all(task.done() for task in tasks):
+            raise RuntimeError(f"Only {len(connected)} of {count} connections were made")
+        await asyncio.sleep(0.05)
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a sorted list"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+async def run(args):
+    """Run the load test and print a report"""
+    server = None
+    host, port = args.host, args.port
+    spectate_port = args.spectate_port
+    if args.spawn:
+        server = GameServer(host, 0, spectate_port=0 if args.spectators else None)
+        port = await server.start()
+        spectate_port = server.spectate_port
+
+    release = asyncio.Event()
+    go = asyncio.Event()
+    tasks = []
+    try:
+        connected = []
+        idle_tasks = [asyncio.create_task(idler(host, port, connected, release))
+                      for _ in range(args.idle)]
+        tasks += idle_tasks
+        await wait_for_connections(connected, args.idle, idle_tasks)
+        if args.idle:
+            print(f"{args.idle} idle sessions connected")
+
+        # Sessions that are not players' (the idle ones), for the spectators to skip
+        others = await list_sessions(host, spectate_port) if args.spectators else set()
+
+        latencies = []
+        received = []
+        playing = []
+        players = [asyncio.create_task(player(host, port, args.batches, args.batch_size,
+                                              latencies, seed, playing, go))
+                   for seed in range(args.players)]
+        tasks += players
+        await wait_for_connections(playing, args.players, players)
+
+        # Watchers attach before the players make their first move
+        attached = []
+        watchers = [asyncio.create_task(spectator(host, spectate_port, i,
+                                                  i < args.slow_spectators,
+                                                  received, others, attached))
+                    for i in range(args.spectators)]
+        tasks += watchers
+        while len(attached) < args.spectators and not all(w.done() for w in watchers):
+            await asyncio.sleep(0.05)
+
+        start = time.perf_counter()
+        go.set()
+        await asyncio.gather(*players)
+        elapsed = time.perf_counter() - start
+
+        release.set()
+        await asyncio.gather(*watchers, return_exceptions=True)
+        await asyncio.gather(*idle_tasks, return_exceptions=True)
+    finally:
+        # On failure, don't leave connections behind
+        release.set()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if server is not None:
+            await server.close()
+
+    latencies.sort()
+    keys = args.players * args.batches * args.batch_size
+    print(f"Players:        {args.players} (+{args.idle} idle)")
+    print(f"Keys sent:      {keys} in {elapsed:.2f}s ({keys / elapsed:.0f} keys/s)")
+    print(f"Batch RTT p50:  {percentile(latencies, 0.50) * 1000:.2f} ms")
+    print(f"Batch RTT p95:  {percentile(latencies, 0.95) * 1000:.2f} ms")
+    print(f"Batch RTT p99:  {percentile(latencies, 0.99) * 1000:.2f} ms")
+    if args.spectators:
+        average = sum(received) / len(received) if received else 0
+        print(f"Spectators:     {args.spectators} ({args.slow_spectators} slow), "
+              f"{average:.0f} bytes each on average")
+
+
+def main(argv=None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Load-test the DungeonSurvival server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=4000)
+    parser.add_argument('--spawn', action='store_true',
+                        help="Start a server in-process on a free port")
+    parser.add_argument('--players', type=int, default=50)
+    parser.add_argument('--idle', type=int, default=0,
+                        help="Extra connections that never send anything")
+    parser.add_argument('--batches', type=int, default=20)
+    parser.add_argument('--batch-size', type=int, default=5)
+    parser.add_argument('--spectators', type=int, default=0,
+                        help="Watchers attached to the players' sessions")
+    parser.add_argument('--slow-spectators', type=int, default=0,
+                        help="How many of the watchers read slowly")
+    parser.add_argument('--spectate-port', type=int, default=4001,
+                        help="Server's spectator port (ignored with --spawn)")
+    args = parser.parse_args(argv)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
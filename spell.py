@@ -2,6 +2,7 @@
 Spell system based on OGL D20 rules
 """
 import dice
+from combat_events import SpellCast
 
 
 class Spell:
@@ -26,9 +27,14 @@ class Spell:
             target: Target of the spell (can be caster, enemy, or None)
             
         Returns:
-            Result description
+            SpellCast event describing the result
         """
-        return f"{caster.name} casts {self.name}!"
+        return self._event(caster, target, "{caster} casts {spell}!")
+        
+    def _event(self, caster, target, text, **values):
+        """Event for this spell (text is a template, see combat_events.SpellCast)"""
+        return SpellCast(caster.name, self.name, target.name if target is not None else None,
+                         text, values)
         
     def __str__(self):
         level_str = "Cantrip" if self.level == 0 else f"Level {self.level}"
@@ -49,7 +55,7 @@ class MagicMissile(Spell):
         
     def cast(self, caster, target=None):
         if target is None:
-            return "No target selected for Magic Missile"
+            return self._event(caster, target, "No target selected for {spell}")
             
         missiles = 3
         total_damage = 0
@@ -58,7 +64,8 @@ class MagicMissile(Spell):
             total_damage += damage
             
         target.take_damage(total_damage)
-        return f"{self.name} hits {target.name} for {total_damage} force damage!"
+        return self._event(caster, target, "{spell} hits {target} for {damage} force damage!",
+                           damage=total_damage)
 
 
 class Fireball(Spell):
@@ -75,7 +82,7 @@ class Fireball(Spell):
         
     def cast(self, caster, target=None):
         if target is None:
-            return "No target selected for Fireball"
+            return self._event(caster, target, "No target selected for {spell}")
             
         damage = dice.d6(8)
         
@@ -85,12 +92,12 @@ class Fireball(Spell):
         
         if save_roll >= save_dc:
             damage = damage // 2
-            result = f"{target.name} saves! Takes {damage} fire damage (halved)."
+            text = "{spell} engulfs the area! {target} saves! Takes {damage} fire damage (halved)."
         else:
-            result = f"{target.name} fails save! Takes {damage} fire damage!"
+            text = "{spell} engulfs the area! {target} fails save! Takes {damage} fire damage!"
             
         target.take_damage(damage)
-        return f"{self.name} engulfs the area! {result}"
+        return self._event(caster, target, text, damage=damage)
 
 
 class CureWounds(Spell):
@@ -114,7 +121,8 @@ class CureWounds(Spell):
         healing = dice.d8(1, wis_mod)
         target.heal(healing)
         
-        return f"{self.name} heals {target.name} for {healing} HP! ({target.current_hp}/{target.max_hp})"
+        return self._event(caster, target, "{spell} heals {target} for {healing} HP! ({hp}/{max_hp})",
+                           healing=healing, hp=target.current_hp, max_hp=target.max_hp)
 
 
 class Shield(Spell):
@@ -136,7 +144,8 @@ class Shield(Spell):
             
         # Temporarily increase AC
         target.armor_class += 4
-        return f"A shimmering shield surrounds {target.name}! AC increased to {target.armor_class}."
+        return self._event(caster, target, "A shimmering shield surrounds {target}! AC increased to {ac}.",
+                           ac=target.armor_class)
 
 
 class BurningHands(Spell):
@@ -153,7 +162,7 @@ class BurningHands(Spell):
         
     def cast(self, caster, target=None):
         if target is None:
-            return "No target selected for Burning Hands"
+            return self._event(caster, target, "No target selected for {spell}")
             
         damage = dice.d4(3)
         
@@ -162,12 +171,12 @@ class BurningHands(Spell):
         
         if save_roll >= save_dc:
             damage = damage // 2
-            result = f"{target.name} partially dodges! Takes {damage} fire damage (halved)."
+            text = "Flames shoot from {caster}'s hands! {target} partially dodges! Takes {damage} fire damage (halved)."
         else:
-            result = f"{target.name} is engulfed! Takes {damage} fire damage!"
+            text = "Flames shoot from {caster}'s hands! {target} is engulfed! Takes {damage} fire damage!"
             
         target.take_damage(damage)
-        return f"Flames shoot from {caster.name}'s hands! {result}"
+        return self._event(caster, target, text, damage=damage)
 
 
 class LightningBolt(Spell):
@@ -184,7 +193,7 @@ class LightningBolt(Spell):
         
     def cast(self, caster, target=None):
         if target is None:
-            return "No target selected for Lightning Bolt"
+            return self._event(caster, target, "No target selected for {spell}")
             
         damage = dice.d6(8)
         
@@ -193,12 +202,12 @@ class LightningBolt(Spell):
         
         if save_roll >= save_dc:
             damage = damage // 2
-            result = f"{target.name} partially evades! Takes {damage} electricity damage (halved)."
+            text = "A bolt of lightning streaks forth! {target} partially evades! Takes {damage} electricity damage (halved)."
         else:
-            result = f"{target.name} is struck! Takes {damage} electricity damage!"
+            text = "A bolt of lightning streaks forth! {target} is struck! Takes {damage} electricity damage!"
             
         target.take_damage(damage)
-        return f"A bolt of lightning streaks forth! {result}"
+        return self._event(caster, target, text, damage=damage)
 
 
 class Bless(Spell):
@@ -219,7 +228,7 @@ class Bless(Spell):
             
         # Simple implementation: temporary BAB boost
         target.base_attack_bonus += 1
-        return f"{target.name} is blessed! Attack bonus increased."
+        return self._event(caster, target, "{target} is blessed! Attack bonus increased.")
 
 
 class DetectMagic(Spell):
@@ -236,7 +245,7 @@ class DetectMagic(Spell):
         )
         
     def cast(self, caster, target=None):
-        return f"{caster.name} senses magical auras in the area..."
+        return self._event(caster, target, "{caster} senses magical auras in the area...")
 
 
 class RayOfFrost(Spell):
@@ -253,7 +262,7 @@ class RayOfFrost(Spell):
         
     def cast(self, caster, target=None):
         if target is None:
-            return "No target selected for Ray of Frost"
+            return self._event(caster, target, "No target selected for {spell}")
             
         # Make a ranged touch attack
         int_mod = caster.get_ability_modifier('intelligence')
@@ -262,9 +271,10 @@ class RayOfFrost(Spell):
         if attack_roll >= target.armor_class:
             damage = dice.d8()
             target.take_damage(damage)
-            return f"A ray of frost strikes {target.name} for {damage} cold damage!"
+            return self._event(caster, target, "A ray of frost strikes {target} for {damage} cold damage!",
+                               damage=damage)
         else:
-            return f"The ray of frost misses {target.name}!"
+            return self._event(caster, target, "The ray of frost misses {target}!")
 
 
 # Spell library - available spells
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test script for the Monte Carlo balance tool
+"""
+import io
+import csv
+import json
+import config
+from balance import (LEVEL, Scenario, wilson_interval, build_scenarios, run_sweep,
+                     write_results, parse_numbers)
+
+
+def test_wilson_interval():
+    """Known values, and sensible edges"""
+    low, high = wilson_interval(50, 100)
+    assert abs(low - 0.4038) < 1e-3 and abs(high - 0.5962) < 1e-3
+    low, high = wilson_interval(0, 20)
+    assert low < 1e-9 and 0.15 < high < 0.17
+    low, high = wilson_interval(20, 20)
+    assert high > 1 - 1e-9 and 0.83 < low < 0.85
+    assert wilson_interval(0, 0) == (0.0, 1.0)
+    # More confidence, wider interval
+    assert wilson_interval(50, 100, 0.99)[0] < wilson_interval(50, 100, 0.9)[0]
+
+
+def test_scenarios():
+    """Every roster monster plus a whole-level row, per party and level"""
+    scenarios = build_scenarios([1, 3], [[0, 1, 2], [2]], [1], group=2)
+    assert len(scenarios) == 2 * (5 + 1) + 2 * (7 + 1)
+    levels = [s for s in scenarios if s.opponent == LEVEL]
+    assert [(s.dungeon_level, s.monsters) for s in levels[::2]] == \
+        [(1, config.get_monster_count(1)), (3, config.get_monster_count(3))]
+    assert all(s.monsters == 2 for s in scenarios if s.opponent != LEVEL)
+    assert {s.members for s in scenarios} == {(0, 1, 2), (2,)}
+    assert parse_numbers('1-3,5') == [1, 2, 3, 5]
+
+
+def test_sweep_is_reproducible():
+    """Results depend on the seed, not on how the work is split"""
+    scenarios = [Scenario(1, (0,), 1, 'Orc', 1), Scenario(3, (1,), 2, LEVEL, 4)]
+    here = run_sweep(scenarios, 300, seed=5, workers=0, chunk_size=100)
+    pooled = run_sweep(scenarios, 300, seed=5, workers=2, chunk_size=100)
+    assert here == pooled
+    assert here != run_sweep(scenarios, 300, seed=6, workers=0, chunk_size=100)
+    for row in here:
+        assert row['fights'] == 300 and 0 <= row['wins'] <= 300
+        assert row['ci_low'] <= row['win_rate'] <= row['ci_high']
+    # A fighter beats a lone orc far more often than a wizard clears a level
+    assert here[0]['win_rate'] > here[1]['win_rate']
+    assert here[1]['classes'] == 'Wizard' and here[1]['character_level'] == 2
+
+
+def test_parties_fight_together():
+    """A composition is one row, fought by the whole party"""
+    scenarios = [Scenario(1, (1,), 1, 'Orc', 2), Scenario(1, (0, 1, 2), 1, 'Orc', 2)]
+    alone, together = run_sweep(scenarios, 400, seed=1, workers=0)
+    assert together['party'] == 'Warrior+Mage+Healer'
+    assert together['classes'] == 'Fighter+Wizard+Cleric'
+    assert together['win_rate'] > alone['win_rate']
+
+
+def test_output_formats():
+    """CSV has a header row, JSON carries the settings"""
+    rows = run_sweep([Scenario(1, (2,), 1, 'Kobold', 2)], 50, workers=0)
+    output = io.StringIO()
+    write_results(rows, output, 'csv', {})
+    parsed = list(csv.DictReader(io.StringIO(output.getvalue())))
+    assert parsed[0]['opponent'] == 'Kobold' and parsed[0]['wins'] == str(rows[0]['wins'])
+    output = io.StringIO()
+    write_results(rows, output, 'json', {'seed': 0})
+    assert json.loads(output.getvalue()) == {'settings': {'seed': 0}, 'results': rows}
+
+
+if __name__ == "__main__":
+    test_wilson_interval()
+    test_scenarios()
+    test_sweep_is_reproducible()
+    test_parties_fight_together()
+    test_output_formats()
+    print("All balance tests passed!")
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test script for the vectorized batch combat engine (needs NumPy)
+"""
+import dice
+from main import create_default_party
+from combat_sim import run_matchup, find_monster
+
+if dice.numpy is not None:
+    from batch_combat import BatchCombat, VICTORY, DEFEAT
+
+FIGHTS = 20000
+
+
+def summary(character, specs):
+    """Win rate, mean rounds and mean damage taken from both engines"""
+    outcomes, _ = run_matchup(character, specs, FIGHTS, seed=1)
+    scalar = (sum(o.status == 'victory' for o in outcomes) / FIGHTS,
+              sum(o.rounds for o in outcomes) / FIGHTS,
+              sum(o.damage_taken for o in outcomes) / FIGHTS)
+    batch = BatchCombat(character, specs, FIGHTS, rng=1).run()
+    vectorized = ((batch.status == VICTORY).mean(), batch.rounds.mean(),
+                  batch.damage_taken.mean())
+    return scalar, vectorized
+
+
+def test_matches_scalar_engine():
+    """Same outcome statistics as Combat.simulate()"""
+    if dice.numpy is None:
+        return
+    character = create_default_party().members[0]
+    matchups = [
+        [find_monster('Orc')],
+        [find_monster('Goblin'), find_monster('Goblin'), find_monster('Kobold')],
+    ]
+    for specs in matchups:
+        scalar, vectorized = summary(character, specs)
+        assert abs(scalar[0] - vectorized[0]) < 0.02, (specs, scalar, vectorized)
+        assert abs(scalar[1] - vectorized[1]) < 0.05 * scalar[1], (specs, scalar, vectorized)
+        assert abs(scalar[2] - vectorized[2]) < 0.05 * scalar[2], (specs, scalar, vectorized)
+
+
+def test_outcome_arrays():
+    """Every copy is decided and its record adds up"""
+    if dice.numpy is None:
+        return
+    character = create_default_party().members[1]
+    specs = [find_monster('Orc'), find_monster('Goblin')]
+    outcome = BatchCombat(character, specs, 5000, rng=7).run()
+    assert set(outcome.status.tolist()) <= {VICTORY, DEFEAT}
+    assert ((outcome.character_hp > 0) == (outcome.status == VICTORY)).all()
+    assert (outcome.damage_taken == character.max_hp - outcome.character_hp).all()
+    assert (outcome.monsters_defeated[outcome.status == VICTORY] == 2).all()
+    assert (outcome.rounds >= 1).all()
+    assert character.current_hp == character.max_hp  # Not modified
+
+    again = BatchCombat(character, specs, 5000, rng=7).run()
+    assert (again.rounds == outcome.rounds).all() and (again.status == outcome.status).all()
+
+
+if __name__ == "__main__":
+    if dice.numpy is None:
+        print("NumPy not installed, skipping batch combat tests")
+    else:
+        test_matches_scalar_engine()
+        test_outcome_arrays()
+        print("All batch combat tests passed!")
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Test script for headless combat simulation
+"""
+import random
+import dice
+import config
+from combat import Combat, CombatLog
+from combat_events import Attack, Hit, Miss, Damage, Death, SpellCast, RoundStart, render
+from spell import MagicMissile, RayOfFrost
+from monster import Monster
+from main import create_default_party
+from combat_sim import run_matchup, find_monster
+
+ORC = ("Orc", "2d8", 13, 2, "1d8+1")
+GOBLIN = ("Goblin", "1d8", 12, 1, "1d6")
+
+
+class FixedDice:
+    """Every die shows the same face (clamped to the die)"""
+
+    def __init__(self, face):
+        self.face = face
+
+    def randint(self, low, high):
+        return min(max(self.face, low), high)
+
+
+def fight(seed, member, specs, simulate, persistent=False):
+    with dice.using_rng(random.Random(seed)):
+        character = create_default_party().members[member]
+        monsters = [Monster(*spec) for spec in specs]
+        combat = Combat(character, monsters, persistent_initiative=persistent)
+        if simulate:
+            status = combat.simulate().status
+        else:
+            while True:
+                status = combat.execute_round({'type': 'attack'}, 0)['status']
+                if status != 'ongoing':
+                    break
+    return status, combat.round, character.current_hp, [m.current_hp for m in monsters]
+
+
+def test_simulate_matches_execute_round():
+    """Same dice, same fight: simulate() is execute_round() without the text"""
+    for seed in range(300):
+        specs = [ORC, GOBLIN, GOBLIN][:1 + seed % 3]
+        member = seed % 3
+        assert fight(seed, member, specs, True) == fight(seed, member, specs, False)
+        assert fight(seed, member, specs, True, True) == fight(seed, member, specs, False, True)
+
+
+def test_initiative_order():
+    """Combatants are ordered directly; ties keep the order they joined in"""
+    character = create_default_party().members[0]  # Dexterity modifier 0
+    monsters = [Monster(*GOBLIN), Monster(*GOBLIN), Monster(*ORC)]
+    with dice.using_rng(FixedDice(10)):
+        order = Combat(character, monsters).roll_initiative()
+    assert [c for c, _, _ in order] == [character] + monsters
+    assert [p for _, _, p in order] == [True, False, False, False]
+
+    with dice.using_rng(random.Random(3)):
+        combat = Combat(character, monsters, persistent_initiative=True)
+        first = combat.initiative_order()
+        for _ in range(3):
+            combat.execute_round({'type': 'item', 'item_name': 'nothing'})
+            assert combat.initiative is first
+        rolling = Combat(character, monsters)
+        assert rolling.initiative_order() is not rolling.initiative_order()
+
+
+def test_every_monster_acts():
+    """Monsters sharing a name each take their own turn"""
+    with dice.using_rng(random.Random(8)):
+        character = create_default_party().members[0]
+        character.current_hp = character.max_hp = 1000
+        goblins = [Monster(*GOBLIN) for _ in range(3)]
+        turns = []
+        for goblin in goblins:
+            goblin.current_hp = 1000
+            goblin.attack = lambda target, goblin=goblin, attack=goblin.attack: (
+                turns.append(goblin) or attack(target))
+        combat = Combat(character, goblins)
+        combat.execute_round({'type': 'attack'})
+        assert sorted(map(id, turns)) == sorted(map(id, goblins))
+
+        # A fallen monster loses its turn
+        goblins[1].current_hp = 0
+        turns.clear()
+        combat.execute_round({'type': 'attack'})
+        assert goblins[1] not in turns and len(turns) == 2
+
+
+def test_combat_log_cursors():
+    """The log keeps the newest entries and hands out what came after a cursor"""
+    log = CombatLog(capacity=5)
+    assert log.cursor == 0 and log.since(0) == []
+    log.extend(f"entry {i}" for i in range(3))
+    cursor = log.cursor
+    log.extend(f"entry {i}" for i in range(3, 8))
+    assert len(log) == 5 and log.first == 3 and log.cursor == 8
+    assert log.since(cursor) == [f"entry {i}" for i in range(3, 8)]
+    assert log.since(0) == list(log)  # Dropped entries are gone
+    assert log.since(6) == ["entry 6", "entry 7"]
+    assert log.since(log.cursor) == []
+
+
+def test_round_log_since_cursor():
+    """Rounds return their own entries, or everything since a cursor"""
+    with dice.using_rng(random.Random(2)):
+        character = create_default_party().members[0]
+        character.current_hp = character.max_hp = 10 ** 6
+        monster = Monster(*ORC)
+        monster.current_hp = monster.max_hp = 10 ** 6
+        combat = Combat(character, [monster])
+        first = combat.execute_round({'type': 'attack'})
+        assert str(first['log'][0]).endswith("Round 1 ---") and first['cursor'] == len(first['log'])
+        second = combat.execute_round({'type': 'attack'})
+        assert str(second['log'][0]).endswith("Round 2 ---")
+        both = combat.execute_round({'type': 'attack'}, since=first['cursor'])
+        assert both['log'] == second['log'] + combat.combat_log.since(second['cursor'])
+
+        # A long fight keeps a bounded log
+        for _ in range(2000):
+            result = combat.execute_round({'type': 'attack'})
+        assert len(combat.combat_log) == config.COMBAT_LOG_CAPACITY
+        assert str(result['log'][0]).endswith(f"Round {combat.round} ---")
+
+
+def test_combat_events():
+    """Rounds log typed events that render to text on demand"""
+    with dice.using_rng(random.Random(11)):
+        character = create_default_party().members[0]
+        monster = Monster(*GOBLIN)
+        combat = Combat(character, [monster])
+        events = []
+        while True:
+            result = combat.execute_round({'type': 'attack'})
+            events.extend(result['log'])
+            if result['status'] != 'ongoing':
+                break
+    kinds = {event.kind for event in events}
+    assert {'round', 'attack'} <= kinds and kinds & {'hit', 'miss'}
+    assert isinstance(events[0], RoundStart)
+    if not monster.is_alive():
+        assert Death(monster.name) in events
+    for event in events:
+        if isinstance(event, Damage) and event.target == monster.name:
+            assert event.hp <= monster.max_hp
+
+    assert Attack("Warrior", 17, 13, "Longsword").render() == \
+        "[Warrior] Attack roll: 17 vs AC 13 (weapon: Longsword)"
+    assert str(Attack("Orc", 9, 16, None)) == "[Orc] Attack roll: 9 vs AC 16"
+    assert render([Hit("Orc", "Warrior", 5), Miss("Orc", "Warrior")]) == \
+        ["  -> HIT! Orc hits Warrior for 5 damage!", "  -> MISS! Orc misses Warrior!"]
+    assert str(Damage("Orc", 4, 2, 6)) == "  -> Orc takes 4 damage! (HP: 2/6)"
+
+
+def test_spell_events():
+    """Spells return events holding the rolled numbers"""
+    with dice.using_rng(random.Random(5)):
+        wizard = create_default_party().members[1]
+        monster = Monster(*ORC)
+        monster.current_hp = monster.max_hp = 100
+        event = MagicMissile().cast(wizard, monster)
+        assert isinstance(event, SpellCast) and event.kind == 'spell'
+        assert event.values['damage'] == 100 - monster.current_hp
+        assert str(event) == f"Magic Missile hits Orc for {event.values['damage']} force damage!"
+        assert str(RayOfFrost().cast(wizard)) == "No target selected for Ray of Frost"
+
+
+def test_outcome_records():
+    """Outcomes are compact records that add up"""
+    character = create_default_party().members[0]
+    outcomes, elapsed = run_matchup(character, [find_monster('orc')], 200, seed=4)
+    assert len(outcomes) == 200 and elapsed > 0
+    for outcome in outcomes:
+        assert outcome.status in ('victory', 'defeat')
+        assert outcome.damage_taken == character.max_hp - outcome.character_hp
+        # A fallen character still strikes in its turn, so a defeat can
+        # take the monster down too
+        assert outcome.monsters_defeated == 1 or outcome.status == 'defeat'
+        assert (outcome.character_hp > 0) == (outcome.status == 'victory')
+    again, _ = run_matchup(character, [find_monster('Orc')], 200, seed=4)
+    assert again == outcomes
+
+
+if __name__ == "__main__":
+    test_simulate_matches_execute_round()
+    test_initiative_order()
+    test_every_monster_acts()
+    test_combat_log_cursors()
+    test_round_log_since_cursor()
+    test_combat_events()
+    test_spell_events()
+    test_outcome_records()
+    print("All combat tests passed!")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test script for the asynchronous combat debug log
+"""
+import os
+import tempfile
+import threading
+from combat import CombatLog
+from combat_events import Hit, Damage
+from combat_logger import CombatLogger
+
+
+def test_only_new_entries_are_written():
+    """Each entry of a combat log is written exactly once"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'combat.log')
+        logger = CombatLogger(path, enabled=True)
+        combat = object()
+        log = CombatLog()
+        for round_num in range(1, 6):
+            cursor = log.cursor
+            log.append(f"--- Round {round_num} ---")
+            log.append(f"hit {round_num}")
+            logger.log_entries(combat, log.since(cursor))
+        logger.close()
+
+        with open(path) as f:
+            lines = [line for line in f.read().splitlines() if line]
+        print(f"Wrote {len(lines)} lines")
+        assert lines.count("[1] hit 3") == 1
+        assert len(lines) == 1 + len(log)  # Header plus each entry once
+
+
+def test_events_are_rendered():
+    """Combat events reach the file as their text"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'combat.log')
+        logger = CombatLogger(path, enabled=True)
+        logger.log_entries(object(), [Hit("Orc", "Warrior", 5), Damage("Warrior", 5, 7, 12)])
+        logger.close()
+        with open(path) as f:
+            text = f.read()
+        assert "Orc hits Warrior for 5 damage!" in text
+        assert "Warrior takes 5 damage! (HP: 7/12)" in text
+
+
+def test_fights_are_told_apart():
+    """Fights logged side by side, from several threads, keep their own numbers"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'combat.log')
+        logger = CombatLogger(path, enabled=True)
+        fights = [object() for _ in range(4)]
+        barrier = threading.Barrier(len(fights))
+
+        def fight(index):
+            barrier.wait()
+            for round_num in range(50):
+                logger.log_entries(fights[index], [f"fight {index} round {round_num}"])
+
+        threads = [threading.Thread(target=fight, args=(i,)) for i in range(len(fights))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        logger.close()
+
+        with open(path) as f:
+            lines = [line for line in f.read().splitlines() if line]
+        headers = [line for line in lines if line.startswith("=== COMBAT LOG")]
+        assert len(headers) == len(fights)  # One header per fight, however they interleave
+
+        numbers = {}
+        for line in lines:
+            if line.startswith("["):
+                tag, text = line.split("] ", 1)
+                index = int(text.split()[1])
+                assert numbers.setdefault(index, tag) == tag
+        assert len(set(numbers.values())) == len(fights)
+
+
+def test_rotation_and_disabled():
+    """The file rotates at the size limit; a disabled logger writes nothing"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'combat.log')
+        logger = CombatLogger(path, enabled=True, max_bytes=200, backup_count=2)
+        logger.log_entries(object(), ["x" * 50 for _ in range(20)])
+        logger.close()
+        assert os.path.exists(path + '.1')
+
+        quiet_path = os.path.join(tmp, 'quiet.log')
+        quiet = CombatLogger(quiet_path, enabled=False)
+        quiet.log_entries(object(), ["entry"])
+        quiet.close()
+        assert not os.path.exists(quiet_path)
+
+
+if __name__ == "__main__":
+    test_only_new_entries_are_written()
+    test_events_are_rendered()
+    test_fights_are_told_apart()
+    test_rotation_and_disabled()
+    print("All combat logger tests passed!")
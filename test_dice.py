@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test script for compiled dice expressions
+"""
+import random
+import dice
+from monster import Monster
+
+
+def test_compile_parses_expressions():
+    """Modifiers, negative terms and several dice groups are understood"""
+    expr = dice.compile("2d6+1d4+3")
+    assert expr.dice == ((2, 6), (1, 4)) and expr.modifier == 3
+    assert (expr.min, expr.max, expr.mean) == (6, 19, 12.5)
+
+    expr = dice.compile("1d6-1")
+    assert (expr.min, expr.max, expr.mean) == (0, 5, 2.5)
+    assert str(dice.compile(" 4D8 + 8 ")) == "4d8+8"
+    assert dice.compile("5").roll() == 5
+
+    for bad in ("", "2d", "1d6+", "1d0", "fire"):
+        try:
+            dice.compile(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"{bad!r} should not compile")
+
+
+def test_compiled_expressions_are_shared():
+    """Parsing happens once per distinct string"""
+    assert dice.compile("2d8+7") is dice.compile("2d8+7")
+    expr = dice.compile("2d8+7")
+    assert dice.compile(expr) is expr
+    assert Monster("Ogre", damage="2d8+7").damage_dice is expr
+
+
+def test_rolls_stay_in_range():
+    """Every roll lies between min and max"""
+    random.seed(1)
+    for text in ("1d6-1", "2d6+1d4+3", "1d6-1d4", "10d8+20"):
+        expr = dice.compile(text)
+        rolls = [expr.roll() for _ in range(500)]
+        assert expr.min <= min(rolls) and max(rolls) <= expr.max
+        assert abs(sum(rolls) / len(rolls) - expr.mean) < expr.max - expr.min
+
+
+def test_roll_many_backends_agree():
+    """Batch rolls match the expression's range and mean on both paths"""
+    expr = dice.compile("2d6+1d4-1")
+    batches = [list(dice.roll_many(expr, 20000, random.Random(3)))]
+    if dice.numpy is not None:
+        batches.append(list(dice.roll_many("2d6+1d4-1", 20000, dice.numpy.random.default_rng(3))))
+    for rolls in batches:
+        assert len(rolls) == 20000
+        assert min(rolls) == expr.min and max(rolls) == expr.max
+        assert abs(sum(rolls) / len(rolls) - expr.mean) < 0.1
+
+    assert dice.roll_many("1d8", 100, random.Random(5)) == dice.roll_many("1d8", 100, random.Random(5))
+
+
+def test_roll_many_follows_active_stream():
+    """Without an rng, batch rolls come from the active stream and repeat"""
+    def rolls(seed):
+        with dice.using_rng(random.Random(seed)):
+            return [list(dice.roll_many("3d6", 50)) for _ in range(2)]
+
+    first = rolls(11)
+    assert first == rolls(11)
+    assert first[0] != first[1]  # Successive calls still differ
+    assert first != rolls(12)
+
+
+def test_pmf_is_exact():
+    """Distributions come from convolution, not sampling"""
+    two_d6 = dice.pmf("2d6")
+    assert (two_d6.low, two_d6.high) == (2, 12)
+    assert abs(two_d6.probability(7) - 6 / 36) < 1e-12
+    assert abs(sum(two_d6.probs) - 1) < 1e-12
+    assert dice.pmf("2d6+1d4-1").mean == dice.compile("2d6+1d4-1").mean
+    assert dice.pmf("1d6-1d4").low == -3
+    assert dice.pmf("2d6") is two_d6
+
+
+def test_attack_queries():
+    """Hit chance, damage after a hit and expected damage follow the combat rules"""
+    assert dice.hit_probability(2, 13) == 0.5
+    assert dice.hit_probability(0, 25) == 0.0
+    assert dice.hit_probability(15, 10) == 1.0
+
+    # A hit always deals at least 1: 1d6-1 rolls 0 on a one
+    on_hit = dice.damage_on_hit("1d6-1")
+    assert on_hit.low == 1 and abs(on_hit.probability(1) - 2 / 6) < 1e-12
+
+    attack = dice.attack_damage("1d8+1", 2, 13)
+    assert attack.probability(0) == 0.5
+    assert abs(attack.mean - dice.expected_damage("1d8+1", 2, 13)) < 1e-12
+
+    # Monte Carlo agrees with the exact answer
+    rng = random.Random(9)
+    expr = dice.compile("1d8+1")
+    trials = 100000
+    total = sum(max(1, expr.roll(rng)) for _ in range(trials) if rng.randint(1, 20) + 2 >= 13)
+    assert abs(total / trials - dice.expected_damage(expr, 2, 13)) < 0.05
+
+
+if __name__ == "__main__":
+    test_compile_parses_expressions()
+    test_compiled_expressions_are_shared()
+    test_rolls_stay_in_range()
+    test_roll_many_backends_agree()
+    test_roll_many_follows_active_stream()
+    test_pmf_is_exact()
+    test_attack_queries()
+    print("All dice tests passed!")
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test script for the analytic encounter predictor
+"""
+import copy
+import random
+import dice
+from combat import Combat, Armor
+from monster import Monster
+from character import Character
+from encounter import predict
+from main import create_default_party
+
+ORC = ("Orc", "2d8", 13, 2, "1d8+1")
+
+
+def simulate(character, spec, fights, seed):
+    """Fight the real Combat many times and return (win rate, average HP lost)"""
+    rng = random.Random(seed)
+    wins = lost = 0
+    for _ in range(fights):
+        character.current_hp = character.max_hp
+        with dice.using_rng(rng):
+            combat = Combat(character, [Monster(*spec)])
+            while True:
+                result = combat.execute_round({'type': 'attack'}, 0)
+                if result['status'] != 'ongoing':
+                    break
+        wins += result['status'] == 'victory'
+        lost += character.max_hp - max(0, character.current_hp)
+    character.current_hp = character.max_hp
+    return wins / fights, lost / fights
+
+
+def test_prediction_matches_combat():
+    """One on one the prediction agrees with simulated fights"""
+    fighter = create_default_party().members[0]
+    prediction = predict(fighter, ORC)
+    win_rate, hp_lost = simulate(fighter, ORC, 4000, seed=3)
+    print(f"Predicted {prediction.win_probability:.3f}, simulated {win_rate:.3f}")
+    assert abs(prediction.win_probability - win_rate) < 0.03
+    assert abs(prediction.expected_hp_lost - hp_lost) < 0.6
+
+
+def test_prediction_edges():
+    """Certain outcomes and spawned monsters are handled"""
+    fighter = create_default_party().members[0]
+    harmless = Monster("Rat", "1d4", 30, -20, "1d2")
+    assert predict(fighter, harmless).win_probability == 0.0
+    assert predict(fighter, []).win_probability == 1.0
+
+    wounded = Monster(*ORC)
+    wounded.current_hp = 1
+    assert predict(fighter, wounded).win_probability > predict(fighter, ORC).win_probability
+
+
+def test_mixed_party_faces_every_armor_class():
+    """Monsters hit the lightly armored as often as the rest"""
+    fighter, wizard, _ = create_default_party().members
+    assert wizard.get_armor_class() < fighter.get_armor_class()
+    together = predict([fighter, wizard], ORC)
+    assert together == predict([wizard, fighter], ORC)  # Order doesn't matter
+
+    # Armoring the wizard, not just the first member, makes the fight safer
+    armored = copy.deepcopy(wizard)
+    armored.equipped_armor = Armor("Chain shirt", 4)
+    safer = predict([fighter, armored], ORC)
+    assert safer.expected_hp_lost < together.expected_hp_lost
+    assert safer.win_probability >= together.win_probability
+
+
+def test_descend_warning_uses_prediction():
+    """A strong party gets no warning, a weak one does"""
+    from game_state import GameState
+    for level, warned in ((8, False), (1, True)):
+        game = GameState(use_predesigned=False, seed=1)
+        hero = Character("Hero", "Fighter", level=level)
+        hero.set_abilities(16, 12, 16, 10, 10, 10)
+        game.party.add_member(hero)
+        game.initialize_game()
+        name, prediction = game.predict_level_danger(3)
+        game.dungeon_level = 2
+        game.party.position = list(game.current_map.stairs_down)
+        game.descend_stairs()
+        assert (game.dungeon_level == 2) == warned, (name, prediction)
+
+
+if __name__ == "__main__":
+    test_prediction_matches_combat()
+    test_prediction_edges()
+    test_mixed_party_faces_every_armor_class()
+    test_descend_warning_uses_prediction()
+    print("All encounter tests passed!")
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Test script for spatial monster queries and encounter gathering
+"""
+import random
+from dungeon_map import DungeonMap
+from game_state import GameState
+from monster import Monster
+
+# Two rooms joined by a corridor; the right room has a door on its far side
+LAYOUT = [
+    "##############################",
+    "#........#########...........#",
+    "#........#########...........#",
+    "#.................|..........#",
+    "#........#########...........#",
+    "#........#########...........#",
+    "##############################",
+]
+
+
+def make_map(layout=LAYOUT):
+    dungeon = DungeonMap()
+    dungeon.from_dict({
+        'width': len(layout[0]), 'height': len(layout),
+        'stairs_up': None, 'stairs_down': None, 'chests': [],
+        'tiles': layout, 'monsters': [],
+    })
+    return dungeon
+
+
+def goblin():
+    return Monster("Goblin", "1d8", 12, 1, "1d6")
+
+
+def test_regions():
+    """Rooms get their own region; corridors and doors get none"""
+    dungeon = make_map()
+    left, right = dungeon.region_at(1, 1), dungeon.region_at(20, 1)
+    assert left is not None and right is not None and left != right
+    assert dungeon.region_at(8, 5) == left and dungeon.region_at(28, 5) == right
+    assert dungeon.region_at(12, 3) is None    # Corridor
+    assert dungeon.region_at(18, 3) is None    # Door
+    assert dungeon.region_at(0, 0) is None     # Wall
+
+
+def test_radius_query_matches_scan():
+    """The bucket index finds exactly what a full scan finds"""
+    layout = ["#" * 60] + ["#" + "." * 58 + "#" for _ in range(38)] + ["#" * 60]
+    dungeon = make_map(layout)
+    rng = random.Random(1)
+    for _ in range(300):
+        x, y = rng.randint(1, 58), rng.randint(1, 38)
+        if not dungeon.get_monster_at(x, y):
+            dungeon.place_monster(goblin(), x, y)
+    for _ in range(50):
+        x, y, radius = rng.randint(0, 59), rng.randint(0, 39), rng.randint(0, 12)
+        expected = sorted((mx, my) for _, mx, my in dungeon.monsters
+                          if max(abs(mx - x), abs(my - y)) <= radius)
+        assert sorted((mx, my) for _, mx, my in dungeon.monsters_within(x, y, radius)) == expected
+
+    # Removing keeps every index in step
+    monster, x, y = dungeon.monsters[0]
+    dungeon.monsters_in_region(x, y)  # Build the region index first
+    dungeon.remove_monster(x, y)
+    assert dungeon.position_of(monster) is None
+    assert all(m is not monster for m, _, _ in dungeon.monsters_within(x, y, 0))
+    assert all(m is not monster for m, _, _ in dungeon.monsters_in_region(x, y))
+
+    # Removals go through the position index: the list and the index agree
+    for _ in range(len(dungeon.monsters) // 2):
+        _, x, y = dungeon.monsters[rng.randrange(len(dungeon.monsters))]
+        dungeon.remove_monster(x, y)
+    assert sorted((mx, my) for _, mx, my in dungeon.monsters) == \
+        sorted((mx, my) for _, mx, my in dungeon.monsters_within(30, 20, 60))
+    assert all(dungeon.position_of(m) == (mx, my) for m, mx, my in dungeon.monsters)
+    dungeon.remove_monster(0, 0)  # Nothing there: no change
+
+
+def test_gather_encounter():
+    """A fight takes in the room and the neighbours, nothing else"""
+    game = GameState()
+    game.current_map = dungeon = make_map()
+    target, roommate, far_roommate, dead = goblin(), goblin(), goblin(), goblin()
+    dead.current_hp = 0
+    corridor, other_room = goblin(), goblin()
+    dungeon.place_monster(target, 8, 3)
+    dungeon.place_monster(roommate, 3, 2)
+    dungeon.place_monster(dead, 4, 4)
+    dungeon.place_monster(corridor, 9, 3)       # Next to the target, outside the room
+    dungeon.place_monster(other_room, 20, 3)
+    dungeon.place_monster(far_roommate, 1, 1)   # Same room, but 7 tiles away
+    dungeon.place_monster(goblin(), 12, 3)      # Corridor, too far
+
+    monsters = game.gather_encounter(8, 3)
+    assert monsters[0] is target
+    assert monsters[1] is corridor               # Nearest first
+    assert set(map(id, monsters)) == set(map(id, [target, corridor, roommate, far_roommate]))
+    assert game.gather_encounter(12, 2) == []
+
+    # Monsters placed later are found too
+    late = goblin()
+    dungeon.place_monster(late, 5, 5)
+    assert any(m is late for m in game.gather_encounter(8, 3))
+
+
+if __name__ == "__main__":
+    test_regions()
+    test_radius_query_matches_scan()
+    test_gather_encounter()
+    print("All encounter gathering tests passed!")
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Test script for headless scripted play
+"""
+import contextlib
+import io
+from main import create_game, handle_input, state_digest, parse_args
+
+
+def play(seed, keys, map_file=None):
+    """Play a key script from a fixed seed and return the state digest"""
+    game = create_game(map_file, seed)
+    for key in keys:
+        if not handle_input(game, key, interactive=False):
+            break
+    return game, state_digest(game)
+
+
+def test_headless_runs_are_reproducible():
+    """Same seed and script give the same final state"""
+    keys = list('ddddssssaaaawwww' * 10) + ['c', 'i']
+    game_a, digest_a = play(7, keys, 'maps/mini_test_dungeon.json')
+    game_b, digest_b = play(7, keys, 'maps/mini_test_dungeon.json')
+    print(f"Digest: {digest_a} after {game_a.turn_count} turns")
+    assert digest_a == digest_b
+
+
+def test_quit_key_stops_script():
+    """'q' ends the run like it does interactively"""
+    game, _ = play(1, ['d', 'q', 'd', 'd', 'd'])
+    assert game.turn_count <= 1
+
+
+def test_unknown_map_is_a_usage_error():
+    """A bad --map exits with a usage message, not a traceback"""
+    stderr = io.StringIO()
+    try:
+        with contextlib.redirect_stderr(stderr):
+            parse_args(['--headless', '--map', 'no_such_map.json'])
+    except SystemExit as exit:
+        assert exit.code == 2
+    else:
+        raise AssertionError("parse_args() accepted an unknown map")
+    assert "Unknown map: no_such_map.json" in stderr.getvalue()
+
+
+if __name__ == "__main__":
+    test_headless_runs_are_reproducible()
+    test_quit_key_stops_script()
+    test_unknown_map_is_a_usage_error()
+    print("All headless tests passed!")
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Test script for the HTTP/JSON step API
+"""
+import json
+import tempfile
+import threading
+import http.client
+from http_api import ApiServer
+
+
+def request(port, method, path, body=None):
+    """Send one request and decode the JSON reply"""
+    conn = http.client.HTTPConnection('127.0.0.1', port)
+    conn.request(method, path, json.dumps(body) if body is not None else None)
+    response = conn.getresponse()
+    data = json.loads(response.read())
+    conn.close()
+    return response.status, data
+
+
+def test_step_returns_only_changes():
+    """Batched steps return just the sections changed since 'since'"""
+    with tempfile.TemporaryDirectory() as save_dir:
+        server = ApiServer(('127.0.0.1', 0), save_dir)
+        port = server.server_address[1]
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            status, game = request(port, 'POST', '/games',
+                                   {'map': 'sample_dungeon.json', 'seed': 1})
+            assert status == 201
+            assert 'view' in game['changed'] and 'party' in game['changed']
+            game_id, revision = game['id'], game['revision']
+
+            status, step = request(port, 'POST', f'/games/{game_id}/step',
+                                   {'actions': ['d', 'd', 's'], 'since': revision})
+            assert status == 200
+            print(f"Changed sections: {sorted(step['changed'])}")
+            assert 'party' not in step['changed']  # Nobody was hurt
+            assert step['revision'] > revision
+
+            status, observed = request(port, 'GET',
+                                       f"/games/{game_id}/observe?since={step['revision']}")
+            assert status == 200 and observed['changed'] == {}
+
+            status, saved = request(port, 'POST', f'/games/{game_id}/save')
+            assert status == 200
+            with open(saved['saved']) as f:
+                assert json.load(f)['turn_count'] == step['changed']['turn_count']
+
+            assert request(port, 'GET', '/games/999/observe')[0] == 404
+            assert request(port, 'POST', f'/games/{game_id}/step', {'actions': 5})[0] == 400
+
+            # A bad 'since' is rejected before any key is played
+            status, before = request(port, 'GET', f'/games/{game_id}/observe')
+            assert request(port, 'POST', f'/games/{game_id}/step',
+                           {'actions': ['d', 'd'], 'since': 'x'})[0] == 400
+            status, after = request(port, 'GET', f'/games/{game_id}/observe')
+            assert after['revision'] == before['revision']
+            assert after['changed']['turn_count'] == before['changed']['turn_count']
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    test_step_returns_only_changes()
+    print("All HTTP API tests passed!")
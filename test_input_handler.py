@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Test script for batched keyboard input parsing
+"""
+import os
+import sys
+from input_handler import InputHandler
+
+
+def test_parse_keys():
+    """Plain keys and complete escape sequences split into single keys"""
+    keys, rest = InputHandler.parse_keys('wa\x1b[Ad\x1bOB')
+    print(f"Parsed: {keys!r}")
+    assert keys == ['w', 'a', InputHandler.ARROW_UP, 'd', InputHandler.ARROW_DOWN]
+    assert rest == ''
+
+
+def test_parse_keys_partial_sequence():
+    """An escape sequence cut off mid-read is carried over, not mangled"""
+    keys, rest = InputHandler.parse_keys('ww\x1b[')
+    assert keys == ['w', 'w']
+    assert rest == '\x1b['
+
+    keys, rest = InputHandler.parse_keys(rest + 'Cs')
+    assert keys == [InputHandler.ARROW_RIGHT, 's']
+    assert rest == ''
+
+    keys, rest = InputHandler.parse_keys('\x1b')
+    assert keys == [] and rest == '\x1b'
+
+
+def test_get_keys_drains_burst():
+    """A pasted burst comes back as one batch in typing order"""
+    read_fd, write_fd = os.pipe()
+    os.write(write_fd, b'wwd\x1b[Bq')
+
+    old_stdin = sys.stdin
+    sys.stdin = os.fdopen(read_fd)
+    try:
+        handler = InputHandler()
+        keys = handler.get_keys(timeout=0.1)
+        assert keys == ['w', 'w', 'd', InputHandler.ARROW_DOWN, 'q']
+
+        # Nothing left to read - times out with an empty batch
+        assert handler.get_keys(timeout=0) == []
+
+        # get_key() hands out one key at a time from the same stream
+        os.write(write_fd, b'as')
+        assert handler.get_key(timeout=0.1) == 'a'
+        assert handler.get_key(timeout=0.1) == 's'
+    finally:
+        sys.stdin.close()
+        sys.stdin = old_stdin
+        os.close(write_fd)
+
+
+if __name__ == "__main__":
+    test_parse_keys()
+    test_parse_keys_partial_sequence()
+    test_get_keys_drains_burst()
+    print("All input handler tests passed!")
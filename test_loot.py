@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Test script for alias-method loot tables
+"""
+import random
+from collections import Counter
+from loot import AliasTable, LootTable, LootTables, LootEntry, load_loot_tables
+from monster import Monster, Orc, Treasure, NO_TREASURE
+from game_state import GameState
+from main import create_default_party
+import dice
+
+
+def test_alias_distribution():
+    """Draws follow the weights, and zero-weight entries never come up"""
+    weights = [50, 0, 30, 15, 5]
+    table = AliasTable(weights)
+    rng = random.Random(7)
+    draws = 100000
+    counts = Counter(table.sample(rng) for _ in range(draws))
+    assert counts[1] == 0
+    for index, weight in enumerate(weights):
+        assert abs(counts[index] / draws - weight / sum(weights)) < 0.01
+
+    # Many entries: the columns still describe the same distribution
+    weights = [random.Random(i).random() for i in range(500)]
+    table = AliasTable(weights)
+    share = [0.0] * len(weights)
+    for i, (probability, alias) in enumerate(zip(table.probability, table.alias)):
+        share[i] += probability / len(weights)
+        share[alias] += (1 - probability) / len(weights)
+    total = sum(weights)
+    assert all(abs(s - w / total) < 1e-9 for s, w in zip(share, weights))
+
+    assert AliasTable([3]).sample(rng) == 0
+    for bad in ([], [0, 0], [1, -1]):
+        try:
+            AliasTable(bad)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"{bad} should be rejected")
+
+
+def test_tables():
+    """Chests pick their depth's table; monsters gain their drop"""
+    always = lambda gold, *items: LootTable([LootEntry(1, dice.compile(gold), items)])
+    tables = LootTables(
+        chests=[(3, always("10", "Longsword")), (1, always("5"))],
+        monsters={"Orc": LootTable([LootEntry(1, None, ("Healing Potion",))])},
+    )
+    rng = random.Random(1)
+    assert tables.chest_table(0) is None
+    assert tables.roll_chest(0, rng) is NO_TREASURE
+    assert tables.roll_chest(2, rng) == Treasure(10, ())
+    assert tables.roll_chest(3, rng) == Treasure(30, ("Longsword",))
+    assert tables.roll_chest(9, rng) == Treasure(90, ("Longsword",))
+
+    orc = Orc()
+    assert tables.roll_drop(orc, rng) == Treasure(0, ("Healing Potion",))
+    assert orc.treasure == Treasure(20, ("Battle axe", "Healing Potion"))
+    assert Orc().treasure == Treasure(20, ("Battle axe",))  # Shared record untouched
+    assert tables.roll_drop(Monster("Rat", "1d4"), rng) is NO_TREASURE
+
+
+def test_data_file():
+    """The shipped tables load once and drive chests"""
+    tables = load_loot_tables()
+    assert tables is load_loot_tables()
+    assert tables.chest_table(1) is not None and "Orc" in tables.monsters
+
+    game = GameState(seed=3)
+    game.party = create_default_party()
+    game.initialize_game()
+    x, y = game.current_map.rooms[0].center()
+    game.current_map.place_chest(x, y)
+    game.handle_chest(x, y)
+    assert game.stats['chests_opened'] == 1
+    assert game.stats['total_gold_collected'] == game.party.total_gold()
+    assert (x, y) not in game.current_map.chests
+    assert "You open the chest..." in game.message_log
+
+
+if __name__ == "__main__":
+    test_alias_distribution()
+    test_tables()
+    test_data_file()
+    print("All loot tests passed!")
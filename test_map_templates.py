@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test script for shared predesigned map templates
+"""
+import json
+from dungeon_map import DungeonMap
+from map_templates import MapTemplateCache
+
+MAP_FILE = 'maps/sample_dungeon.json'
+
+
+def test_templates_are_parsed_once():
+    """Every session gets the same template objects"""
+    cache = MapTemplateCache()
+    first = cache.get(MAP_FILE)
+    assert cache.get(MAP_FILE) is first
+    assert len(first) == json.load(open(MAP_FILE))['num_levels']
+
+
+def test_template_map_matches_full_copy():
+    """A template-backed level looks and plays like a fully loaded one"""
+    template = MapTemplateCache().get(MAP_FILE)[0]
+    full = DungeonMap.load_multilevel_dungeon(MAP_FILE)[0]
+    light = DungeonMap.from_template(template)
+
+    x, y = full.stairs_up
+    for dx in range(6):
+        for dungeon in (full, light):
+            dungeon.update_fov(x + dx, y, radius=3)
+        assert light.render(x + dx, y) == full.render(x + dx, y)
+        assert light.is_blocked(x + dx, y + 1) == full.is_blocked(x + dx, y + 1)
+
+    assert light.to_dict()['tiles'] == full.to_dict()['tiles']
+    assert [(m.name, mx, my) for m, mx, my in light.monsters] == \
+        [(m.name, mx, my) for m, mx, my in full.monsters]
+
+
+def test_sessions_only_hold_their_changes():
+    """Changes stay in one session; untouched tiles are never created"""
+    template = MapTemplateCache().get(MAP_FILE)[0]
+    session_a = DungeonMap.from_template(template)
+    session_b = DungeonMap.from_template(template)
+
+    x, y = session_a.stairs_up
+    session_a.update_fov(x, y, radius=3)
+    session_a.tiles[y][x].char = '$'
+
+    assert session_b.tiles[y][x].char != '$'
+    assert template.rows[y][x] != '$'
+
+    created = sum(len(row.cells) for row in session_a.tiles)
+    print(f"Tiles created: {created} of {template.width * template.height}")
+    assert created < template.width * template.height // 4
+
+
+if __name__ == "__main__":
+    test_templates_are_parsed_once()
+    test_template_map_matches_full_copy()
+    test_sessions_only_hold_their_changes()
+    print("All map template tests passed!")
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Test script for frame timing instrumentation
+"""
+import os
+import itertools
+import metrics
+from metrics import FrameMetrics, NULL_METRICS, PHASES, ENV_FLAG
+
+
+class FakeClock:
+    """perf_counter() stand-in that advances by a fixed step per call"""
+
+    def __init__(self, step):
+        self.ticks = itertools.count()
+        self.step = step
+
+    def __call__(self):
+        return next(self.ticks) * self.step
+
+
+def test_percentiles_on_known_samples():
+    """Nearest-rank p50/p95/p99 over the window"""
+    collector = FrameMetrics(enabled=True, window=100)
+    for ms in range(100, 0, -1):  # Unsorted on purpose
+        collector.samples['render'].append(ms / 1000)
+    assert collector.percentiles('render') == (0.051, 0.096, 0.1)
+    assert collector.percentiles('fov') is None
+
+    # Only the last `window` frames count
+    small = FrameMetrics(enabled=True, window=3)
+    for value in (9.0, 1.0, 2.0, 3.0):
+        small.samples['frame'].append(value)
+    assert small.percentiles('frame') == (2.0, 3.0, 3.0)
+
+
+def test_phases_and_frames():
+    """Blocks add up per phase; a frame is the sum of its phases"""
+    real_clock = metrics.time.perf_counter
+    metrics.time.perf_counter = FakeClock(0.001)  # Each block lasts 1 ms
+    try:
+        collector = FrameMetrics(enabled=True)
+        with collector.phase('update'):
+            pass
+        with collector.phase('update'):
+            pass
+        with collector.phase('render'):
+            pass
+        collector.end_frame()
+    finally:
+        metrics.time.perf_counter = real_clock
+
+    assert collector.frames == 1
+    assert abs(collector.samples['update'][0] - 0.002) < 1e-9
+    assert abs(collector.samples['render'][0] - 0.001) < 1e-9
+    assert collector.samples['write'][0] == 0.0
+    assert abs(collector.samples['frame'][0] - 0.003) < 1e-9
+    assert len(collector.samples['latency']) == 0  # No input marked
+
+
+def test_overlay_text():
+    """The overlay shows p95 in milliseconds for phases with samples"""
+    collector = FrameMetrics(enabled=True)
+    assert collector.overlay_line() == "p95 ms: (no frames yet)"
+    collector.samples['frame'].append(0.004)
+    collector.samples['render'].append(0.0015)
+    assert collector.overlay_line() == "p95 ms: frame 4.00 | render 1.50"
+    assert any(line.startswith('render') for line in collector.summary())
+
+
+def test_disabled_metrics_are_no_ops():
+    """NULL_METRICS and an unset or '0' DUNGEON_METRICS record nothing"""
+    saved = os.environ.get(ENV_FLAG)
+    try:
+        os.environ.pop(ENV_FLAG, None)
+        unset = FrameMetrics.from_env()
+        os.environ[ENV_FLAG] = '0'
+        zero = FrameMetrics.from_env()
+        os.environ[ENV_FLAG] = '1'
+        assert FrameMetrics.from_env().enabled
+    finally:
+        if saved is None:
+            os.environ.pop(ENV_FLAG, None)
+        else:
+            os.environ[ENV_FLAG] = saved
+
+    for collector in (NULL_METRICS, unset, zero):
+        assert not collector.enabled
+        with collector.phase('render'):
+            pass
+        collector.mark_input()
+        collector.end_frame()
+        assert collector.frames == 0
+        assert all(not collector.samples[name] for name in PHASES + ('frame', 'latency'))
+        assert collector.overlay_line() == "p95 ms: (no frames yet)"
+
+
+if __name__ == "__main__":
+    test_percentiles_on_known_samples()
+    test_phases_and_frames()
+    test_overlay_text()
+    test_disabled_metrics_are_no_ops()
+    print("All metrics tests passed!")
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Test script for full-party combat
+"""
+import random
+import dice
+from combat_events import Attack, Death, Hit
+from party_combat import PartyCombat
+from character import Character
+from monster import Monster
+from main import create_default_party, create_game
+from game_state import GameMode
+
+ORC = ("Orc", "2d8", 13, 2, "1d8+1")
+GOBLIN = ("Goblin", "1d8", 12, 1, "1d6")
+
+
+def fight(combat, **kwargs):
+    """Fight to the end, returning the final result and every event"""
+    events = []
+    while True:
+        result = combat.execute_round(**kwargs)
+        events.extend(result['log'])
+        if result['status'] != 'ongoing':
+            return result, events
+
+
+def test_everyone_takes_turns():
+    """Each living party member and monster acts once a round"""
+    with dice.using_rng(random.Random(4)):
+        party = create_default_party()
+        goblins = [Monster(*GOBLIN) for _ in range(3)]
+        for combatant in party.members + goblins:
+            combatant.current_hp = combatant.max_hp = 1000
+        combat = PartyCombat(party.members, goblins)
+        for _ in range(3):
+            attackers = [e.attacker for e in combat.execute_round()['log'] if isinstance(e, Attack)]
+            assert sorted(attackers) == sorted(["Warrior", "Mage", "Healer"] + ["Goblin"] * 3)
+
+        # Monsters spread their attacks over the party
+        targets = set()
+        for _ in range(20):
+            targets.update(e.target for e in combat.execute_round()['log']
+                           if e.kind in ('hit', 'miss') and e.attacker == "Goblin")
+        assert targets == {"Warrior", "Mage", "Healer"}
+
+
+def test_fallen_lose_their_turns():
+    """The fallen leave the turn order; the others fight on"""
+    with dice.using_rng(random.Random(9)):
+        party = create_default_party()
+        party.members[1].current_hp = 0  # The wizard is already down
+        orcs = [Monster(*ORC) for _ in range(4)]
+        result, events = fight(PartyCombat(party.members, orcs))
+    attackers = {e.attacker for e in events if isinstance(e, Attack)}
+    assert "Mage" not in attackers and {"Warrior", "Healer", "Orc"} <= attackers
+    assert result['status'] in ('victory', 'defeat')
+    if result['status'] == 'victory':
+        assert all(not m.is_alive() for m in orcs)
+        assert result['rewards']['experience'] > 0
+        assert sum(isinstance(e, Death) and e.target == "Orc" for e in events) == 4
+    else:
+        assert not party.is_alive()
+
+
+def test_orders_and_persistent_initiative():
+    """The leader follows player orders; others can be given their own"""
+    with dice.using_rng(random.Random(2)):
+        party = create_default_party()
+        goblin = Monster(*GOBLIN)
+        for combatant in party.members + [goblin]:
+            combatant.current_hp = combatant.max_hp = 1000
+        combat = PartyCombat(party.members, [goblin], persistent_initiative=True)
+        first = combat.execute_round({'type': 'item', 'item_name': 'nothing'},
+                                     actions={2: {'type': 'item', 'item_name': 'other'}})
+        notes = sorted(str(e) for e in first['log'] if e.kind == 'note')
+        assert notes == ["Cannot use nothing!", "Cannot use other!"]
+        assert sorted(e.attacker for e in first['log'] if isinstance(e, Attack)) == ["Goblin", "Mage"]
+
+        # Initiative rolled once: the same order every round
+        orders = [[e.attacker for e in combat.execute_round()['log'] if isinstance(e, Attack)]
+                  for _ in range(4)]
+        assert len(orders[0]) == 4 and all(order == orders[0] for order in orders)
+
+        result, _ = fight(PartyCombat(party.members, [Monster(*GOBLIN)]),
+                          player_action={'type': 'flee'})
+        assert result['status'] in ('fled', 'victory')
+
+
+def test_large_battle():
+    """Dozens on each side fight to a finish"""
+    with dice.using_rng(random.Random(6)):
+        fighters = []
+        for i in range(40):
+            fighter = Character(f"Fighter {i}", "Fighter")
+            fighter.set_abilities(str_score=15, dex=10, con=16, int_score=10, wis=10, cha=10)
+            fighters.append(fighter)
+        orcs = [Monster(*ORC) for _ in range(40)]
+        combat = PartyCombat(fighters, orcs)
+        result, events = fight(combat)
+    assert result['status'] in ('victory', 'defeat')
+    deaths = sum(isinstance(e, Death) for e in events)
+    assert deaths == sum(not c.is_alive() for c in fighters + orcs)
+
+
+def test_simulate_matches_execute_round():
+    """simulate() plays the same fight as attacking round by round"""
+    def setup(seed):
+        rng = random.Random(seed)
+        with dice.using_rng(rng):
+            party = create_default_party().members
+            monsters = [Monster(*ORC) for _ in range(4)]
+        return rng, PartyCombat(party, monsters)
+
+    for seed in range(20):
+        rng, combat = setup(seed)
+        with dice.using_rng(rng):
+            result, events = fight(combat)
+        rng, fast = setup(seed)
+        with dice.using_rng(rng):
+            outcome = fast.simulate()
+        assert outcome.status == result['status']
+        assert outcome.rounds == combat.round
+        assert [c.current_hp for c in fast.characters] == [c.current_hp for c in combat.characters]
+        party_names = {c.name for c in combat.characters}
+        assert outcome.damage_dealt == sum(e.damage for e in events
+                                           if isinstance(e, Hit) and e.attacker in party_names)
+
+
+def test_game_uses_whole_party():
+    """Bumping into a monster starts a party fight"""
+    game = create_game('maps/mini_test_dungeon.json', seed=3)
+    monster, x, y = game.current_map.monsters[0]
+    game.start_combat(x, y)
+    assert game.mode == GameMode.COMBAT
+    assert isinstance(game.combat_instance, PartyCombat)
+    assert game.combat_instance.characters == game.party.members
+
+
+if __name__ == "__main__":
+    test_everyone_takes_turns()
+    test_fallen_lose_their_turns()
+    test_orders_and_persistent_initiative()
+    test_large_battle()
+    test_simulate_matches_execute_round()
+    test_game_uses_whole_party()
+    print("All party combat tests passed!")
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test script for colored map rendering and incremental screen updates
+"""
+import re
+from dungeon_map import DungeonMap
+from screen import ScreenBuffer
+from game_state import GameState
+from main import create_default_party
+
+ANSI = re.compile(r'\x1b\[[0-9;]*[A-Za-z]')
+
+
+def explored_sample_map():
+    """Predesigned sample map, fully explored, party in the top room"""
+    dungeon = DungeonMap.create_simple_map_designer()
+    for row in dungeon.tiles:
+        for tile in row:
+            tile.explored = True
+    dungeon.update_fov(25, 4, radius=3)
+    return dungeon
+
+
+def test_colors_match_monochrome_text():
+    """Stripping the color codes gives exactly the monochrome map"""
+    dungeon = explored_sample_map()
+    mono = dungeon.render(25, 4)
+    colored = dungeon.render(25, 4, colors=True)
+    assert ANSI.sub('', colored) == mono
+
+
+def test_colors_are_run_length_encoded():
+    """Colored frames cost only slightly more bytes than monochrome ones"""
+    dungeon = explored_sample_map()
+    mono = dungeon.render(25, 4)
+    colored = dungeon.render(25, 4, colors=True)
+    overhead = len(colored.encode()) / len(mono.encode())
+    print(f"Mono {len(mono.encode())} bytes, colored {len(colored.encode())} bytes ({overhead:.2f}x)")
+    assert overhead < 1.5
+
+    # Every line ends in the default color so it can be redrawn on its own
+    for line in colored.split('\n'):
+        codes = ANSI.findall(line)
+        assert not codes or codes[-1] == '\x1b[0m'
+
+
+def test_display_colors_can_be_turned_off():
+    """Frontends without ANSI support (curses) get the plain map"""
+    game = GameState(seed=1)
+    game.party = create_default_party()
+    game.initialize_game()
+    game.use_colors = True
+    assert ANSI.search(game.get_display()['map'])
+    plain = game.get_display(colors=False)['map']
+    assert not ANSI.search(plain)
+    assert plain == ANSI.sub('', game.get_display()['map'])
+
+
+def test_screen_buffer_redraws_changed_lines_only():
+    """After the first frame only changed lines are written"""
+    screen = ScreenBuffer()
+    first = screen.diff(['title', 'map row', 'status'])
+    assert first.startswith('\x1b[H\x1b[2J')
+
+    assert screen.diff(['title', 'map row', 'status']) == ''
+
+    update = screen.diff(['title', 'map row!', 'status'])
+    assert 'map row!' in update
+    assert 'title' not in update and 'status' not in update
+
+    screen.reset()
+    assert screen.diff(['title']).startswith('\x1b[H\x1b[2J')
+
+
+if __name__ == "__main__":
+    test_colors_match_monochrome_text()
+    test_colors_are_run_length_encoded()
+    test_display_colors_can_be_turned_off()
+    test_screen_buffer_redraws_changed_lines_only()
+    print("All rendering tests passed!")
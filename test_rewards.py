@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Test script for monster treasure, experience and reward claiming
+"""
+from monster import Monster, Orc, Dragon, Treasure, parse_treasure
+from combat import collect_rewards
+from game_state import GameState
+from main import create_default_party
+
+
+def test_structured_treasure():
+    """Treasure and XP are fields; string lists are parsed once per type"""
+    orc = Orc()
+    assert orc.treasure == Treasure(gold=20, items=("Battle axe",))
+    assert orc.xp == 200
+
+    lines = ["15 gold pieces", "Dagger", "5 gold"]
+    first = Monster("Bandit", "2d8", 12, 2, "1d6", treasure=lines)
+    second = Monster("Bandit", "2d8", 12, 2, "1d6", treasure=lines)
+    assert first.treasure == Treasure(gold=20, items=("Dagger",))
+    assert first.treasure is second.treasure
+    assert parse_treasure.cache_info().hits >= 1
+    assert first.xp == 200
+
+    assert Monster("Rat", "1d4").treasure == Treasure(0, ())
+    assert Monster("Boss", "3d8", xp=1234).xp == 1234
+
+
+def test_collect_rewards():
+    """Rewards are the sums of the monsters' fields"""
+    monsters = [Orc(), Orc(), Dragon()]
+    rewards = collect_rewards(monsters)
+    assert rewards['gold'] == 20 + 20 + monsters[2].treasure.gold
+    assert rewards['items'] == ["Battle axe", "Battle axe"] + list(monsters[2].treasure.items)
+    assert rewards['experience'] == sum(m.xp for m in monsters)
+
+
+def test_claim_rewards():
+    """Victories hand out gold, items and XP and update the statistics"""
+    game = GameState(seed=1)
+    game.party = party = create_default_party()
+    gold_before = party.total_gold()
+    xp_before = sum(m.experience for m in party.members)
+
+    game.claim_rewards(collect_rewards([Orc(), Orc()]), 2)
+
+    assert party.total_gold() == gold_before + 40
+    assert sum(m.experience for m in party.members) == xp_before + 400 // 3 * 3  # Even shares
+    assert [item.name for item in party.members[0].inventory].count("Battle axe") == 2
+    assert game.stats['monsters_defeated'] == 2
+    assert game.stats['total_experience'] == 400
+    assert game.stats['total_gold_collected'] == 40
+
+
+if __name__ == "__main__":
+    test_structured_treasure()
+    test_collect_rewards()
+    test_claim_rewards()
+    print("All reward tests passed!")
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Test script for the multi-session game server
+"""
+import asyncio
+from server import (GameServer, TelnetParser, Spectator, IAC, AYT, SB, SE, WILL,
+                    OPT_NAWS, AYT_REPLY, HIGH_WATER, LOW_WATER)
+
+
+def test_telnet_parser():
+    """Commands are stripped from the data, even when split across reads"""
+    parser = TelnetParser()
+    events = parser.feed(b'wa' + bytes([IAC, WILL, 1]) + b'd' + bytes([IAC]))
+    assert events == [('data', b'wad')]
+
+    events = parser.feed(bytes([AYT]) + b's')
+    assert events == [('ayt',), ('data', b's')]
+
+    naws = bytes([IAC, SB, OPT_NAWS, 0, 100, 0, 30, IAC, SE])
+    assert parser.feed(naws) == [('naws', 100, 30)]
+
+
+def test_sessions_play_independently():
+    """Two connections each get their own game and a reply to every batch"""
+    async def scenario():
+        server = GameServer('127.0.0.1', 0, map_file='maps/sample_dungeon.json')
+        port = await server.start()
+
+        clients = [await asyncio.open_connection('127.0.0.1', port) for _ in range(2)]
+        replies = []
+        for reader, writer in clients:
+            writer.write(b'dd' + bytes([IAC, AYT]))
+            await writer.drain()
+            replies.append(await reader.readuntil(AYT_REPLY))
+        assert len(server.sessions) == 2
+        sessions = list(server.sessions.values())
+        assert sessions[0].game is not sessions[1].game
+
+        for reader, writer in clients:
+            writer.write(b'q')
+            await writer.drain()
+            await reader.read()  # Server closes the session
+            writer.close()
+        await server.close()
+        return replies
+
+    replies = asyncio.run(scenario())
+    print(f"Frame bytes per client: {[len(r) for r in replies]}")
+    assert all(b'DUNGEON SURVIVAL' in reply for reply in replies)
+
+
+class FakeTransport:
+    def __init__(self):
+        self.buffered = 0
+
+    def get_write_buffer_size(self):
+        return self.buffered
+
+
+class FakeWriter:
+    def __init__(self):
+        self.transport = FakeTransport()
+        self.written = []
+
+    def is_closing(self):
+        return False
+
+    def write(self, data):
+        self.written.append(data)
+
+
+def test_slow_spectator_drops_to_keyframes():
+    """A backed-up spectator skips diffs and resyncs with one keyframe"""
+    writer = FakeWriter()
+    spectator = Spectator(None, writer)
+    keyframe = lambda: b'KEY'
+
+    spectator.send(b'd1', keyframe)
+    spectator.send(b'd2', keyframe)
+    assert writer.written == [b'KEY', b'd2']
+
+    writer.transport.buffered = HIGH_WATER + 1
+    spectator.send(b'd3', keyframe)
+    writer.transport.buffered = LOW_WATER + 1
+    spectator.send(b'd4', keyframe)
+    assert writer.written == [b'KEY', b'd2']
+
+    writer.transport.buffered = LOW_WATER
+    spectator.send(b'd5', keyframe)
+    spectator.send(b'd6', keyframe)
+    assert writer.written == [b'KEY', b'd2', b'KEY', b'd6']
+    assert spectator.keyframes == 2
+
+
+def test_spectators_share_one_diff():
+    """Spectators get a keyframe on attach, then the player's turns"""
+    async def scenario():
+        server = GameServer('127.0.0.1', 0, map_file='maps/sample_dungeon.json',
+                            spectate_port=0)
+        port = await server.start()
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(bytes([IAC, AYT]))
+        await writer.drain()
+        await reader.readuntil(AYT_REPLY)
+        session_id = next(iter(server.sessions))
+
+        watchers = []
+        for _ in range(2):
+            w_reader, w_writer = await asyncio.open_connection('127.0.0.1', server.spectate_port)
+            prompt = await w_reader.readuntil(b'Watch session: ')
+            assert str(session_id).encode() in prompt
+            w_writer.write(f"{session_id}\r\n".encode())
+            await w_writer.drain()
+            keyframe = await w_reader.readuntil(b'DUNGEON SURVIVAL')
+            assert keyframe.startswith(b'\x1b[H\x1b[2J')
+            watchers.append((w_reader, w_writer))
+
+        session = server.sessions[session_id]
+        assert len(session.spectators) == 2
+
+        writer.write(b'q')
+        await writer.drain()
+        await reader.read()
+        endings = [await w_reader.read() for w_reader, _ in watchers]
+        for _, w_writer in watchers:
+            w_writer.close()
+        writer.close()
+        await server.close()
+        return endings
+
+    endings = asyncio.run(scenario())
+    assert all(b'The session has ended.' in ending for ending in endings)
+
+
+def test_loadtest_stops_when_connections_fail():
+    """A refused connection ends the load test's wait instead of hanging it"""
+    from server_loadtest import wait_for_connections
+
+    async def refused():
+        raise ConnectionRefusedError("refused")
+
+    async def scenario():
+        tasks = [asyncio.create_task(refused()) for _ in range(3)]
+        try:
+            await asyncio.wait_for(wait_for_connections([], 3, tasks), timeout=5)
+        except ConnectionRefusedError:
+            return True
+        finally:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        return False
+
+    assert asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    test_telnet_parser()
+    test_sessions_play_independently()
+    test_slow_spectator_drops_to_keyframes()
+    test_spectators_share_one_diff()
+    test_loadtest_stops_when_connections_fail()
+    print("All server tests passed!")